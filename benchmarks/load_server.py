@@ -0,0 +1,225 @@
+"""
+Local stand-in for the GoMarket L2 WebSocket feed
+
+    python benchmarks/load_server.py --port 8765 --rate 1000 --depth 50
+
+Serves synthetic books in the feed format on ws://host:port/{venue}/{symbol}.
+Every frame also carries 'seq', 'conn' (connection number for its path),
+'sent_at' (epoch seconds) and 'last_close' (when the server last dropped that
+path, 0 if never), so a client can measure end-to-end latency, conflation and
+reconnect recovery.
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import websockets
+from utils.synthetic import SyntheticBookGenerator
+
+
+@dataclass(frozen=True)
+class LoadProfile:
+    rate: float = 100.0             # Frames per second per connection
+    depth: int = 50                 # Levels per side
+    burst_rate: float = 0.0         # Frames per second during a burst (0 disables bursts)
+    burst_duration: float = 0.5     # Seconds
+    burst_interval: float = 5.0     # Seconds between burst starts
+    disconnect_every: float = 0.0   # Drop each connection after this many seconds (0 never)
+    frame_pool: int = 256           # Distinct pre-generated books cycled per connection
+
+    def rate_at(self, elapsed: float) -> float:
+        """Send rate `elapsed` seconds into a connection"""
+        if self.burst_rate and elapsed % self.burst_interval < self.burst_duration:
+            return self.burst_rate
+        return self.rate
+
+
+class LoadServer:
+    def __init__(self, profile: LoadProfile, host: str = '127.0.0.1', port: int = 0):
+        """
+        Serve paced synthetic frames to every connecting client
+
+        Books are generated up front per path so that frame construction does
+        not limit the achievable rate; each send only stamps the sequence and
+        timing fields.
+        """
+        self.profile = profile
+        self.host = host
+        self.port = port
+        self.frames_sent = 0
+        self.connections = 0
+        self.disconnects = 0
+        self._connection_counts: Dict[str, int] = {}
+        self._last_close: Dict[str, float] = {}
+        self._pools: Dict[str, list] = {}
+        self._stop: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def url_template(self) -> str:
+        return f"ws://{self.host}:{self.port}/{{venue}}/{{symbol}}"
+
+    async def serve(self, stop: Optional[asyncio.Event] = None):
+        """Serve until `stop` is set"""
+        self._stop = stop or asyncio.Event()
+        async with websockets.serve(self._handler, self.host, self.port, max_size=None) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stop.wait()
+
+    def start(self) -> str:
+        """Serve on a background thread and return the URL template"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self.serve(),),
+                                        name="load-server", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self.url_template
+
+    def stop(self):
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self._thread.join(5)
+
+    def _pool(self, path: str) -> list:
+        pool = self._pools.get(path)
+        if pool is None:
+            venue, _, symbol = path.strip('/').rpartition('/')
+            generator = SyntheticBookGenerator(depth=self.profile.depth, symbol=symbol,
+                                               exchange=venue.upper() or "LOAD", seed=len(self._pools))
+            # Frame bodies without the opening brace, ready to be prefixed with the stamps
+            pool = self._pools[path] = [generator.next_frame()[1:] for _ in range(self.profile.frame_pool)]
+        return pool
+
+    async def _handler(self, ws, path):
+        self.connections += 1
+        conn = self._connection_counts[path] = self._connection_counts.get(path, 0) + 1
+        last_close = self._last_close.get(path, 0.0)
+        pool = self._pool(path)
+        start = time.perf_counter()
+        next_send = start
+        try:
+            for seq in itertools.count():
+                now = time.perf_counter()
+                elapsed = now - start
+                if self.profile.disconnect_every and elapsed >= self.profile.disconnect_every:
+                    break
+                if next_send > now:
+                    await asyncio.sleep(next_send - now)
+                elif seq % 64 == 0:
+                    await asyncio.sleep(0)  # Behind schedule: still let other connections run
+                stamp = f'{{"seq": {seq}, "conn": {conn}, "sent_at": {time.time():.6f}, "last_close": {last_close:.6f}, '
+                await ws.send(stamp + pool[seq % len(pool)])
+                self.frames_sent += 1
+                next_send += 1.0 / self.profile.rate_at(elapsed)
+        except websockets.exceptions.ConnectionClosed:
+            return
+        self._last_close[path] = time.time()
+        self.disconnects += 1
+        await ws.close()
+
+
+def run_server_process(profile: LoadProfile, port_queue, stop_event, host: str = '127.0.0.1'):
+    """multiprocessing entry point: serve until `stop_event` is set, reporting the port and final counters"""
+    logging.getLogger('websockets').setLevel(logging.WARNING)
+    server = LoadServer(profile, host)
+
+    async def main():
+        stop = asyncio.Event()
+        task = asyncio.ensure_future(server.serve(stop))
+        while not server._ready.is_set():
+            await asyncio.sleep(0.01)
+        port_queue.put(server.port)
+        while not stop_event.is_set():
+            await asyncio.sleep(0.05)
+        stop.set()
+        await task
+
+    asyncio.run(main())
+    port_queue.put({'frames_sent': server.frames_sent, 'connections': server.connections,
+                    'disconnects': server.disconnects})
+
+
+def start_server_process(profile: LoadProfile, host: str = '127.0.0.1'):
+    """
+    Run a LoadServer in a separate process so it does not compete with the
+    client for the GIL
+
+    Returns:
+        (url_template, stop) where stop() shuts the server down and returns its counters
+    """
+    context = multiprocessing.get_context('spawn')
+    port_queue = context.Queue()
+    stop_event = context.Event()
+    process = context.Process(target=run_server_process, args=(profile, port_queue, stop_event, host),
+                              name="load-server", daemon=True)
+    process.start()
+    port = port_queue.get(timeout=30)
+
+    def stop() -> dict:
+        stop_event.set()
+        counters = port_queue.get(timeout=10)
+        process.join(5)
+        return counters
+
+    return f"ws://{host}:{port}/{{venue}}/{{symbol}}", stop
+
+
+def start_server_thread(profile: LoadProfile, host: str = '127.0.0.1'):
+    """
+    Run a LoadServer on a thread of this process, with the same contract as
+    start_server_process; cheaper to start, e.g. for smoke tests at low rates
+
+    Returns:
+        (url_template, stop) where stop() shuts the server down and returns its counters
+    """
+    server = LoadServer(profile, host)
+    url_template = server.start()
+
+    def stop() -> dict:
+        server.stop()
+        return {'frames_sent': server.frames_sent, 'connections': server.connections,
+                'disconnects': server.disconnects}
+
+    return url_template, stop
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Synthetic L2 WebSocket feed")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=float, default=100.0, help="Frames per second per connection")
+    parser.add_argument('--depth', type=int, default=50, help="Levels per side")
+    parser.add_argument('--burst-rate', type=float, default=0.0, dest='burst_rate')
+    parser.add_argument('--burst-duration', type=float, default=0.5, dest='burst_duration')
+    parser.add_argument('--burst-interval', type=float, default=5.0, dest='burst_interval')
+    parser.add_argument('--disconnect-every', type=float, default=0.0, dest='disconnect_every',
+                        help="Drop each connection after this many seconds")
+    args = parser.parse_args(argv)
+
+    profile = LoadProfile(rate=args.rate, depth=args.depth, burst_rate=args.burst_rate,
+                          burst_duration=args.burst_duration, burst_interval=args.burst_interval,
+                          disconnect_every=args.disconnect_every)
+    server = LoadServer(profile, args.host, args.port)
+    print(f"Serving {server.url_template}")
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+End-to-end load test of OrderbookClient and the processing chain
+
+    python benchmarks/load_test.py --rate 100 --rate 1000 --rate 5000 --symbols 2
+    python benchmarks/load_test.py --rate 500 --disconnect-every 2 --burst-rate 5000
+
+Starts a LoadServer in a separate process, points a TradingEngine at it and,
+for each offered rate, reports sustained receive and compute throughput,
+end-to-end latency (server send to compute result), conflation slot depth and
+reconnect recovery time. A run is marked saturated when the client receives
+less than 95% of the offered frames.
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from engine import TradingEngine
+from load_server import LoadProfile, start_server_process
+from websocket.connection_manager import Subscription
+
+SATURATION_RATIO = 0.95
+
+
+class LoadProbe:
+    def __init__(self, engine: TradingEngine, sample_interval: float = 0.005):
+        """Collect latency, reconnect and queue depth samples from a running engine"""
+        self.engine = engine
+        self.sample_interval = sample_interval
+        self.recording = False
+        self.latencies: List[float] = []
+        self.recoveries: List[float] = []
+        self.queue_depths: List[int] = []
+        self.processed = 0
+        self._connections: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="load-probe", daemon=True)
+
+    def start(self):
+        self.engine.add_listener(self.on_result)
+        self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        self._sampler.join(1)
+
+    def on_result(self, data: dict):
+        now = time.time()
+        symbol = data.get('symbol', '')
+        conn = data.get('conn', 0)
+        previous = self._connections.get(symbol)
+        self._connections[symbol] = conn
+        if not self.recording:
+            return
+        self.processed += 1
+        self.latencies.append((now - data['sent_at']) * 1000)
+        if previous is not None and conn != previous and data.get('last_close'):
+            self.recoveries.append((now - data['last_close']) * 1000)
+
+    def _sample(self):
+        while not self._stop.wait(self.sample_interval):
+            if self.recording:
+                self.queue_depths.append(self.engine.pipeline.stats['pending'])
+
+
+def received_messages(engine: TradingEngine) -> int:
+    return sum(stats['messages'] for stats in engine.connection_manager.stats().values())
+
+
+def run_load(profile: LoadProfile, args, start_server=start_server_process) -> dict:
+    """Measure one offered rate; `start_server` returns (url_template, stop) like start_server_process"""
+    url_template, stop_server = start_server(profile)
+    subscriptions = [Subscription("LOAD", f"SYM{i}-USDT-SWAP") for i in range(args.symbols)]
+    engine = TradingEngine(subscriptions=subscriptions, conflate=not args.no_conflate,
+                           url_template=url_template, max_depth=args.max_depth, shards=args.shards)
+    probe = LoadProbe(engine)
+    probe.start()
+    engine.start()
+
+    time.sleep(args.warmup)
+    received_start = received_messages(engine)
+    probe.recording = True
+    start = time.perf_counter()
+    time.sleep(args.duration)
+    probe.recording = False
+    elapsed = time.perf_counter() - start
+    received = received_messages(engine) - received_start
+
+    pipeline_stats = engine.pipeline.stats
+    engine.stop()
+    probe.stop()
+    server_stats = stop_server()
+
+    offered = profile.rate * args.symbols
+    latencies = np.array(probe.latencies or [np.nan])
+    depths = np.array(probe.queue_depths or [0])
+    return {
+        'offered_per_s': offered,
+        'received_per_s': received / elapsed,
+        'processed_per_s': probe.processed / elapsed,
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p99_ms': float(np.percentile(latencies, 99)),
+        'latency_max_ms': float(latencies.max()),
+        'queue_depth_mean': float(depths.mean()),
+        'queue_depth_max': int(depths.max()),
+        'conflated': pipeline_stats['conflated'],
+        'reconnects': len(probe.recoveries),
+        'recovery_mean_ms': float(np.mean(probe.recoveries)) if probe.recoveries else 0.0,
+        'recovery_max_ms': float(np.max(probe.recoveries)) if probe.recoveries else 0.0,
+        'server_frames_sent': server_stats['frames_sent'],
+        'saturated': bool(profile.burst_rate == 0 and received / elapsed < SATURATION_RATIO * offered)
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="End-to-end load test against a local synthetic feed")
+    parser.add_argument('--rate', type=float, action='append', dest='rates',
+                        help="Frames per second per symbol, may be repeated for a sweep (default: 100)")
+    parser.add_argument('--symbols', type=int, default=1, help="Concurrent subscriptions")
+    parser.add_argument('--depth', type=int, default=50, help="Levels per side sent by the server")
+    parser.add_argument('--max-depth', type=int, dest='max_depth', help="Levels per side decoded by the client")
+    parser.add_argument('--burst-rate', type=float, default=0.0, dest='burst_rate')
+    parser.add_argument('--burst-duration', type=float, default=0.5, dest='burst_duration')
+    parser.add_argument('--burst-interval', type=float, default=5.0, dest='burst_interval')
+    parser.add_argument('--disconnect-every', type=float, default=0.0, dest='disconnect_every',
+                        help="Server drops each connection after this many seconds")
+    parser.add_argument('--shards', type=int, help="Connection worker processes (default: one event loop)")
+    parser.add_argument('--no-conflate', action='store_true', dest='no_conflate',
+                        help="Process every frame in the receive loop")
+    parser.add_argument('--duration', type=float, default=10.0, help="Measured seconds per rate")
+    parser.add_argument('--warmup', type=float, default=2.0, help="Unmeasured seconds per rate")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    print(f"{'offered/s':>10} {'recv/s':>10} {'proc/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'q mean':>7} {'q max':>6} {'reconn':>7} {'recov ms':>9}")
+    for rate in args.rates or [100.0]:
+        profile = LoadProfile(rate=rate, depth=args.depth, burst_rate=args.burst_rate,
+                              burst_duration=args.burst_duration, burst_interval=args.burst_interval,
+                              disconnect_every=args.disconnect_every)
+        result = run_load(profile, args)
+        print(f"{result['offered_per_s']:10.0f} {result['received_per_s']:10.0f} {result['processed_per_s']:8.0f} "
+              f"{result['latency_p50_ms']:8.2f} {result['latency_p99_ms']:8.2f} "
+              f"{result['queue_depth_mean']:7.2f} {result['queue_depth_max']:6d} "
+              f"{result['reconnects']:7d} {result['recovery_mean_ms']:9.1f}"
+              f"{'  saturated' if result['saturated'] else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
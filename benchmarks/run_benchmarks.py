@@ -0,0 +1,258 @@
+"""
+Hot path benchmarks on synthetic L2 books
+
+    python benchmarks/run_benchmarks.py                        # report only
+    python benchmarks/run_benchmarks.py --save-baseline        # record thresholds
+    python benchmarks/run_benchmarks.py --check                # exit 1 on regression
+
+Every case times individual calls and reports p50/p99 latency in
+microseconds and sustained calls per second. A saved baseline stores, per
+case, the measured numbers and the thresholds derived from them; --check
+fails when a case's p50 or p99 exceeds its threshold.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import numpy as np
+from engine import TradingEngine
+from models.execution import walk_book
+from models.fee_calculator import FeeCalculator
+from models.maker_taker import MakerTakerPredictor
+from models.market_impact import AlmgrenChrissModel
+from models.slippage import SlippageModel
+from utils.synthetic import SyntheticBookGenerator
+from websocket.decoder import FrameDecoder
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Case name -> setup(generator, args) returning the step function to time.
+# Engines run without background training: fits happen in another process,
+# and on a small machine they would only add scheduling noise to the data path.
+BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    def register(setup: Callable) -> Callable:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def levels(book) -> tuple:
+    return book.asks, book.bids
+
+
+@benchmark('decode')
+def setup_decode(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    decoder = FrameDecoder(max_depth=args.depth)
+    frames = [generator.next_frame() for _ in range(args.iterations)]
+    return lambda i: decoder.decode(frames[i])
+
+
+@benchmark('engine.process_orderbook_data')
+def setup_process(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    engine = TradingEngine(background_training=False)
+    messages = [generator.next_message() for _ in range(args.iterations)]
+    return lambda i: engine.process_orderbook_data(messages[i])
+
+
+@benchmark('slippage.update')
+def setup_slippage_update(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    model = SlippageModel()
+    books = [levels(book) for book in generator.books(args.iterations)]
+    return lambda i: model.update(*books[i], args.quantity)
+
+
+@benchmark('slippage.predict_slippage')
+def setup_slippage_predict(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    model = SlippageModel()
+    for book in generator.books(model.window_size):
+        model.update_book(book, args.quantity)
+    books = [levels(book) for book in generator.books(args.iterations)]
+    return lambda i: model.predict_slippage(*books[i], args.quantity)
+
+
+@benchmark('maker_taker.predict_proportion')
+def setup_maker_taker(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    model = MakerTakerPredictor()
+    labels = generator.rng.random(100) < 0.5
+    for book, is_maker in zip(generator.books(100), labels):
+        model.update_book(book, book.timestamp, bool(is_maker))
+    books = [levels(book) for book in generator.books(args.iterations)]
+    return lambda i: model.predict_proportion(*books[i])
+
+
+@benchmark('maker_taker.update')
+def setup_maker_taker_update(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    model = MakerTakerPredictor()
+    books = list(generator.books(args.iterations))
+    labels = generator.rng.random(args.iterations) < 0.5
+    return lambda i: model.update_book(books[i], books[i].timestamp, bool(labels[i]))
+
+
+@benchmark('almgren_chriss.market_impact')
+def setup_market_impact(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    model = AlmgrenChrissModel(volatility=0.02)
+    prices = [book.mid_price for book in generator.books(args.iterations)]
+    return lambda i: model.calculate_market_impact(args.quantity, prices[i], 1.0)
+
+
+@benchmark('almgren_chriss.optimal_execution')
+def setup_optimal_execution(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    model = AlmgrenChrissModel(volatility=0.02)
+    prices = [book.mid_price for book in generator.books(args.iterations)]
+    return lambda i: model.calculate_optimal_execution(args.quantity, prices[i], 1.0)
+
+
+@benchmark('almgren_chriss.efficient_frontier')
+def setup_efficient_frontier(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    model = AlmgrenChrissModel(volatility=0.02)
+    prices = [book.mid_price for book in generator.books(args.iterations)]
+    quantities = np.linspace(0.1, 2, 20) * args.quantity
+    return lambda i: model.efficient_frontier(quantities, prices[i], 1.0)
+
+
+@benchmark('execution.walk_book')
+def setup_walk_book(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    books = list(generator.books(args.iterations))
+    sizes = np.linspace(0, 2 * args.quantity, 100)
+    return lambda i: walk_book(books[i], sizes)
+
+
+@benchmark('cost_surface.evaluate')
+def setup_cost_surface(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    engine = TradingEngine(background_training=False)
+    for book in generator.books(engine.slippage_model.window_size):
+        engine.slippage_model.update_book(book, args.quantity)
+    books = list(generator.books(args.iterations))
+    quantities = np.linspace(1, 2 * args.quantity, 100)
+    # 100 sizes x 2 sides x 3 volatilities x 9 fee tiers = 5400 priced orders per call
+    return lambda i: engine.compute_cost_surface(books[i], quantities, [1, -1], [0.01, 0.02, 0.05],
+                                                 np.arange(1, 10), grid=True)
+
+
+@benchmark('fees.calculate_fees')
+def setup_fees(generator: SyntheticBookGenerator, args) -> Callable[[int], None]:
+    calculator = FeeCalculator()
+    prices = [book.mid_price for book in generator.books(args.iterations)]
+    return lambda i: calculator.calculate_fees('market', args.quantity, prices[i], i % 9 + 1)
+
+
+def run_case(step: Callable[[int], None], iterations: int, warmup: int) -> Dict[str, float]:
+    for i in range(min(warmup, iterations)):
+        step(i)
+    durations = np.empty(iterations)
+    clock = time.perf_counter_ns
+    for i in range(iterations):
+        start = clock()
+        step(i)
+        durations[i] = clock() - start
+    durations /= 1000  # ns -> us
+    return {
+        'p50_us': float(np.percentile(durations, 50)),
+        'p99_us': float(np.percentile(durations, 99)),
+        'mean_us': float(durations.mean()),
+        'msgs_per_s': float(iterations / durations.sum() * 1e6)
+    }
+
+
+def check(results: Dict[str, Dict[str, float]], baseline: dict) -> List[str]:
+    """Return one message per threshold exceeded"""
+    failures = []
+    for name, result in results.items():
+        thresholds = baseline['cases'].get(name)
+        if thresholds is None:
+            continue
+        for metric in ('p50_us', 'p99_us'):
+            limit = thresholds.get(f'max_{metric}')
+            if limit is not None and result[metric] > limit:
+                failures.append(f"{name}: {metric} {result[metric]:.1f} > threshold {limit:.1f}")
+    return failures
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Hot path benchmarks on synthetic books")
+    parser.add_argument('--iterations', type=int, default=2000, help="Timed calls per case")
+    parser.add_argument('--warmup', type=int, default=50, help="Untimed calls per case")
+    parser.add_argument('--depth', type=int, default=50, help="Levels per side")
+    parser.add_argument('--spread-bps', type=float, default=1.0, dest='spread_bps', help="Spread in basis points")
+    parser.add_argument('--skew', type=float, default=0.0, help="Volume imbalance in (-1, 1), positive favours bids")
+    parser.add_argument('--quantity', type=float, default=100.0, help="Order quantity")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--case', action='append', dest='cases', choices=sorted(BENCHMARKS),
+                        help="Run only this case, may be repeated")
+    parser.add_argument('--json', help="Write results to this file")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline file (default: benchmarks/baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true', dest='save_baseline',
+                        help="Store the results and derived thresholds as the baseline")
+    parser.add_argument('--tolerance', type=float, default=1.0,
+                        help="Allowed p50 slowdown when saving a baseline (p99 gets twice this)")
+    parser.add_argument('--min-slack-us', type=float, default=1.0, dest='min_slack_us',
+                        help="Absolute slack added to thresholds of sub-microsecond cases")
+    parser.add_argument('--check', action='store_true', help="Exit 1 if a case exceeds its baseline threshold")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.disable(logging.WARNING)
+
+    results = {}
+    print(f"{'case':34} {'p50 us':>10} {'p99 us':>10} {'msgs/s':>12}")
+    for name in args.cases or BENCHMARKS:
+        generator = SyntheticBookGenerator(depth=args.depth, spread_bps=args.spread_bps,
+                                           skew=args.skew, seed=args.seed)
+        step = BENCHMARKS[name](generator, args)
+        results[name] = result = run_case(step, args.iterations, args.warmup)
+        print(f"{name:34} {result['p50_us']:10.1f} {result['p99_us']:10.1f} {result['msgs_per_s']:12.0f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        # Cases that were not run keep their stored thresholds
+        cases = {}
+        if args.cases and os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                cases = json.load(f)['cases']
+        baseline = {
+            'machine': platform.platform(),
+            'python': platform.python_version(),
+            'settings': {k: getattr(args, k) for k in ('iterations', 'depth', 'spread_bps', 'skew', 'quantity')},
+            'cases': {
+                **cases,
+                **{name: {
+                    **result,
+                    'max_p50_us': max(result['p50_us'] * (1 + args.tolerance),
+                                      result['p50_us'] + args.min_slack_us),
+                    'max_p99_us': max(result['p99_us'] * (1 + 2 * args.tolerance),
+                                      result['p99_us'] + args.min_slack_us)
+                } for name, result in results.items()}
+            }
+        }
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.check:
+        with open(args.baseline) as f:
+            failures = check(results, json.load(f))
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
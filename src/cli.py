@@ -0,0 +1,152 @@
+import argparse
+import json
+import socket
+import sys
+import threading
+from typing import TextIO
+from config import ORDERBOOK_URL_TEMPLATE
+from engine import TradingEngine, SimulationParameters
+from websocket.connection_manager import Subscription
+from websocket.recorder import FrameRecorder
+from websocket.replay import ReplaySource
+from logger import setup_logger
+
+logger = setup_logger()
+
+
+def open_output(target: str) -> TextIO:
+    """
+    Open a result sink
+
+    Args:
+        target: '-' for stdout, 'tcp://host:port' for a socket, otherwise a file path
+
+    Returns:
+        Line-buffered text stream
+    """
+    if target == '-':
+        return sys.stdout
+    if target.startswith('tcp://'):
+        host, port = target[len('tcp://'):].rsplit(':', 1)
+        connection = socket.create_connection((host, int(port)))
+        return connection.makefile('w', buffering=1)
+    return open(target, 'a', buffering=1)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Headless trade simulator")
+    parser.add_argument('--config', help="JSON file with any of the options below")
+    parser.add_argument('--venue', help="Exchange venue (default: OKX)")
+    parser.add_argument('--url-template', dest='url_template',
+                        help="Endpoint template with {venue} and {symbol} fields")
+    parser.add_argument('--symbol', action='append', dest='symbols',
+                        help="Instrument to subscribe to, may be repeated (default: BTC-USDT-SWAP)")
+    parser.add_argument('--quantity', type=float, help="Order quantity")
+    parser.add_argument('--volatility', type=float, help="Market volatility")
+    parser.add_argument('--fee-tier', type=int, dest='fee_tier', help="Fee tier (1 up to the tier count of the venue's fee schedule)")
+    parser.add_argument('--time-horizon', type=float, dest='time_horizon', help="Impact horizon in days")
+    parser.add_argument('--max-depth', type=int, dest='max_depth', help="Levels per side to decode")
+    parser.add_argument('--sorted-levels', action='store_true', default=None, dest='sorted_levels',
+                        help="Trust the feed to send levels best-first: --max-depth keeps the leading "
+                             "levels without parsing or sorting the rest")
+    parser.add_argument('--delta-mode', action='store_true', default=None, dest='delta_mode',
+                        help="Maintain books from snapshot and delta messages")
+    parser.add_argument('--shards', type=int,
+                        help="Spread the symbols over this many connection processes (not with --record/--replay)")
+    parser.add_argument('--record', help="Append every raw frame to this log file")
+    parser.add_argument('--replay', help="Replay a recorded frame log instead of connecting")
+    parser.add_argument('--speed', type=float,
+                        help="Replay speed relative to the recording, 0 for maximum (default: 1)")
+    parser.add_argument('--no-conflate', action='store_true', default=None, dest='no_conflate',
+                        help="Process every frame instead of only the newest per symbol (implied by --replay)")
+    parser.add_argument('--output', help="'-' (stdout), a file path or tcp://host:port (default: -)")
+    parser.add_argument('--max-results', type=int, dest='max_results',
+                        help="Stop after emitting this many results")
+    args = parser.parse_args(argv)
+
+    # Command line values take precedence over the config file
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+        for key, value in config.items():
+            if getattr(args, key, None) is None:
+                setattr(args, key, value)
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        parameters = SimulationParameters.from_mapping(vars(args))
+    except (TypeError, ValueError) as e:
+        logger.error(f"Invalid parameters: {e}")
+        return 2
+
+    if args.shards is not None and (args.shards < 1 or args.record or args.replay):
+        logger.error("Invalid parameters: --shards must be positive and cannot be combined with --record or --replay")
+        return 2
+
+    venue = args.venue or "OKX"
+    subscriptions = [Subscription(venue, symbol) for symbol in (args.symbols or ["BTC-USDT-SWAP"])]
+    client_options = {
+        'url_template': args.url_template or ORDERBOOK_URL_TEMPLATE,
+        'delta_mode': bool(args.delta_mode),
+        'max_depth': args.max_depth,
+        'sorted_levels': bool(args.sorted_levels)
+    }
+    recorder = FrameRecorder(args.record) if args.record else None
+    if recorder:
+        client_options['recorder'] = recorder
+    if args.replay:
+        # The log already holds every recorded symbol, so a single source replays it
+        speed = 1.0 if args.speed is None else args.speed
+        subscriptions = subscriptions[:1]
+        client_options['client_factory'] = \
+            lambda url, callback, **options: ReplaySource(args.replay, callback, speed=speed, **options)
+    try:
+        # Explicit fee tiers are only checked against the instruments' fee schedules here
+        engine = TradingEngine(parameters, subscriptions, conflate=not (args.replay or args.no_conflate),
+                               shards=args.shards, **client_options)
+    except ValueError as e:
+        logger.error(f"Invalid parameters: {e}")
+        if recorder:
+            recorder.close()
+        return 2
+    output = open_output(args.output or '-')
+    done = threading.Event()
+    emitted = 0
+
+    def emit(data: dict):
+        nonlocal emitted
+        book = data['book']
+        result = {
+            'venue': data.get('venue', ''),
+            'symbol': book.symbol,
+            'timestamp': book.timestamp,
+            **engine.compute_metrics(book)
+        }
+        output.write(json.dumps(result) + "\n")
+        emitted += 1
+        if args.max_results and emitted >= args.max_results:
+            done.set()
+
+    engine.add_listener(emit)
+    engine.start()
+    try:
+        while not done.wait(0.5):
+            clients = engine.connection_manager.clients.values()
+            if args.replay and all(client.finished for client in clients):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.stop()
+        if recorder:
+            recorder.close()
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
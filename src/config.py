@@ -6,6 +6,7 @@ load_dotenv()
 
 # WebSocket Configuration
 WEBSOCKET_URL = "wss://ws.gomarket-cpp.goquant.io/ws/l2-orderbook/okx/BTC-USDT-SWAP"
+ORDERBOOK_URL_TEMPLATE = "wss://ws.gomarket-cpp.goquant.io/ws/l2-orderbook/{venue}/{symbol}"
 
 # UI Configuration
 UI_UPDATE_INTERVAL_MS = 100
@@ -16,13 +17,12 @@ WINDOW_HEIGHT = 800
 DEFAULT_VOLATILITY = 0.02
 DEFAULT_ETA = 0.1  # Temporary market impact parameter
 DEFAULT_GAMMA = 0.1  # Permanent market impact parameter
+# Per-symbol eta/gamma written by `python -m models.calibration`, loaded at engine startup when present
+IMPACT_CALIBRATION_FILE = os.getenv("IMPACT_CALIBRATION_FILE", "data/impact_calibration.json")
 
-# Fee Tiers
-FEE_TIERS = {
-    "Tier 1": 0.08,  # 0.08%
-    "Tier 2": 0.07,  # 0.07%
-    "Tier 3": 0.06,  # 0.06%
-}
+# Fee schedules per venue and instrument (see models.fee_calculator.load_fee_schedules)
+FEE_SCHEDULE_FILE = os.getenv("FEE_SCHEDULE_FILE",
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fee_schedules.json"))
 
 # Logging Configuration
 LOG_LEVEL = "INFO"
@@ -0,0 +1,441 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import traceback
+from dataclasses import dataclass, fields
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from config import DEFAULT_ETA, DEFAULT_GAMMA, DEFAULT_VOLATILITY, IMPACT_CALIBRATION_FILE
+from models.calibration import ImpactCalibration
+from models.cost_surface import CostSurface, CostSurfaceCalculator
+from models.execution import FillCurve, walk_book
+from models.features import FeatureCache
+from models.labeling import LiveFillLabeler
+from models.market_impact import AlmgrenChrissModel, ExecutionPlan
+from models.slippage import SlippageModel
+from models.fee_calculator import FeeCalculator
+from models.maker_taker import MakerTakerPredictor
+from models.training import TrainingScheduler
+from models.orderbook import OrderBook
+from websocket.connection_manager import ConnectionManager, ShardedConnectionManager, Subscription
+from websocket.pipeline import ComputePipeline
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SimulationParameters:
+    quantity: float = 100.0
+    volatility: float = DEFAULT_VOLATILITY
+    fee_tier: Optional[int] = 1  # None picks the tier from the account's rolling 30-day volume
+    time_horizon: float = 1.0  # days
+    account: str = "default"
+
+    def __post_init__(self):
+        if self.quantity <= 0:
+            raise ValueError("Invalid quantity: must be positive")
+        if not 0 <= self.volatility <= 1:
+            raise ValueError(f"Invalid volatility: {self.volatility}")
+        # The upper bound depends on the fee schedule; TradingEngine checks it
+        if self.fee_tier is not None and self.fee_tier < 1:
+            raise ValueError(f"Invalid fee tier: {self.fee_tier}")
+        if self.time_horizon <= 0:
+            raise ValueError("Invalid time horizon: must be positive")
+
+    @classmethod
+    def from_mapping(cls, values: dict) -> "SimulationParameters":
+        """Build parameters from a config mapping, ignoring unrelated keys"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in values.items() if k in names and v is not None})
+
+
+class TradingEngine:
+    def __init__(self,
+                 parameters: Optional[SimulationParameters] = None,
+                 subscriptions: Optional[Sequence[Subscription]] = None,
+                 conflate: bool = True,
+                 background_training: bool = True,
+                 impact_calibration: Optional[str] = IMPACT_CALIBRATION_FILE,
+                 shards: Optional[int] = None,
+                 **client_options):
+        """
+        Headless trade simulator: connections, models and metrics without a UI
+
+        Processed books are published to listeners registered with
+        add_listener; a front end (the Qt window, the CLI) decides when to
+        call compute_metrics on them.
+
+        Args:
+            parameters: Initial simulation parameters
+            subscriptions: (venue, symbol) subscriptions, defaults to OKX BTC-USDT-SWAP
+            conflate: Process on the conflating compute worker; False processes
+                every frame inline in the receive loop, which makes replays deterministic
+            background_training: Refit models in a worker process; False keeps
+                the inline behaviour (no exact slippage refits, one inline maker/taker fit)
+            impact_calibration: Calibration file with per-symbol eta/gamma; symbols and
+                time buckets it does not cover use DEFAULT_ETA/DEFAULT_GAMMA
+            shards: Spread the subscriptions over this many worker processes
+                (ShardedConnectionManager); None runs them all on one event loop.
+                Client options must then be picklable (no recorder or replay factory)
+            **client_options: Passed to every OrderbookClient (delta_mode, max_depth, sorted_levels, ...)
+        """
+        self.listeners: List[Callable[[dict], None]] = []
+        # Guards the models, caches and rolling volumes: the ingest thread trains them while
+        # the UI's metrics worker or a CLI listener prices with them
+        self.model_lock = threading.RLock()
+        self.subscriptions = subscriptions if subscriptions is not None else [Subscription("OKX", "BTC-USDT-SWAP")]
+        # Explicit fee tiers are checked against the fee schedules
+        self.fee_calculator = FeeCalculator()
+        self.set_parameters(parameters or SimulationParameters())
+
+        # Initialize models; features are computed once per snapshot and shared between them
+        self.feature_cache = FeatureCache()
+        self.training = TrainingScheduler() if background_training else None
+        self.impact_calibration = self._load_calibration(impact_calibration)
+        self.market_impact_model = AlmgrenChrissModel(volatility=self.parameters.volatility,
+                                                      eta=DEFAULT_ETA, gamma=DEFAULT_GAMMA)
+        self.slippage_model = SlippageModel(feature_cache=self.feature_cache, scheduler=self.training)
+        self.maker_taker_predictor = MakerTakerPredictor(feature_cache=self.feature_cache,
+                                                         scheduler=self.training)
+        # Maker/taker labels come from hypothetical orders resolved against later snapshots
+        self.fill_labels = LiveFillLabeler(self.maker_taker_predictor)
+        self.cost_surface = CostSurfaceCalculator(self.slippage_model, self.fee_calculator,
+                                                  self.market_impact_model)
+        # symbol -> metric -> (inputs, value) of the last computed snapshot; see compute_metrics
+        self._last_metrics: Dict[str, Dict[str, tuple]] = {}
+
+        self.latency_measurements = []
+        self.performance_metrics = {
+            'total_messages': 0,
+            'processed_messages': 0,
+            'errors': 0,
+            'start_time': time.time()
+        }
+
+        # Model computation runs on the pipeline's worker, not in the receive loop
+        self.pipeline = ComputePipeline(self.process_orderbook_data)
+
+        callback = self.pipeline.submit if conflate else self.process_orderbook_data
+        if shards:
+            # One event loop per worker process once a single loop is saturated
+            self.connection_manager = ShardedConnectionManager(callback, self.subscriptions, shards=shards,
+                                                               **client_options)
+        else:
+            # All subscriptions share one event loop on a separate thread
+            self.connection_manager = ConnectionManager(callback, self.subscriptions, **client_options)
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _load_calibration(path: Optional[str]) -> ImpactCalibration:
+        if not path or not os.path.exists(path):
+            return ImpactCalibration()
+        try:
+            calibration = ImpactCalibration.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring impact calibration {path}: {e}")
+            return ImpactCalibration()
+        logger.info(f"Loaded impact calibration for {len(calibration)} symbols from {path}")
+        return calibration
+
+    def add_listener(self, listener: Callable[[dict], None]):
+        """Register a callback for every processed message (called on the compute worker)"""
+        self.listeners.append(listener)
+
+    def set_parameters(self, parameters: SimulationParameters):
+        """
+        Swap in a new parameter set, after checking an explicit fee tier
+        against the schedule of every subscribed instrument
+
+        SimulationParameters is immutable and replaced with one attribute
+        store, so the ingest and compute threads read it without locking; each
+        computation reads self.parameters once and uses that snapshot.
+        """
+        if parameters.fee_tier is not None:
+            for symbol in {subscription.symbol for subscription in self.subscriptions} or {""}:
+                tiers = len(self.fee_calculator.schedule(symbol))
+                if parameters.fee_tier > tiers:
+                    raise ValueError(f"Invalid fee tier: {parameters.fee_tier} (the {symbol or 'default'} "
+                                     f"schedule has {tiers} tiers)")
+        self.parameters = parameters
+
+    def record_fill(self, quantity: float, price: float, timestamp: Optional[float] = None,
+                    account: Optional[str] = None):
+        """Add a simulated fill to the account's rolling volume, which sets the tier when fee_tier is None"""
+        with self.model_lock:
+            self.fee_calculator.record_trade(account or self.parameters.account, quantity, price, timestamp)
+
+    def fee_tier(self, book: OrderBook, parameters: Optional[SimulationParameters] = None) -> int:
+        """Explicit fee tier of the parameters, or the one the account's rolling volume earns for the book's instrument"""
+        parameters = parameters or self.parameters
+        if parameters.fee_tier is not None:
+            return parameters.fee_tier
+        return self.fee_calculator.account_tier(parameters.account, book.symbol)
+
+    def start(self, on_error: Optional[Callable[[Exception], None]] = None):
+        """Start the compute worker and the connection event loop in the background"""
+        self.pipeline.start()
+        if isinstance(self.connection_manager, ShardedConnectionManager):
+            self.connection_manager.start()
+            return
+
+        def run_websocket():
+            try:
+                asyncio.run(self.connection_manager.run())
+            except Exception as e:
+                logger.error(f"WebSocket thread error: {e}")
+                traceback.print_exc()
+                if on_error:
+                    on_error(e)
+
+        self._thread = threading.Thread(target=run_websocket, name="engine-connections", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Close every connection, stop the compute worker and log a performance summary"""
+        logger.info("Cleaning up resources...")
+        self.connection_manager.stop()
+        if self._thread is not None:
+            self._thread.join(5.0)
+        self.pipeline.stop()
+        if self.training is not None:
+            self.training.shutdown()
+        self.log_summary()
+
+    def log_summary(self):
+        """Log final performance metrics"""
+        runtime = time.time() - self.performance_metrics['start_time']
+        total = self.performance_metrics['total_messages']
+        logger.info(f"Performance Summary:")
+        logger.info(f"Runtime: {runtime:.2f} seconds")
+        logger.info(f"Total Messages: {total}")
+        logger.info(f"Processed Messages: {self.performance_metrics['processed_messages']}")
+        if total:
+            logger.info(f"Error Rate: {(self.performance_metrics['errors'] / total * 100):.2f}%")
+        logger.info(f"Average Latency: {self.calculate_latency():.2f}ms")
+        stats = self.pipeline.stats
+        logger.info(f"Conflated Frames: {stats['conflated']}, Dropped Frames: {stats['dropped']}, "
+                    f"Max Staleness: {stats['max_staleness_ms']:.2f}ms")
+        for key, stats in self.connection_manager.stats().items():
+            logger.info(f"{key}: {stats['messages']} messages, Average Decode Time: {stats['decode_ms']:.3f}ms")
+        logger.info(f"Maker/Taker Labels: {self.fill_labels.labeled}")
+        if self.training is not None:
+            for name, stats in self.training.stats().items():
+                age = f"{stats['age']:.1f}s" if stats['age'] is not None else "n/a"
+                logger.info(f"Model {name}: version {stats['version']}, last fit {stats['fit_duration'] * 1000:.1f}ms, "
+                            f"data age {age}, {stats['failures']} failed fits")
+
+    def process_orderbook_data(self, data: dict):
+        start_time = time.time()
+        self.performance_metrics['total_messages'] += 1
+
+        try:
+            # In delta mode the client attaches its persistent book, which is sorted and
+            # sequence/checksum verified but, unlike from_raw, keeps every level: the gap
+            # and outlier filter is not applied to levels the exchange state vouches for
+            book = data.get('book')
+            if book is None:
+                # Validate orderbook data
+                if not data.get('asks') or not data.get('bids'):
+                    logger.warning("Received empty orderbook data")
+                    return
+
+                # Convert, filter, sort and de-outlier both sides in bulk
+                book = OrderBook.from_raw(data['asks'], data['bids'],
+                                          timestamp=data.get('timestamp', ''),
+                                          symbol=data.get('symbol', ''))
+
+            # Validate orderbook structure
+            if not book:
+                logger.warning("No valid orderbook levels after processing")
+                return
+
+            # Check for reasonable price spread
+            spread = book.spread / book.best_bid
+            if spread > 0.01:  # More than 1% spread
+                logger.warning(f"Unusually large spread detected: {spread:.2%}")
+
+            # Update models; metrics computed on other threads take the same lock
+            with self.model_lock:
+                self.slippage_model.update_book(book, self.parameters.quantity)
+                self.fill_labels.observe(book, start_time)
+
+            # Calculate latency
+            latency = (time.time() - start_time) * 1000  # Convert to milliseconds
+            self.latency_measurements.append(latency)
+            if len(self.latency_measurements) > 100:
+                self.latency_measurements.pop(0)
+
+            # Add latency to data
+            data['processing_latency'] = latency
+            data['book'] = book
+
+            self.performance_metrics['processed_messages'] += 1
+            for listener in self.listeners:
+                listener(data)
+
+        except Exception as e:
+            logger.error(f"Unexpected error in process_orderbook_data: {e}")
+            traceback.print_exc()
+            self.performance_metrics['errors'] += 1
+
+    def compute_metrics(self, book: OrderBook, parameters: Optional[SimulationParameters] = None) -> Dict[str, float]:
+        """
+        Calculate every output metric for a processed book
+
+        Args:
+            book: Processed orderbook snapshot
+            parameters: Parameters to price with, defaults to the engine's current set
+
+        Returns:
+            Dict with slippage, fees, impact, net_cost, maker_taker and latency
+        """
+        parameters = parameters or self.parameters
+
+        # Models are trained on the ingest thread while metrics are computed on others
+        with self.model_lock:
+            if not book:
+                slippage = self.calculate_slippage(book, parameters.quantity)
+                return {'slippage': slippage, 'fees': 0.0, 'impact': 0.0, 'net_cost': slippage,
+                        'maker_taker': self.calculate_maker_taker(book), 'latency': self.calculate_latency()}
+
+            # Each metric is reused from the symbol's last priced snapshot when its own inputs are
+            # unchanged: fees, impact and maker/taker only read the top levels (top_basis), and the
+            # slippage model, retrained on every snapshot, is usually the only term to recompute
+            features = self.feature_cache.get(book)
+            fee_tier = self.fee_tier(book, parameters)
+            last = self._last_metrics.setdefault(book.symbol, {})
+
+            def reuse(name: str, inputs: tuple, compute: Callable[[], float]) -> float:
+                cached = last.get(name)
+                if cached is None or cached[0] != inputs:
+                    cached = last[name] = (inputs, compute())
+                return cached[1]
+
+            slippage = reuse('slippage', (features.basis, parameters.quantity, self.slippage_model.model.version),
+                             lambda: self.calculate_slippage(book, parameters.quantity))
+            fees = reuse('fees', (features.top_basis, parameters.quantity, fee_tier),
+                         lambda: self.calculate_fees(book, parameters.quantity, fee_tier))
+            impact = reuse('impact', (features.top_basis, parameters.quantity, parameters.volatility,
+                                      parameters.time_horizon, self._impact_coefficients(book)),
+                           lambda: self.calculate_market_impact(book, parameters.quantity, parameters.volatility,
+                                                                parameters.time_horizon))
+            maker_taker = reuse('maker_taker', (features.top_basis, self.maker_taker_predictor.model.version),
+                                lambda: self.calculate_maker_taker(book))
+            return {
+                'slippage': slippage,
+                'fees': fees,
+                'impact': impact,
+                'net_cost': slippage + fees + impact,
+                'maker_taker': maker_taker,
+                'latency': self.calculate_latency()
+            }
+
+    def compute_cost_surface(self,
+                             book: OrderBook,
+                             quantities,
+                             sides=1.0,
+                             volatilities=None,
+                             fee_tiers=None,
+                             grid: bool = False) -> CostSurface:
+        """
+        Slippage, fees, impact and net cost for a batch of hypothetical orders
+
+        Volatility, fee tier (see fee_tier) and time horizon default to the current parameters;
+        see CostSurfaceCalculator.evaluate for the broadcasting rules.
+        """
+        parameters = self.parameters
+        eta, gamma = self._impact_coefficients(book) if book else (None, None)
+        with self.model_lock:
+            return self.cost_surface.evaluate(
+                book, quantities, sides,
+                volatilities=parameters.volatility if volatilities is None else volatilities,
+                fee_tiers=self.fee_tier(book, parameters) if fee_tiers is None else fee_tiers,
+                time_horizon=parameters.time_horizon,
+                grid=grid,
+                eta=eta,
+                gamma=gamma
+            )
+
+    def calculate_slippage(self, book: OrderBook, quantity):
+        """Calculate expected slippage based on orderbook data"""
+        with self.model_lock:
+            return self.slippage_model.predict_book(book, quantity)
+
+    def calculate_fees(self, book: OrderBook, quantity, fee_tier):
+        """Calculate expected fees based on fee tier"""
+        if not book:
+            return 0.0
+
+        # Check for reasonable price spread
+        spread = book.spread / book.best_bid
+        if spread > 0.01:  # More than 1% spread
+            logger.warning(f"Large spread detected: {spread:.2%}, using best bid price for fee calculation")
+
+        # Calculate fees
+        fee_amount, _ = self.fee_calculator.calculate_book_fees(
+            book,
+            quantity=quantity,
+            fee_tier=fee_tier,
+            order_type='market'
+        )
+        return fee_amount
+
+    def calculate_market_impact(self, book: OrderBook, quantity, volatility, time_horizon=1.0):
+        """Calculate market impact using Almgren-Chriss model"""
+        if not book:
+            return 0.0
+
+        # The model is shared between threads, so per-book coefficients are passed, never stored on it
+        eta, gamma = self._impact_coefficients(book)
+        temp_impact, perm_impact = self.market_impact_model.calculate_book_impact(
+            book,
+            quantity=quantity,
+            time_horizon=time_horizon,
+            eta=eta,
+            gamma=gamma
+        )
+        return (temp_impact + perm_impact) * book.mid_price
+
+    def _impact_coefficients(self, book: OrderBook) -> Tuple[float, float]:
+        """eta/gamma for the book's symbol and the time bucket of its exchange timestamp"""
+        # Replays and backtests price in the recorded time; only books without one use the clock
+        timestamp = book.epoch_time
+        calibrated = self.impact_calibration.parameters(book.symbol,
+                                                        timestamp if timestamp is not None else time.time())
+        return calibrated if calibrated is not None else (DEFAULT_ETA, DEFAULT_GAMMA)
+
+    def plan_execution(self, book: OrderBook, quantities=None, risk_aversion=None, **options) -> ExecutionPlan:
+        """
+        Optimal execution schedules at the book's mid price with its calibrated eta/gamma
+
+        Quantity, volatility and time horizon default to the current parameters;
+        other options are passed to AlmgrenChrissModel.plan_execution.
+        """
+        parameters = self.parameters
+        eta, gamma = self._impact_coefficients(book)
+        return self.market_impact_model.plan_execution(
+            parameters.quantity if quantities is None else quantities,
+            book.mid_price,
+            options.pop('time_horizon', parameters.time_horizon),
+            volatility=options.pop('volatility', parameters.volatility),
+            risk_aversion=risk_aversion,
+            eta=eta,
+            gamma=gamma,
+            **options
+        )
+
+    def calculate_cost_curve(self, book: OrderBook, sizes) -> FillCurve:
+        """Exact fill VWAP, levels consumed and leftover for every order size on both sides"""
+        return walk_book(book, sizes)
+
+    def calculate_maker_taker(self, book: OrderBook):
+        """Calculate maker/taker proportion"""
+        with self.model_lock:
+            return self.maker_taker_predictor.predict_book(book)
+
+    def calculate_latency(self):
+        """Calculate average processing latency"""
+        if not self.latency_measurements:
+            return 0.0
+        return sum(self.latency_measurements) / len(self.latency_measurements)
@@ -0,0 +1,282 @@
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+from utils.tick_store import META_FILE, TickBatch, TickStore
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400.0
+
+# Order sizes whose walk-the-book cost calibrates eta, as fractions of the thinner side's visible depth
+DEFAULT_FRACTIONS = (0.05, 0.1, 0.2, 0.4)
+
+
+@dataclass(frozen=True)
+class ImpactParameters:
+    """Calibrated eta and gamma of one symbol per time-of-day bucket (NaN where there was no data)"""
+    symbol: str
+    bucket_seconds: float
+    eta: np.ndarray
+    gamma: np.ndarray
+    samples: np.ndarray    # Snapshots used per bucket
+    fitted_at: float
+
+    def bucket(self, timestamp: float) -> int:
+        return int((timestamp % SECONDS_PER_DAY) // self.bucket_seconds)
+
+    def at(self, timestamp: float) -> Tuple[float, float]:
+        """(eta, gamma) for the bucket containing `timestamp` (epoch seconds), NaN if uncalibrated"""
+        bucket = self.bucket(timestamp)
+        return float(self.eta[bucket]), float(self.gamma[bucket])
+
+    def to_dict(self) -> dict:
+        return {
+            'bucket_seconds': self.bucket_seconds,
+            # JSON has no NaN, uncalibrated buckets are null
+            'eta': [None if math.isnan(v) else v for v in self.eta.tolist()],
+            'gamma': [None if math.isnan(v) else v for v in self.gamma.tolist()],
+            'samples': self.samples.tolist(),
+            'fitted_at': self.fitted_at
+        }
+
+    @classmethod
+    def from_dict(cls, symbol: str, values: dict) -> "ImpactParameters":
+        return cls(symbol=symbol,
+                   bucket_seconds=float(values['bucket_seconds']),
+                   eta=np.array(values['eta'], dtype=np.float64),
+                   gamma=np.array(values['gamma'], dtype=np.float64),
+                   samples=np.array(values['samples'], dtype=np.int64),
+                   fitted_at=float(values['fitted_at']))
+
+
+class ImpactCalibration:
+    def __init__(self, parameters: Optional[Dict[str, ImpactParameters]] = None):
+        """
+        Calibrated Almgren-Chriss impact parameters of every symbol
+
+        Args:
+            parameters: ImpactParameters keyed by symbol
+        """
+        self.symbols: Dict[str, ImpactParameters] = dict(parameters or {})
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def parameters(self, symbol: str, timestamp: float) -> Optional[Tuple[float, float]]:
+        """(eta, gamma) of a symbol at `timestamp`, None when the bucket was not calibrated"""
+        calibrated = self.symbols.get(symbol)
+        if calibrated is None:
+            return None
+        eta, gamma = calibrated.at(timestamp)
+        if math.isnan(eta) or math.isnan(gamma):
+            return None
+        return eta, gamma
+
+    def save(self, path: str):
+        """Write the calibration to a JSON file, atomically replacing any previous one"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({symbol: values.to_dict() for symbol, values in self.symbols.items()}, f)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path: str) -> "ImpactCalibration":
+        with open(path) as f:
+            values = json.load(f)
+        # json loads null as None, which becomes NaN in a float array
+        return cls({symbol: ImpactParameters.from_dict(symbol, entry) for symbol, entry in values.items()})
+
+
+class _Accumulator:
+    def __init__(self, n_buckets: int):
+        """Per-bucket sums of the two through-origin regressions"""
+        self.temporary_xy = np.zeros(n_buckets)
+        self.temporary_xx = np.zeros(n_buckets)
+        self.permanent_xy = np.zeros(n_buckets)
+        self.permanent_xx = np.zeros(n_buckets)
+        self.samples = np.zeros(n_buckets, dtype=np.int64)
+
+    def add(self, name: str, buckets: np.ndarray, x: np.ndarray, y: np.ndarray):
+        n_buckets = len(self.samples)
+        getattr(self, f'{name}_xy')[:] += np.bincount(buckets, weights=x * y, minlength=n_buckets)
+        getattr(self, f'{name}_xx')[:] += np.bincount(buckets, weights=x * x, minlength=n_buckets)
+
+    def slopes(self, name: str) -> np.ndarray:
+        xy = getattr(self, f'{name}_xy')
+        xx = getattr(self, f'{name}_xx')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slope = xy / xx
+        # A non-positive impact coefficient means the bucket has no usable signal
+        return np.where(slope > 0, slope, np.nan)
+
+
+def _walk_cost(prices: np.ndarray, sizes: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+    """VWAP of filling each quantity in row i of `quantities` against row i of a (snapshots, levels) side"""
+    depth = np.cumsum(sizes, axis=1)
+    notional = np.cumsum(np.nan_to_num(prices) * sizes, axis=1)
+    # Level completing each fill, found by one binary search over all rows: shifting row i by
+    # i * span keeps the flattened cumulative depths sorted, as each row's lie within [0, span)
+    n_levels = sizes.shape[1]
+    span = depth[:, -1].max(initial=0.0) + 1.0
+    rows = np.arange(len(quantities))[:, np.newaxis]
+    shifted = (depth + rows * span).ravel()
+    found = np.searchsorted(shifted, (quantities + rows * span).ravel()).reshape(quantities.shape)
+    last = np.minimum(found - rows * n_levels, n_levels - 1)
+    depth_before = np.where(last > 0, depth[rows, last - 1], 0.0)
+    notional_before = np.where(last > 0, notional[rows, last - 1], 0.0)
+    return (notional_before + (quantities - depth_before) * prices[rows, last]) / quantities
+
+
+def _accumulate(batch: TickBatch,
+                previous: Optional[Tuple[float, float, float, float]],
+                sums: _Accumulator,
+                bucket_seconds: float,
+                time_horizon: float,
+                fractions: Iterable[float]) -> Optional[Tuple[float, float, float, float]]:
+    """Add a batch to the regression sums; returns its last top of book to continue the next batch from"""
+    best_ask = batch.ask_prices[:, 0]
+    best_bid = batch.bid_prices[:, 0]
+    ask_size = batch.ask_sizes[:, 0]
+    bid_size = batch.bid_sizes[:, 0]
+    valid = (ask_size > 0) & (bid_size > 0)
+    mid = (best_ask + best_bid) / 2
+    buckets = ((batch.timestamps % SECONDS_PER_DAY) // bucket_seconds).astype(np.intp)
+    sums.samples += np.bincount(buckets[valid], minlength=len(sums.samples))
+
+    # Temporary impact: the cost of walking the book beyond the best quote, against the
+    # model's eta * (q / price) * sqrt(q / T) for several sizes per snapshot
+    rows = np.flatnonzero(valid)
+    ask_sizes = batch.ask_sizes[rows]
+    bid_sizes = batch.bid_sizes[rows]
+    visible = np.minimum(ask_sizes.sum(axis=1), bid_sizes.sum(axis=1))
+    quantities = visible[:, np.newaxis] * np.asarray(fractions)
+    mid_rows = mid[rows, np.newaxis]
+    ask_cost = (_walk_cost(batch.ask_prices[rows], ask_sizes, quantities) - best_ask[rows, np.newaxis]) / mid_rows
+    bid_cost = (best_bid[rows, np.newaxis] - _walk_cost(batch.bid_prices[rows], bid_sizes, quantities)) / mid_rows
+    x = quantities / mid_rows * np.sqrt(quantities / time_horizon)
+    sums.add('temporary', np.repeat(buckets[rows], quantities.shape[1]), x.ravel(), ((ask_cost + bid_cost) / 2).ravel())
+
+    # Permanent impact: mid-price changes against the order flow imbalance at the best
+    # quotes (Cont, Kukanov & Stoikov), whose slope is the price move per unit traded
+    last = rows[-1] if rows.size else None
+    top = np.column_stack((best_bid, bid_size, best_ask, ask_size))
+    if previous is not None:
+        # Continue from the previous batch's last valid snapshot
+        top = np.vstack((previous, top))
+        valid = np.concatenate(([True], valid))
+        buckets = np.concatenate(([0], buckets))
+    bid, bid_qty, ask, ask_qty = top.T
+    imbalance = (np.where(bid[1:] >= bid[:-1], bid_qty[1:], 0.0)
+                 - np.where(bid[1:] <= bid[:-1], bid_qty[:-1], 0.0)
+                 - np.where(ask[1:] <= ask[:-1], ask_qty[1:], 0.0)
+                 + np.where(ask[1:] >= ask[:-1], ask_qty[:-1], 0.0))
+    mid_change = np.diff((bid + ask) / 2)
+    both = valid[1:] & valid[:-1]
+    sums.add('permanent', buckets[1:][both], imbalance[both], mid_change[both])
+
+    if last is None:
+        return previous
+    return float(best_bid[last]), float(bid_size[last]), float(best_ask[last]), float(ask_size[last])
+
+
+def calibrate_store(path: str,
+                    bucket_seconds: float = 3600.0,
+                    time_horizon: float = 1.0,
+                    fractions: Iterable[float] = DEFAULT_FRACTIONS,
+                    start: Optional[float] = None,
+                    end: Optional[float] = None,
+                    batch_size: int = 100000) -> ImpactParameters:
+    """
+    Fit eta and gamma of one tick store per time-of-day bucket
+
+    Both coefficients are through-origin least squares slopes whose sums are
+    accumulated per bucket with np.bincount, batch by batch, so the whole
+    history is covered in a few array passes per batch and bounded memory.
+
+    Args:
+        path: TickStore directory
+        bucket_seconds: Width of the time-of-day buckets
+        time_horizon: Horizon in days the instantaneous book-walking cost is matched to
+        fractions: Order sizes for eta, as fractions of the visible depth
+        start: First timestamp to use
+        end: Timestamp to stop at
+        batch_size: Snapshots per batch
+
+    Returns:
+        ImpactParameters of the store's symbol
+    """
+    store = TickStore(path)
+    sums = _Accumulator(int(math.ceil(SECONDS_PER_DAY / bucket_seconds)))
+    previous = None
+    for batch in store.iter_batches(batch_size, start, end):
+        previous = _accumulate(batch, previous, sums, bucket_seconds, time_horizon, tuple(fractions))
+    return ImpactParameters(symbol=store.symbol,
+                            bucket_seconds=bucket_seconds,
+                            eta=sums.slopes('temporary'),
+                            gamma=sums.slopes('permanent'),
+                            samples=sums.samples,
+                            fitted_at=time.time())
+
+
+def find_stores(root: str) -> Dict[str, str]:
+    """Tick store directories directly under `root`, keyed by directory name"""
+    return {name: os.path.join(root, name) for name in sorted(os.listdir(root))
+            if os.path.exists(os.path.join(root, name, META_FILE))}
+
+
+def calibrate(paths: Iterable[str], max_workers: Optional[int] = None, **options) -> ImpactCalibration:
+    """
+    Calibrate many tick stores, one symbol per worker process
+
+    Args:
+        paths: TickStore directories
+        max_workers: Worker processes (defaults to the CPU count); 1 runs inline
+        **options: Passed to calibrate_store
+
+    Returns:
+        ImpactCalibration with every store's symbol
+    """
+    paths = list(paths)
+    if max_workers == 1 or len(paths) <= 1:
+        results = [calibrate_store(path, **options) for path in paths]
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers, mp_context=context) as executor:
+            futures = [executor.submit(calibrate_store, path, **options) for path in paths]
+            results = [future.result() for future in futures]
+    return ImpactCalibration({result.symbol: result for result in results})
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Calibrate Almgren-Chriss impact parameters from tick stores")
+    parser.add_argument('root', help="Directory of per-symbol tick stores (see ingest_frame_log)")
+    parser.add_argument('--output', required=True, help="Calibration JSON file to write")
+    parser.add_argument('--bucket-minutes', type=float, default=60.0, dest='bucket_minutes',
+                        help="Width of the time-of-day buckets (default: 60)")
+    parser.add_argument('--time-horizon', type=float, default=1.0, dest='time_horizon',
+                        help="Impact horizon in days (default: 1)")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    calibration = calibrate(find_stores(args.root).values(), max_workers=args.workers,
+                            bucket_seconds=args.bucket_minutes * 60, time_horizon=args.time_horizon)
+    calibration.save(args.output)
+    logger.info(f"Calibrated {len(calibration)} symbols in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Optional
+from models.fee_calculator import FeeCalculator, as_tiers
+from models.market_impact import AlmgrenChrissModel
+from models.orderbook import OrderBook
+from models.slippage import SlippageModel
+
+SIDES = {'buy': 1.0, 'sell': -1.0}
+
+
+@dataclass(frozen=True)
+class CostSurface:
+    """Cost components of a batch of hypothetical orders, all in the same broadcast shape"""
+    quantities: np.ndarray
+    sides: np.ndarray
+    volatilities: np.ndarray
+    fee_tiers: np.ndarray
+    slippage: np.ndarray
+    fees: np.ndarray
+    impact: np.ndarray
+
+    @property
+    def net_cost(self) -> np.ndarray:
+        return self.slippage + self.fees + self.impact
+
+    @property
+    def shape(self) -> tuple:
+        return self.net_cost.shape
+
+
+class CostSurfaceCalculator:
+    def __init__(self,
+                 slippage_model: SlippageModel,
+                 fee_calculator: FeeCalculator,
+                 market_impact_model: AlmgrenChrissModel):
+        """
+        Price many hypothetical orders against one snapshot with array operations
+
+        Each component is evaluated only over the axes it depends on (slippage
+        over quantity and side, fees over quantity and tier, impact over
+        quantity and volatility) and broadcast to the full shape, so the
+        result equals TradingEngine.compute_metrics for every element.
+        """
+        self.slippage_model = slippage_model
+        self.fee_calculator = fee_calculator
+        self.market_impact_model = market_impact_model
+
+    def evaluate(self,
+                 book: OrderBook,
+                 quantities,
+                 sides=1.0,
+                 volatilities=None,
+                 fee_tiers=1,
+                 time_horizon: float = 1.0,
+                 grid: bool = False,
+                 eta: Optional[float] = None,
+                 gamma: Optional[float] = None) -> CostSurface:
+        """
+        Compute slippage, fees, market impact and net cost for a batch of orders
+
+        Args:
+            book: Orderbook snapshot
+            quantities: Order quantities
+            sides: +1/-1 or 'buy'/'sell' per order
+            volatilities: Volatility per order (defaults to the impact model's)
+            fee_tiers: Fee tier per order, within the schedule of the book's instrument
+            time_horizon: Impact horizon in days
+            grid: Treat each argument as one axis and price the full outer
+                product (shape: quantities x sides x volatilities x tiers);
+                otherwise the arguments are broadcast against each other,
+                e.g. equal-length vectors describing individual orders
+            eta: Temporary impact parameter, defaults to the impact model's
+            gamma: Permanent impact parameter, defaults to the impact model's
+
+        Returns:
+            CostSurface of the broadcast shape
+        """
+        if volatilities is None:
+            volatilities = self.market_impact_model.volatility
+        axes = [np.atleast_1d(np.asarray(quantities, dtype=np.float64)),
+                np.atleast_1d(self._side_signs(sides)),
+                np.atleast_1d(np.asarray(volatilities, dtype=np.float64)),
+                np.atleast_1d(as_tiers(fee_tiers))]
+        if grid:
+            axes = list(np.ix_(*axes))
+        q, side, volatility, tier = axes
+        shape = np.broadcast_shapes(q.shape, side.shape, volatility.shape, tier.shape)
+
+        if not book:
+            zeros = np.zeros(shape)
+            return CostSurface(q, side, volatility, tier, zeros, zeros, zeros)
+
+        slippage = self.slippage_model.predict_book_batch(book, q, side)
+        fees = self.fee_calculator.calculate_fees_batch('market', q, self.fee_calculator.book_price(book), tier,
+                                                        symbol=book.symbol)
+        mid_price = book.mid_price
+        temp_impact, perm_impact = self.market_impact_model.calculate_market_impact(q, mid_price, time_horizon,
+                                                                                   eta=eta, gamma=gamma)
+        impact = (temp_impact + perm_impact) * mid_price
+
+        return CostSurface(
+            q, side, volatility, tier,
+            slippage=np.broadcast_to(slippage, shape),
+            fees=np.broadcast_to(fees, shape),
+            # The impact model's cost does not depend on volatility; it is broadcast over that axis
+            impact=np.broadcast_to(impact, shape)
+        )
+
+    @staticmethod
+    def _side_signs(sides) -> np.ndarray:
+        sides = np.asarray(sides)
+        if sides.dtype.kind in 'US':
+            try:
+                return np.vectorize(SIDES.__getitem__, otypes=[np.float64])(np.char.lower(sides))
+            except KeyError as e:
+                raise ValueError(f"Unknown side: {e}")
+        return np.where(sides.astype(np.float64) >= 0, 1.0, -1.0)
@@ -0,0 +1,76 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Sequence, Union
+from models.orderbook import OrderBook
+
+
+@dataclass(frozen=True)
+class FillResult:
+    """Outcome of market orders of several sizes against one side of a book"""
+    sizes: np.ndarray      # Requested quantities
+    filled: np.ndarray     # Quantity the visible book could fill
+    vwap: np.ndarray       # Average fill price (NaN when nothing filled)
+    levels: np.ndarray     # Number of levels consumed, including a partially filled last level
+    leftover: np.ndarray   # Quantity left unfilled
+    slippage: np.ndarray   # Relative distance of the fill VWAP from the mid, positive is worse
+
+    @property
+    def cost(self) -> np.ndarray:
+        """Total notional of the filled quantity"""
+        return np.nan_to_num(self.vwap * self.filled)
+
+
+@dataclass(frozen=True)
+class FillCurve:
+    buy: FillResult   # Walks the asks
+    sell: FillResult  # Walks the bids
+
+
+def _walk_side(prices: np.ndarray,
+               depth: np.ndarray,
+               notional: np.ndarray,
+               sizes: np.ndarray,
+               mid_price: float,
+               sign: float) -> FillResult:
+    total = float(depth[-1]) if depth.size else 0.0
+    filled = np.minimum(sizes, total)
+    if not depth.size:
+        nan = np.full(sizes.shape, np.nan)
+        return FillResult(sizes, filled, nan, np.zeros(sizes.shape, dtype=np.intp), sizes - filled, nan)
+
+    # Level that completes each fill, then the full levels before it plus a partial fill of it
+    last = np.minimum(np.searchsorted(depth, filled, side='left'), depth.size - 1)
+    depth_before = np.where(last > 0, depth[last - 1], 0.0)
+    notional_before = np.where(last > 0, notional[last - 1], 0.0)
+    cost = notional_before + (filled - depth_before) * prices[last]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vwap = np.where(filled > 0, cost / filled, np.nan)
+    levels = np.where(filled > 0, last + 1, 0)
+    slippage = sign * (vwap - mid_price) / mid_price if mid_price else np.full(sizes.shape, np.nan)
+    return FillResult(sizes, filled, vwap, levels, sizes - filled, slippage)
+
+
+def walk_book(book: OrderBook, sizes: Union[float, Sequence[float], np.ndarray]) -> FillCurve:
+    """
+    Fill market orders of every size in `sizes` against both sides of a snapshot
+
+    Cumulative depth and notional are computed once per book (and cached on
+    it); each size is then located with a binary search, so a whole
+    cost-versus-size curve costs O((levels + sizes) log levels).
+
+    Args:
+        book: Orderbook snapshot
+        sizes: Order quantities in base currency
+
+    Returns:
+        FillCurve with the buy (ask side) and sell (bid side) results
+    """
+    sizes = np.atleast_1d(np.asarray(sizes, dtype=np.float64))
+    if np.any(sizes < 0):
+        raise ValueError("Order sizes must be non-negative")
+    mid_price = book.mid_price if book else 0.0
+    return FillCurve(
+        buy=_walk_side(book.ask_prices, book.ask_depth, book.ask_notional, sizes, mid_price, 1.0),
+        sell=_walk_side(book.bid_prices, book.bid_depth, book.bid_notional, sizes, mid_price, -1.0)
+    )
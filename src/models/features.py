@@ -0,0 +1,164 @@
+import threading
+import numpy as np
+from collections import OrderedDict
+from functools import cached_property
+from typing import Dict, Optional
+from models.orderbook import OrderBook
+
+# Levels the maker/taker features look at
+TOP_LEVELS = 10
+
+# Columns of a maker/taker feature row
+MAKER_TAKER_FEATURES = ('spread', 'depth', 'imbalance', 'volatility', 'volume')
+
+
+def same_levels(book: OrderBook, other: OrderBook, levels: Optional[int] = None) -> bool:
+    """Whether two books have identical prices and sizes in their top `levels` (all by default)"""
+    for side in ('ask_prices', 'ask_sizes', 'bid_prices', 'bid_sizes'):
+        if not np.array_equal(getattr(book, side)[:levels], getattr(other, side)[:levels]):
+            return False
+    return True
+
+
+class BookFeatures:
+    # Values that depend only on the top TOP_LEVELS levels
+    TOP_FIELDS = ('maker_taker',)
+
+    def __init__(self, book: OrderBook, previous: Optional["BookFeatures"] = None):
+        """
+        Model features of one snapshot, each computed at most once
+
+        When the previous snapshot of the same symbol has identical levels,
+        its computed values are reused and `unchanged` is set; when only the
+        top TOP_LEVELS levels match, the top-of-book values are reused and
+        `top_unchanged` is set. `basis` and `top_basis` identify the run of
+        snapshots sharing all levels and the top levels respectively, so
+        callers can key their own caches on them.
+
+        Args:
+            book: Orderbook snapshot
+            previous: Features of the symbol's previous snapshot
+        """
+        self.book = book
+        self.unchanged = previous is not None and same_levels(book, previous.book)
+        self.top_unchanged = self.unchanged or (
+            previous is not None and same_levels(book, previous.book, TOP_LEVELS))
+        # Version of the first snapshot in the current run of identical books
+        self.basis = previous.basis if self.unchanged else book.version
+        self.top_basis = previous.top_basis if self.top_unchanged else book.version
+        self._slippage_rows: Dict[float, np.ndarray] = previous._slippage_rows if self.unchanged else {}
+
+        # Copy the previous snapshot's computed cached_property values
+        if self.top_unchanged:
+            for name, value in previous.__dict__.items():
+                if name not in self.__dict__ and (self.unchanged or name in self.TOP_FIELDS):
+                    self.__dict__[name] = value
+
+    @cached_property
+    def normalized_spread(self) -> float:
+        return self.book.spread / self.book.mid_price
+
+    @cached_property
+    def imbalance(self) -> float:
+        """Bid/ask volume imbalance over the whole book"""
+        total_bid_volume = self.book.total_bid_volume
+        total_ask_volume = self.book.total_ask_volume
+        return (total_bid_volume - total_ask_volume) / (total_bid_volume + total_ask_volume)
+
+    @cached_property
+    def ask_pressure(self) -> float:
+        """Relative distance of the ask-side VWAP above the mid"""
+        mid_price = self.book.mid_price
+        return (self.book.ask_vwap - mid_price) / mid_price
+
+    @cached_property
+    def bid_pressure(self) -> float:
+        """Relative distance of the bid-side VWAP below the mid"""
+        mid_price = self.book.mid_price
+        return (mid_price - self.book.bid_vwap) / mid_price
+
+    def slippage_row(self, quantity: float) -> np.ndarray:
+        """Slippage regression features as a 1x5 row"""
+        row = self._slippage_rows.get(quantity)
+        if row is None:
+            row = self._slippage_rows[quantity] = np.array([[
+                self.normalized_spread,                   # Normalized spread
+                self.imbalance,                           # Orderbook imbalance
+                quantity / self.book.total_ask_volume,    # Relative order size
+                self.ask_pressure,                        # Ask-side pressure
+                self.bid_pressure                         # Bid-side pressure
+            ]])
+        return row
+
+    @cached_property
+    def maker_taker(self) -> np.ndarray:
+        """Maker/taker classifier features from the top of the book, in MAKER_TAKER_FEATURES order"""
+        book = self.book
+        row = np.empty(len(MAKER_TAKER_FEATURES))
+
+        # Spread
+        row[0] = book.spread
+
+        # Depth (total volume in top 5 levels)
+        ask_depth = book.top_ask_volume(5)
+        bid_depth = book.top_bid_volume(5)
+        row[1] = total_depth = ask_depth + bid_depth
+
+        # Imbalance
+        row[2] = (bid_depth - ask_depth) / total_depth if total_depth > 0 else 0.0
+
+        # Volatility (price dispersion across the top levels)
+        top_prices = np.concatenate((book.ask_prices[:5], book.bid_prices[:5]))
+        row[3] = top_prices.std() if top_prices.size > 1 else 0.0
+
+        # Total volume in the top TOP_LEVELS levels
+        row[4] = book.top_ask_volume(TOP_LEVELS) + book.top_bid_volume(TOP_LEVELS)
+
+        # Shared by every later snapshot with the same top of book
+        row.flags.writeable = False
+        return row
+
+
+class FeatureCache:
+    def __init__(self, max_entries: int = 256):
+        """
+        Memoize BookFeatures by book version for every model and thread
+
+        Args:
+            max_entries: Number of most recent snapshots kept
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, BookFeatures]" = OrderedDict()
+        self._latest: Dict[str, BookFeatures] = {}
+        self._lock = threading.Lock()
+
+    def get(self, book: OrderBook) -> BookFeatures:
+        """Features of `book`, computed on first use"""
+        with self._lock:
+            features = self._entries.get(book.version)
+            if features is not None:
+                self.hits += 1
+                return features
+            self.misses += 1
+
+            # Only compare against the symbol's newest older snapshot
+            latest = self._latest.get(book.symbol)
+            is_newest = latest is None or book.version > latest.book.version
+            features = BookFeatures(book, latest if is_newest else None)
+            self._entries[book.version] = features
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if is_newest:
+                self._latest[book.symbol] = features
+            return features
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+
+
+# Cache shared by models that are not given one explicitly
+shared_cache = FeatureCache()
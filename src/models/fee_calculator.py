@@ -1,5 +1,13 @@
-from typing import Dict, Tuple
+import bisect
+import json
+import time
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass
+from config import FEE_SCHEDULE_FILE
+from models.orderbook import OrderBook
+
+SECONDS_PER_DAY = 86400
 
 @dataclass
 class FeeTier:
@@ -7,27 +15,152 @@ class FeeTier:
     taker_fee: float
     min_volume: float  # 30-day trading volume in USD
 
+class FeeSchedule:
+    def __init__(self, tiers: Sequence[FeeTier]):
+        """
+        Volume-tiered fee rates of one venue or instrument
+        
+        Args:
+            tiers: Fee tiers in any order; tier numbers follow ascending min_volume
+        """
+        if not tiers:
+            raise ValueError("A fee schedule needs at least one tier")
+        self.tiers = sorted(tiers, key=lambda tier: tier.min_volume)
+        self._min_volumes = [tier.min_volume for tier in self.tiers]
+        
+        # Rates in percent, indexed by tier - 1
+        self.maker_rates = np.array([tier.maker_fee for tier in self.tiers])
+        self.taker_rates = np.array([tier.taker_fee for tier in self.tiers])
+        self.min_volumes = np.array(self._min_volumes)
+        
+    def __len__(self) -> int:
+        return len(self.tiers)
+        
+    def tier_for_volume(self, volume_30d: float) -> int:
+        """Highest tier whose volume threshold is met, by binary search (tier 1 below every threshold)"""
+        return max(1, bisect.bisect_right(self._min_volumes, volume_30d))
+        
+    def tiers_for_volumes(self, volumes) -> np.ndarray:
+        """tier_for_volume for an array of volumes"""
+        return np.maximum(1, np.searchsorted(self.min_volumes, volumes, side='right'))
+        
+    def check_tiers(self, fee_tiers):
+        fee_tiers = as_tiers(fee_tiers)
+        if np.any((fee_tiers < 1) | (fee_tiers > len(self.tiers))):
+            raise ValueError(f"Fee tier must be between 1 and {len(self.tiers)}")
+
+def as_tiers(fee_tiers) -> np.ndarray:
+    """Fee tiers as an integer array, rejecting non-integral values instead of truncating them"""
+    fee_tiers = np.asarray(fee_tiers)
+    if fee_tiers.dtype.kind in 'iub':
+        return fee_tiers.astype(np.intp, copy=False)
+    as_float = fee_tiers.astype(np.float64)
+    if not np.all(np.isfinite(as_float) & (as_float == np.round(as_float))):
+        raise ValueError(f"Fee tier must be an integer: {fee_tiers}")
+    return as_float.astype(np.intp)
+
+def load_fee_schedules(path: str = FEE_SCHEDULE_FILE) -> Dict[str, Dict[str, FeeSchedule]]:
+    """
+    Load fee schedules from a JSON file
+
+    The file maps venue -> {"default": tiers, <instrument>: tiers, ...}, where
+    tiers is a list of {"min_volume", "maker_fee", "taker_fee"} objects with
+    fees in percent. Instruments without their own entry use the default.
+
+    Returns:
+        Schedules keyed by venue, then by instrument or "default"
+    """
+    with open(path) as f:
+        venues = json.load(f)
+    return {venue: {name: FeeSchedule([FeeTier(**tier) for tier in tiers]) for name, tiers in schedules.items()}
+            for venue, schedules in venues.items()}
+
+class RollingVolume:
+    def __init__(self, window_days: int = 30):
+        """
+        Trailing traded volume per account over whole days
+        
+        Each account keeps one bucket per day of the window and a running
+        total, so recording a trade and reading the volume are O(1) (buckets
+        of days that pass are cleared once each).
+        
+        Args:
+            window_days: Days in the trailing window, including the current one
+        """
+        self.window_days = window_days
+        # account -> [daily buckets, running total, current day]
+        self._accounts: Dict[str, list] = {}
+        
+    def add(self, account: str, volume: float, timestamp: Optional[float] = None):
+        """Record traded volume (USD) at `timestamp` (epoch seconds, defaults to now)"""
+        state = self._advance(account, timestamp)
+        day = state[2] if timestamp is None else int(timestamp // SECONDS_PER_DAY)
+        # A late trade from an earlier day goes into that day's bucket, so it expires on time;
+        # one from before the window no longer counts
+        if state[2] - day >= self.window_days:
+            return
+        state[0][day % self.window_days] += volume
+        state[1] += volume
+        
+    def volume(self, account: str, timestamp: Optional[float] = None) -> float:
+        """Volume traded in the window ending on the day of `timestamp`"""
+        if account not in self._accounts:
+            return 0.0
+        return self._advance(account, timestamp)[1]
+        
+    def _advance(self, account: str, timestamp: Optional[float]) -> list:
+        day = int((time.time() if timestamp is None else timestamp) // SECONDS_PER_DAY)
+        state = self._accounts.get(account)
+        if state is None:
+            state = self._accounts[account] = [np.zeros(self.window_days), 0.0, day]
+        buckets, _, current = state
+        if day > current:
+            if day - current >= self.window_days:
+                buckets[:] = 0.0
+                state[1] = 0.0
+            else:
+                # Days that left the window reuse their slots for the days that entered it
+                for expired in range(current + 1, day + 1):
+                    slot = expired % self.window_days
+                    state[1] -= buckets[slot]
+                    buckets[slot] = 0.0
+            state[2] = day
+        return state
+
 class FeeCalculator:
-    def __init__(self):
-        # OKX fee tiers as of 2024
-        self.fee_tiers = [
-            FeeTier(0.08, 0.10, 0),           # Tier 1
-            FeeTier(0.07, 0.09, 50000),       # Tier 2
-            FeeTier(0.06, 0.08, 100000),      # Tier 3
-            FeeTier(0.05, 0.07, 200000),      # Tier 4
-            FeeTier(0.04, 0.06, 500000),      # Tier 5
-            FeeTier(0.03, 0.05, 1000000),     # Tier 6
-            FeeTier(0.02, 0.04, 2000000),     # Tier 7
-            FeeTier(0.01, 0.03, 5000000),     # Tier 8
-            FeeTier(0.00, 0.02, 10000000),    # Tier 9
-        ]
-        
-    def calculate_fees(self, 
+    def __init__(self, venue: str = "OKX", schedule_file: str = FEE_SCHEDULE_FILE, window_days: int = 30):
+        """
+        Initialize the fee calculator
+        
+        Args:
+            venue: Venue whose schedules are used
+            schedule_file: Fee schedule file (see load_fee_schedules)
+            window_days: Trailing volume window for automatic tiers
+        """
+        schedules = load_fee_schedules(schedule_file)
+        if venue not in schedules or 'default' not in schedules[venue]:
+            raise ValueError(f"No default fee schedule for venue {venue} in {schedule_file}")
+        self.venue = venue
+        self.schedules = schedules[venue]
+        self.default_schedule = self.schedules['default']
+        self.fee_tiers = self.default_schedule.tiers
+        self.volumes = RollingVolume(window_days)
+        
+    def schedule(self, symbol: str = "") -> FeeSchedule:
+        """Schedule of an instrument, or the venue default"""
+        return self.schedules.get(symbol, self.default_schedule)
+        
+    def tier_labels(self, symbol: str = "") -> List[str]:
+        """Display names of the instrument's tiers, 'Tier 1' upwards"""
+        return [f"Tier {i}" for i in range(1, len(self.schedule(symbol)) + 1)]
+        
+    def calculate_fees(self,
                       order_type: str,
                       quantity: float,
                       price: float,
                       fee_tier: int,
-                      is_maker: bool = False) -> Tuple[float, float]:
+                      is_maker: bool = False,
+                      symbol: str = "") -> Tuple[float, float]:
         """
         Calculate trading fees for an order
         
@@ -35,41 +168,112 @@ class FeeCalculator:
             order_type: Type of order ('market' or 'limit')
             quantity: Order quantity in base currency
             price: Order price in quote currency
-            fee_tier: Fee tier (1-9)
+            fee_tier: Fee tier (1 up to the number of tiers of the schedule)
             is_maker: Whether the order is a maker order
-            
+            symbol: Instrument, selects its schedule if it has one
+        
         Returns:
             Tuple of (fee_amount, fee_percentage)
         """
-        if not 1 <= fee_tier <= 9:
-            raise ValueError("Fee tier must be between 1 and 9")
-            
+        tiers = self.schedule(symbol).tiers
+        if not 1 <= fee_tier <= len(tiers):
+            raise ValueError(f"Fee tier must be between 1 and {len(tiers)}")
+        if type(fee_tier) is not int and fee_tier != int(fee_tier):
+            raise ValueError(f"Fee tier must be an integer: {fee_tier}")
+        
         # Get fee rates for the specified tier
-        tier = self.fee_tiers[fee_tier - 1]
+        tier = tiers[int(fee_tier) - 1]
         
         # Determine fee rate based on order type and maker/taker status
         if order_type == 'market':
             fee_rate = tier.taker_fee
         else:  # limit order
             fee_rate = tier.maker_fee if is_maker else tier.taker_fee
-            
+        
         # Calculate fee amount
         order_value = quantity * price
         fee_amount = order_value * (fee_rate / 100)
         
         return fee_amount, fee_rate
         
-    def get_tier_for_volume(self, volume_30d: float) -> int:
+    def calculate_book_fees(self,
+                           book: OrderBook,
+                           quantity: float,
+                           fee_tier: int,
+                           order_type: str = 'market',
+                           is_maker: bool = False) -> Tuple[float, float]:
+        """
+        Calculate trading fees for an order priced off an orderbook snapshot
+        
+        The mid price is used unless the spread is wider than 1%, in which case
+        the best bid gives a more conservative estimate.
+        
+        Args:
+            book: Orderbook snapshot
+            quantity: Order quantity in base currency
+            fee_tier: Fee tier
+            order_type: Type of order ('market' or 'limit')
+            is_maker: Whether the order is a maker order
+        
+        Returns:
+            Tuple of (fee_amount, fee_percentage)
+        """
+        return self.calculate_fees(order_type, quantity, self.book_price(book), fee_tier, is_maker, book.symbol)
+        
+    def calculate_fees_batch(self,
+                            order_type,
+                            quantities,
+                            price,
+                            fee_tiers,
+                            is_maker=False,
+                            symbol: str = "") -> np.ndarray:
+        """
+        Calculate fee amounts for many orders at once
+        
+        Args:
+            order_type: 'market' or 'limit', for all orders or per order
+            quantities: Order quantities in base currency
+            price: Order price(s) in quote currency
+            fee_tiers: Fee tier(s), broadcast against quantities and price
+            is_maker: Whether the orders are maker orders, for all or per order
+            symbol: Instrument, selects its schedule if it has one
+        
+        Returns:
+            Fee amounts in the broadcast shape
+        """
+        schedule = self.schedule(symbol)
+        fee_tiers = as_tiers(fee_tiers)
+        schedule.check_tiers(fee_tiers)
+        
+        index = fee_tiers - 1
+        use_maker = (np.asarray(order_type) != 'market') & np.asarray(is_maker, dtype=bool)
+        rates = np.where(use_maker, schedule.maker_rates[index], schedule.taker_rates[index])
+        return np.asarray(quantities, dtype=np.float64) * price * (rates / 100)
+        
+    @staticmethod
+    def book_price(book: OrderBook) -> float:
+        """Fee reference price: the mid, or the best bid when the spread is wider than 1%"""
+        if book.spread / book.best_bid > 0.01:
+            return book.best_bid
+        return book.mid_price
+        
+    def get_tier_for_volume(self, volume_30d: float, symbol: str = "") -> int:
         """
         Determine the appropriate fee tier based on 30-day trading volume
         
         Args:
             volume_30d: 30-day trading volume in USD
-            
+            symbol: Instrument, selects its schedule if it has one
+        
         Returns:
-            Fee tier (1-9)
+            Fee tier (1 is the lowest volume tier)
         """
-        for i, tier in enumerate(self.fee_tiers, 1):
-            if volume_30d >= tier.min_volume:
-                return i
-        return 1  # Default to tier 1 if volume is below all thresholds 
\ No newline at end of file
+        return self.schedule(symbol).tier_for_volume(volume_30d)
+        
+    def record_trade(self, account: str, quantity: float, price: float, timestamp: Optional[float] = None):
+        """Add a fill's notional to the account's trailing volume"""
+        self.volumes.add(account, quantity * price, timestamp)
+        
+    def account_tier(self, account: str, symbol: str = "", timestamp: Optional[float] = None) -> int:
+        """Fee tier earned by the account's trailing volume"""
+        return self.get_tier_for_volume(self.volumes.volume(account, timestamp), symbol)
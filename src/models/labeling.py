@@ -0,0 +1,252 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+from models.maker_taker import MakerTakerPredictor
+from models.orderbook import OrderBook
+from utils.tick_store import TickBatch, TickStore
+
+# Hypothetical orders labeled per snapshot: limit price offset from the mid in bps
+# (positive rests behind the mid, negative crosses towards the far side), and side
+DEFAULT_OFFSETS_BPS = (-1.0, 0.0, 0.5, 1.0, 2.0)
+DEFAULT_SIDES = (1.0, -1.0)
+
+
+class FirstPassage:
+    def __init__(self, values: np.ndarray, max_length: Optional[int] = None):
+        """
+        Sparse table answering "first index in [start, stop) with value <= x" for many queries
+
+        Level j holds the minimum of every block of 2**j consecutive values.
+        A query skips blocks whose minimum is above the threshold from the
+        largest level down, so it costs one vectorized gather per level.
+        Only levels up to `max_length` (the longest window ever queried) are
+        built, which bounds memory to O(n log max_length).
+
+        Args:
+            values: Series to search
+            max_length: Longest [start, stop) window that will be queried
+        """
+        values = np.asarray(values, dtype=np.float64)
+        max_length = len(values) if max_length is None else min(max_length, len(values))
+        self.levels = [values]
+        size = 1
+        while 2 * size <= max_length:
+            previous = self.levels[-1]
+            self.levels.append(np.minimum(previous[:-size], previous[size:]))
+            size *= 2
+
+    def first_at_most(self, start: np.ndarray, stop: np.ndarray, threshold: np.ndarray) -> np.ndarray:
+        """Index of the first value <= threshold in each window, -1 where there is none"""
+        position = np.array(start, dtype=np.intp)
+        stop = np.asarray(stop, dtype=np.intp)
+        for level in range(len(self.levels) - 1, -1, -1):
+            size = 1 << level
+            # Skip the block starting at `position` if it fits in the window and has no hit
+            fits = position + size <= stop
+            block_min = self.levels[level][np.where(fits, position, 0)]
+            position += size * (fits & (block_min > threshold))
+        return np.where(position < stop, position, -1)
+
+
+@dataclass(frozen=True)
+class FillLabels:
+    """Outcome of hypothetical orders, shape (snapshots, orders per snapshot)"""
+    prices: np.ndarray      # Limit prices
+    sides: np.ndarray       # +1 buy, -1 sell
+    crossed: np.ndarray     # Crossed the spread when placed (taker)
+    filled: np.ndarray      # Rested and was filled passively within the horizon
+    fill_index: np.ndarray  # Snapshot of the passive fill, -1 when not filled
+    complete: np.ndarray    # Per snapshot: the whole horizon was observed, so the label is final
+
+    @property
+    def is_maker(self) -> np.ndarray:
+        """Resting orders that filled passively; crossing and unfilled orders (chased with a market order) are takers"""
+        return self.filled
+
+
+class FillLabeler:
+    def __init__(self,
+                 horizon: float = 5.0,
+                 offsets_bps: Sequence[float] = DEFAULT_OFFSETS_BPS,
+                 sides: Sequence[float] = DEFAULT_SIDES,
+                 fill_on_touch: bool = False):
+        """
+        Maker/taker labels for hypothetical limit orders replayed against later snapshots
+
+        At every snapshot one order per (offset, side) pair is placed. An
+        order priced through the opposite best quote crosses and is a taker.
+        Otherwise it rests and is a maker if the opposite best quote trades
+        through its price within `horizon` seconds, and a taker if it has to
+        be chased with a market order. Every order of a batch is resolved
+        with one first-passage query, so labeling is a handful of array
+        passes over the batch.
+
+        Args:
+            horizon: Seconds a resting order waits for a passive fill
+            offsets_bps: Limit price offsets from the mid in bps; positive rests behind the mid
+            sides: Sides paired with every offset, +1 buy and -1 sell
+            fill_on_touch: Count the opposite quote reaching the price as a fill;
+                by default it must trade through it, since queue position is unknown
+        """
+        self.horizon = horizon
+        self.offsets_bps = np.asarray(offsets_bps, dtype=np.float64)
+        self.sides = np.asarray(sides, dtype=np.float64)
+        self.fill_on_touch = fill_on_touch
+
+    @property
+    def orders_per_snapshot(self) -> int:
+        return self.offsets_bps.size * self.sides.size
+
+    def label(self, timestamps: np.ndarray, best_bids: np.ndarray, best_asks: np.ndarray) -> FillLabels:
+        """
+        Label the orders placed at every snapshot of a series
+
+        Args:
+            timestamps: Snapshot times in seconds, non-decreasing
+            best_bids: Best bid per snapshot (NaN for an empty side)
+            best_asks: Best ask per snapshot (NaN for an empty side)
+
+        Returns:
+            FillLabels of shape (snapshots, orders_per_snapshot), orders ordered side-major
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        best_bids = np.asarray(best_bids, dtype=np.float64)
+        best_asks = np.asarray(best_asks, dtype=np.float64)
+        n = len(timestamps)
+
+        # Every (side, offset) pair, broadcast against the snapshots on the first axis
+        sides = np.repeat(self.sides, self.offsets_bps.size)[np.newaxis, :]
+        offsets = np.tile(self.offsets_bps, self.sides.size)[np.newaxis, :]
+        mid = ((best_bids + best_asks) / 2)[:, np.newaxis]
+        prices = mid * (1 - sides * offsets / 1e4)
+        buy = sides > 0
+
+        # Crossing at placement; an empty opposite side can neither be crossed nor fill the order
+        with np.errstate(invalid='ignore'):
+            crossed = np.where(buy, prices >= best_asks[:, np.newaxis], prices <= best_bids[:, np.newaxis])
+
+        # Window of later snapshots inside the horizon: [i + 1, end)
+        end = np.searchsorted(timestamps, timestamps + self.horizon, side='right')
+        start = np.arange(1, n + 1)
+        complete = end < n
+
+        # Buys fill when the ask comes down to the price, sells when the bid comes up to it (as -bid <= -price)
+        asks = np.nan_to_num(best_asks, nan=np.inf)
+        neg_bids = np.nan_to_num(-best_bids, nan=np.inf)
+        max_length = int((end - start).max(initial=0))
+        thresholds = np.where(buy, prices, -prices)
+        if not self.fill_on_touch:
+            thresholds = np.nextafter(thresholds, -np.inf)
+
+        fill_index = np.full(prices.shape, -1, dtype=np.intp)
+        resting = ~crossed & ~np.isnan(prices)
+        for side_mask, series in ((buy, asks), (~buy, neg_bids)):
+            rows, cols = np.nonzero(resting & side_mask)
+            if rows.size:
+                passage = FirstPassage(series, max_length)
+                fill_index[rows, cols] = passage.first_at_most(start[rows], end[rows], thresholds[rows, cols])
+
+        return FillLabels(
+            prices=prices,
+            sides=np.broadcast_to(sides, prices.shape),
+            crossed=crossed,
+            filled=fill_index >= 0,
+            fill_index=fill_index,
+            complete=complete
+        )
+
+    def label_batch(self, batch: TickBatch) -> FillLabels:
+        """Label every snapshot of a tick store batch from its top-of-book columns"""
+        return self.label(batch.timestamps, batch.bid_prices[:, 0], batch.ask_prices[:, 0])
+
+
+
+class LiveFillLabeler:
+    def __init__(self,
+                 predictor: MakerTakerPredictor,
+                 labeler: Optional[FillLabeler] = None,
+                 sample_interval: float = 0.5):
+        """
+        Label orders placed on live snapshots once their horizon has passed
+
+        Every snapshot's best quotes are kept, since any of them can fill an
+        order, but orders are only placed on one snapshot per
+        `sample_interval` seconds, whose feature row is computed on arrival.
+        Pending snapshots are labeled in one batch when the oldest is two
+        horizons old, and the final labels are fed to the predictor.
+
+        Args:
+            predictor: Maker/taker predictor to train
+            labeler: Order set and horizon, defaults to FillLabeler()
+            sample_interval: Seconds between snapshots orders are placed on
+        """
+        self.predictor = predictor
+        self.labeler = labeler or FillLabeler()
+        self.sample_interval = sample_interval
+        self.labeled = 0
+        # symbol -> (times, best bids, best asks, {snapshot index: feature row})
+        self._pending: Dict[str, tuple] = {}
+
+    def observe(self, book: OrderBook, received: float):
+        """Record a snapshot received at `received` (seconds) and label what has become final"""
+        pending = self._pending.get(book.symbol)
+        if pending is None:
+            pending = self._pending[book.symbol] = ([], [], [], {})
+        times, best_bids, best_asks, placements = pending
+        if not placements or received - times[max(placements)] >= self.sample_interval:
+            placements[len(times)] = self.predictor.feature_cache.get(book).maker_taker
+        times.append(received)
+        best_bids.append(book.best_bid if book.bid_prices.size else np.nan)
+        best_asks.append(book.best_ask if book.ask_prices.size else np.nan)
+
+        if received - times[0] > 2 * self.labeler.horizon:
+            self._flush(pending)
+
+    def _flush(self, pending: tuple):
+        times, best_bids, best_asks, placements = pending
+        labels = self.labeler.label(times, best_bids, best_asks)
+        placed = np.array(sorted(placements), dtype=np.intp)
+        final = placed[labels.complete[placed]]
+        if final.size:
+            self.predictor.update_features(np.array([placements.pop(i) for i in final]), labels.is_maker[final])
+            self.labeled += labels.is_maker[final].size
+
+        # Snapshots from the first unfinished one on are still needed; they are the only unlabeled placements
+        keep = int(np.argmin(labels.complete)) if not labels.complete.all() else len(times)
+        del times[:keep], best_bids[:keep], best_asks[:keep]
+        shifted = {i - keep: row for i, row in placements.items()}
+        placements.clear()
+        placements.update(shifted)
+
+
+def train_maker_taker(predictor: MakerTakerPredictor,
+                      store: TickStore,
+                      labeler: Optional[FillLabeler] = None,
+                      start: Optional[float] = None,
+                      end: Optional[float] = None,
+                      batch_size: int = 10000) -> int:
+    """
+    Feed labels generated from recorded history to a maker/taker predictor
+
+    Batches overlap by the labeler's horizon, so only snapshots whose horizon
+    was fully observed are used and none is labeled twice.
+
+    Returns:
+        Number of labeled orders fed to the predictor
+    """
+    labeler = labeler or FillLabeler()
+    history = store.window(start, end)
+    total = 0
+    position = 0
+    while position < len(history):
+        batch = history.rows(slice(position, position + batch_size))
+        labels = labeler.label_batch(batch)
+        final = np.flatnonzero(labels.complete)
+        if not final.size:
+            if position + batch_size >= len(history):
+                break  # The rest of the history is within one horizon of its end
+            raise ValueError("batch_size is too small to cover the labeling horizon")
+        predictor.update_batch([batch.book(i) for i in final], labels.is_maker[final])
+        total += labels.is_maker[final].size
+        position += int(final[-1]) + 1
+    return total
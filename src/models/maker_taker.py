@@ -1,32 +1,67 @@
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 from sklearn.linear_model import LogisticRegression
-from dataclasses import dataclass
+from models.features import MAKER_TAKER_FEATURES, FeatureCache, shared_cache
+from models.online_logistic import OnlineLogisticRegression
+from models.orderbook import OrderBook
+from models.training import FittedModel, TrainingScheduler
+from utils.ring_buffer import TrainingWindow
+
+N_FEATURES = len(MAKER_TAKER_FEATURES)
+
+
+def make_classifier() -> LogisticRegression:
+    return LogisticRegression(random_state=42)
 
-@dataclass
-class OrderbookFeatures:
-    spread: float
-    depth: float
-    imbalance: float
-    volatility: float
-    volume: float
 
 class MakerTakerPredictor:
-    def __init__(self, window_size: int = 1000):
+    def __init__(self,
+                 window_size: int = 1000,
+                 learning_rate: float = 0.05,
+                 min_samples: int = 100,
+                 feature_cache: Optional[FeatureCache] = None,
+                 scheduler: Optional[TrainingScheduler] = None):
         """
         Initialize the maker/taker predictor
         
+        The maker probability comes from an online logistic regression that
+        is updated with every labeled sample or mini-batch, so it keeps
+        adapting without retraining. Until `min_samples` labels have been seen
+        a spread heuristic is used. With a scheduler, the exact
+        LogisticRegression is also refitted on the most recent `window_size`
+        samples in a worker process, and the online model continues from its
+        coefficients.
+        
         Args:
             window_size: Number of historical data points to consider
+            learning_rate: Step size of the online classifier
+            min_samples: Labels required before the classifier is used
+            feature_cache: Per-snapshot features shared with other models
+            scheduler: Runs exact refits in a worker process
         """
         self.window_size = window_size
-        self.historical_data = []
-        self.model = LogisticRegression(random_state=42)
-        self.is_trained = False
-        
-    def update(self, 
-              asks: List[Tuple[float, float]], 
-              bids: List[Tuple[float, float]], 
+        self.min_samples = min_samples
+        self.historical_data = TrainingWindow(window_size, N_FEATURES, label_dtype=bool)
+        self.model = OnlineLogisticRegression(N_FEATURES, learning_rate=learning_rate)
+        self.exact_model = make_classifier()
+        self.feature_cache = feature_cache or shared_cache
+        
+        # Latest background fit, and one not yet applied to the online model
+        self.fitted: Optional[FittedModel] = None
+        self._pending_fit: Optional[FittedModel] = None
+        self.training_job = None
+        if scheduler is not None:
+            self.training_job = scheduler.register('maker_taker', self.historical_data, make_classifier,
+                                                   self._on_fitted, min_samples=min_samples,
+                                                   drift_tolerance=0.5)
+        
+    @property
+    def is_trained(self) -> bool:
+        return self.model.n_samples >= self.min_samples
+        
+    def update(self,
+              asks: List[Tuple[float, float]],
+              bids: List[Tuple[float, float]],
               timestamp: str,
               is_maker: bool):
         """
@@ -41,20 +76,81 @@ class MakerTakerPredictor:
         if not asks or not bids:
             return
             
-        # Extract features
-        features = self._extract_features(asks, bids)
+        self.update_book(OrderBook.from_levels(asks, bids), timestamp, is_maker)
         
-        # Store data point
-        self.historical_data.append((features, is_maker))
+    def update_book(self, book: OrderBook, timestamp: str, is_maker: bool):
+        """
+        Update the model with a new orderbook snapshot
         
-        # Keep only recent data
-        if len(self.historical_data) > self.window_size:
-            self.historical_data.pop(0)
+        Args:
+            book: Orderbook snapshot
+            timestamp: Order timestamp
+            is_maker: Whether the order was a maker order
+        """
+        if not book:
+            return
             
-        # Update model if we have enough data
-        if len(self.historical_data) >= 100 and not self.is_trained:
-            self._train_model()
+        features = self._extract_features(book)
+        
+        # Store data point, overwriting the oldest once the window is full
+        self.historical_data.append(features, is_maker)
+        self._partial_fit(features, is_maker)
+        
+    def update_batch(self, books: Sequence[OrderBook], is_maker):
+        """
+        Update the model with a mini-batch of labeled snapshots in one step
+        
+        Args:
+            books: Orderbook snapshots (empty ones are skipped)
+            is_maker: Label per snapshot, or a (snapshots, orders) array of
+                labels of several orders placed at each snapshot
+        """
+        is_maker = np.asarray(is_maker, dtype=bool)
+        if len(is_maker) != len(books):
+            raise ValueError("Need one label per book")
+        valid = np.fromiter((bool(book) for book in books), dtype=bool, count=len(books))
+        if not valid.all():
+            books = [book for book in books if book]
+            is_maker = is_maker[valid]
+        if not books:
+            return
             
+        self.update_features(self._feature_matrix(books), is_maker)
+        
+    def update_features(self, X: np.ndarray, is_maker):
+        """
+        Update the model with precomputed feature rows (see BookFeatures.maker_taker)
+        
+        Args:
+            X: Feature rows, one per snapshot
+            is_maker: Label per row, or a (rows, orders) array of labels per row
+        """
+        is_maker = np.asarray(is_maker, dtype=bool)
+        if is_maker.ndim == 2:
+            X = np.repeat(X, is_maker.shape[1], axis=0)
+            is_maker = is_maker.ravel()
+        if not len(is_maker):
+            return
+        self.historical_data.extend(X, is_maker)
+        self._partial_fit(X, is_maker)
+        
+    def _partial_fit(self, X: np.ndarray, y):
+        # Apply a finished background fit here, so the online model is only touched on this thread
+        pending, self._pending_fit = self._pending_fit, None
+        if pending is not None:
+            self.exact_model = pending.estimator
+            self.fitted = pending
+            self.model.set_coefficients(pending.estimator.coef_, pending.estimator.intercept_)
+            
+        if self.training_job is not None and self.is_trained:
+            self.training_job.observe(np.abs(self.model.predict_proba(X) - y).mean())
+        self.model.partial_fit(X, y)
+        if self.training_job is not None:
+            self.training_job.poll()
+            
+    def _on_fitted(self, fitted: FittedModel):
+        self._pending_fit = fitted
+        
     def predict_proportion(self, asks: List[Tuple[float, float]], bids: List[Tuple[float, float]]) -> float:
         """
         Predict the probability of an order being a maker order
@@ -69,76 +165,73 @@ class MakerTakerPredictor:
         if not asks or not bids:
             return 0.5  # Default to 50/50 if no data
             
-        features = self._extract_features(asks, bids)
+        return self.predict_book(OrderBook.from_levels(asks, bids))
         
+    def predict_book(self, book: OrderBook) -> float:
+        """
+        Predict the probability of an order being a maker order for a snapshot
+        
+        Args:
+            book: Orderbook snapshot
+            
+        Returns:
+            Probability of being a maker order (0-1)
+        """
+        if not book:
+            return 0.5  # Default to 50/50 if no data
+            
         if not self.is_trained:
-            return self._simple_proportion_model(asks, bids)
+            return self._simple_proportion_model(book)
             
-        # Predict using the trained model
-        return self.model.predict_proba([features])[0][1]
+        # Predict using the online model
+        return float(self.model.predict_proba(self._extract_features(book))[0])
         
-    def _extract_features(self, asks: List[Tuple[float, float]], bids: List[Tuple[float, float]]) -> OrderbookFeatures:
-        """Extract features from orderbook data"""
-        if not asks or not bids:
-            return OrderbookFeatures(0, 0, 0, 0, 0)
+    def predict_book_batch(self, books: Sequence[OrderBook]) -> np.ndarray:
+        """
+        Predict the maker probability for many snapshots at once
+        
+        Args:
+            books: Orderbook snapshots
             
-        # Calculate spread
-        best_ask = float(asks[0][0])
-        best_bid = float(bids[0][0])
-        spread = best_ask - best_bid
-        
-        # Calculate depth (total volume in top 5 levels)
-        ask_depth = sum(float(q) for _, q in asks[:5])
-        bid_depth = sum(float(q) for _, q in bids[:5])
-        total_depth = ask_depth + bid_depth
-        
-        # Calculate imbalance
-        imbalance = (bid_depth - ask_depth) / total_depth if total_depth > 0 else 0
-        
-        # Calculate volatility (price changes across levels)
-        ask_prices = [float(p) for p, _ in asks[:5]]
-        bid_prices = [float(p) for p, _ in bids[:5]]
-        volatility = np.std(ask_prices + bid_prices) if len(ask_prices + bid_prices) > 1 else 0
-        
-        # Calculate total volume
-        total_volume = sum(float(q) for _, q in asks[:10] + bids[:10])
-        
-        return OrderbookFeatures(
-            spread=spread,
-            depth=total_depth,
-            imbalance=imbalance,
-            volatility=volatility,
-            volume=total_volume
-        )
-        
-    def _train_model(self):
-        """Train the logistic regression model"""
-        if len(self.historical_data) < 100:
-            return
+        Returns:
+            Probability of being a maker order per snapshot (0.5 for empty books)
+        """
+        proportions = np.full(len(books), 0.5)
+        valid = [i for i, book in enumerate(books) if book]
+        if not valid:
+            return proportions
             
-        X = np.array([[
-            d.spread,
-            d.depth,
-            d.imbalance,
-            d.volatility,
-            d.volume
-        ] for d, _ in self.historical_data])
-        
-        y = np.array([is_maker for _, is_maker in self.historical_data])
+        books = [books[i] for i in valid]
+        if not self.is_trained:
+            spreads = np.fromiter((self.feature_cache.get(book).normalized_spread for book in books),
+                                  dtype=np.float64, count=len(books))
+            proportions[valid] = np.clip(0.5 + spreads * 10, 0.2, 0.8)
+        else:
+            proportions[valid] = self.model.predict_proba(self._feature_matrix(books))
+        return proportions
+        
+    def _extract_features(self, book: OrderBook) -> np.ndarray:
+        """Extract the feature row of a snapshot"""
+        if not book:
+            return np.zeros(N_FEATURES)
+            
+        return self.feature_cache.get(book).maker_taker
         
-        self.model.fit(X, y)
-        self.is_trained = True
+    def _feature_matrix(self, books: Sequence[OrderBook]) -> np.ndarray:
+        """Feature rows of non-empty snapshots, stacked into one array"""
+        X = np.empty((len(books), N_FEATURES))
+        for i, book in enumerate(books):
+            X[i] = self.feature_cache.get(book).maker_taker
+        return X
         
-    def _simple_proportion_model(self, asks: List[Tuple[float, float]], bids: List[Tuple[float, float]]) -> float:
+    def _simple_proportion_model(self, book: OrderBook) -> float:
         """Simple model for when we don't have enough training data"""
-        if not asks or not bids:
+        if not book:
             return 0.5
             
         # Calculate basic features
-        spread = float(asks[0][0]) - float(bids[0][0])
-        mid_price = (float(asks[0][0]) + float(bids[0][0])) / 2
-        normalized_spread = spread / mid_price
+        normalized_spread = self.feature_cache.get(book).normalized_spread
         
         # Simple heuristic: higher spread favors maker orders
         maker_prob = min(0.8, max(0.2, 0.5 + normalized_spread * 10))
-        return maker_prob 
\ No newline at end of file
+        return maker_prob
\ No newline at end of file
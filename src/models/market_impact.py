@@ -1,9 +1,34 @@
+import math
 import numpy as np
-from typing import Tuple
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from models.orderbook import OrderBook
+
+DEFAULT_STEPS = 10
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """Optimal liquidation schedules of a batch of parent orders; time runs along the last axis"""
+    times: np.ndarray          # (..., n_steps + 1) Trade times in days
+    holdings: np.ndarray       # (..., n_steps + 1) Quantity left to trade, from the full quantity down to 0
+    trades: np.ndarray         # (..., n_steps) Quantity traded in each interval
+    expected_cost: np.ndarray  # (...) Expected implementation shortfall in quote currency
+    variance: np.ndarray       # (...) Variance of the shortfall
+    risk_aversion: np.ndarray  # (...) Risk aversion the schedule was optimized for
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    @property
+    def utility(self) -> np.ndarray:
+        """Mean-variance objective E + lambda * V that each schedule minimizes"""
+        return self.expected_cost + self.risk_aversion * self.variance
 
 
 class AlmgrenChrissModel:
-    def __init__(self, volatility: float, eta: float = 0.1, gamma: float = 0.1):
+    def __init__(self, volatility: float, eta: float = 0.1, gamma: float = 0.1, risk_aversion: float = 1e-7):
         """
         Initialize the Almgren-Chriss model
         
@@ -11,48 +36,250 @@ class AlmgrenChrissModel:
             volatility: Market volatility
             eta: Temporary market impact parameter
             gamma: Permanent market impact parameter
+            risk_aversion: Default trader risk aversion (lambda) for execution schedules
         """
         self.volatility = volatility
         self.eta = eta
         self.gamma = gamma
+        self.risk_aversion = risk_aversion
 
-    def calculate_market_impact(self, quantity: float, price: float, time_horizon: float) -> Tuple[float, float]:
+    def calculate_market_impact(self,
+                                quantity: float,
+                                price: float,
+                                time_horizon: float,
+                                eta: Optional[float] = None,
+                                gamma: Optional[float] = None) -> Tuple[float, float]:
         """
         Calculate temporary and permanent market impact
         
+        All arguments broadcast, so arrays of quantities, prices and horizons
+        are evaluated in one call.
+        
         Args:
             quantity: Order quantity
             price: Current market price
             time_horizon: Trading horizon in days
+            eta: Temporary impact parameter, defaults to the model's
+            gamma: Permanent impact parameter, defaults to the model's
             
         Returns:
             Tuple of (temporary_impact, permanent_impact)
         """
+        eta = self.eta if eta is None else eta
+        gamma = self.gamma if gamma is None else gamma
+        
         # Temporary impact
-        temp_impact = self.eta * (quantity / price) * np.sqrt(quantity / time_horizon)
+        temp_impact = eta * (quantity / price) * np.sqrt(quantity / time_horizon)
         
         # Permanent impact
-        perm_impact = self.gamma * (quantity / price)
+        perm_impact = gamma * (quantity / price)
         
         return temp_impact, perm_impact
 
-    def calculate_optimal_execution(self, quantity: float, price: float, time_horizon: float) -> np.ndarray:
+    def calculate_book_impact(self,
+                              book: OrderBook,
+                              quantity: float,
+                              time_horizon: float,
+                              eta: Optional[float] = None,
+                              gamma: Optional[float] = None) -> Tuple[float, float]:
+        """
+        Calculate temporary and permanent market impact at the snapshot mid price
+        
+        Args:
+            book: Orderbook snapshot
+            quantity: Order quantity
+            time_horizon: Trading horizon in days
+            eta: Temporary impact parameter, defaults to the model's
+            gamma: Permanent impact parameter, defaults to the model's
+            
+        Returns:
+            Tuple of (temporary_impact, permanent_impact)
+        """
+        return self.calculate_market_impact(quantity, book.mid_price, time_horizon, eta, gamma)
+
+    def calculate_optimal_execution(self,
+                                    quantity: float,
+                                    price: float,
+                                    time_horizon: float,
+                                    risk_aversion: Optional[float] = None,
+                                    n_steps: int = DEFAULT_STEPS,
+                                    eta: Optional[float] = None,
+                                    gamma: Optional[float] = None) -> np.ndarray:
         """
         Calculate optimal execution schedule
         
         Args:
-            quantity: Total order quantity
+            quantity: Total order quantity, in the units of calculate_market_impact
             price: Current market price
             time_horizon: Trading horizon in days
+            risk_aversion: Trader risk aversion, defaults to the model's
+            n_steps: Number of execution intervals
+            eta: Temporary impact parameter, defaults to the model's
+            gamma: Permanent impact parameter, defaults to the model's
             
         Returns:
-            Array of optimal execution quantities
+            Quantity still to trade at each of the n_steps + 1 trade times
+        """
+        risk_aversion = self.risk_aversion if risk_aversion is None else risk_aversion
+        if time_horizon <= 0:
+            raise ValueError("Time horizon must be positive")
+        if risk_aversion < 0:
+            raise ValueError("Risk aversion must be non-negative")
+        tau = time_horizon / n_steps
+        eta_linear, gamma_linear = self._linear_coefficients(quantity, price, time_horizon, eta, gamma)
+        eta_tilde = self._eta_tilde(eta_linear, gamma_linear, tau)
+        kappa_tau = 2 * math.asinh(0.5 * tau * self.volatility * price * math.sqrt(risk_aversion / eta_tilde))
+        return quantity * self._holding_fractions(kappa_tau, n_steps)
+    
+    def plan_execution(self,
+                       quantity,
+                       price,
+                       time_horizon,
+                       volatility=None,
+                       risk_aversion=None,
+                       n_steps: int = DEFAULT_STEPS,
+                       grid: bool = False,
+                       eta: Optional[float] = None,
+                       gamma: Optional[float] = None) -> ExecutionPlan:
+        """
+        Optimal schedules, expected cost and variance for a batch of parent orders
+        
+        Uses the discrete linear Almgren-Chriss model on X = quantity / price
+        units: trading n units moves the price permanently by g * n, trading
+        at a rate of v units per day costs a temporary h * v per unit, and the
+        price diffuses with volatility * price per sqrt(day). The optimal
+        holdings are x_j = X sinh(kappa (T - t_j)) / sinh(kappa T), where the
+        urgency kappa grows with risk aversion; zero risk aversion gives the
+        linear (TWAP) schedule.
+        
+        The linear coefficients are converted from the model's eta/gamma, which
+        are relative to price as in calculate_market_impact, so both give the
+        same price moves: g = gamma * price matches the permanent
+        gamma * quantity / price, and h = eta * price * sqrt(quantity * T)
+        linearizes the temporary eta * (quantity / price) * sqrt(quantity / T)
+        at the order's average rate (a TWAP of the order concedes exactly that).
+        
+        Args:
+            quantity: Parent order quantities, in the units of calculate_market_impact
+            price: Current market prices
+            time_horizon: Trading horizons in days
+            volatility: Volatilities, defaults to the model's
+            risk_aversion: Risk aversions (lambda), defaults to the model's
+            n_steps: Number of execution intervals
+            grid: Treat quantity, time_horizon, volatility and risk_aversion as
+                axes of an outer product (price must then be a scalar);
+                otherwise all arguments broadcast against each other
+            eta: Temporary impact parameter, defaults to the model's
+            gamma: Permanent impact parameter, defaults to the model's
+                
+        Returns:
+            ExecutionPlan whose summary arrays have the broadcast shape;
+            holdings and trades are in the units of quantity
         """
-        n_steps = 10  # Number of execution steps
-        t = np.linspace(0, time_horizon, n_steps)
+        price = np.asarray(price, dtype=np.float64)
+        axes = [np.asarray(quantity, dtype=np.float64),
+                np.asarray(time_horizon, dtype=np.float64),
+                np.asarray(self.volatility if volatility is None else volatility, dtype=np.float64),
+                np.asarray(self.risk_aversion if risk_aversion is None else risk_aversion, dtype=np.float64)]
+        if grid:
+            if price.ndim:
+                raise ValueError("price must be a scalar when grid=True")
+            axes = list(np.ix_(*(np.atleast_1d(axis) for axis in axes)))
+        quantity, time_horizon, volatility, risk_aversion = np.broadcast_arrays(*axes, price)[:4]
+        if np.any(time_horizon <= 0):
+            raise ValueError("Time horizon must be positive")
+        if np.any(risk_aversion < 0):
+            raise ValueError("Risk aversion must be non-negative")
         
-        # Calculate optimal trading rate
-        k = np.sqrt(self.eta * self.volatility / self.gamma)
-        optimal_rate = quantity * np.cosh(k * (time_horizon - t)) / np.cosh(k * time_horizon)
+        tau = time_horizon / n_steps
+        eta_linear, gamma_linear = self._linear_coefficients(quantity, price, time_horizon, eta, gamma)
+        eta_tilde = self._eta_tilde(eta_linear, gamma_linear, tau)
+        sigma = volatility * price  # Price volatility in quote currency per sqrt(day)
         
-        return optimal_rate 
\ No newline at end of file
+        # Urgency per step, kappa * tau, from cosh(kappa tau) = 1 + lambda sigma^2 tau^2 / (2 eta~)
+        kappa_tau = 2 * np.arcsinh(0.5 * tau * sigma * np.sqrt(risk_aversion / eta_tilde))
+        fraction = self._holding_fractions(kappa_tau[..., np.newaxis], n_steps)
+        holdings = quantity[..., np.newaxis] * fraction
+        trades = -np.diff(holdings, axis=-1)
+        
+        # Cost and variance are accrued on the X = quantity / price units the coefficients apply to
+        units = (quantity / price)[..., np.newaxis]
+        expected_cost = 0.5 * gamma_linear * units[..., 0] ** 2 + \
+            eta_tilde / tau * np.sum((units * -np.diff(fraction, axis=-1)) ** 2, axis=-1)
+        variance = sigma ** 2 * tau * np.sum((units * fraction[..., 1:]) ** 2, axis=-1)
+        times = tau[..., np.newaxis] * np.arange(n_steps + 1)
+        return ExecutionPlan(times, holdings, trades, expected_cost, variance, risk_aversion)
+    
+    def _linear_coefficients(self, quantity, price, time_horizon,
+                             eta: Optional[float] = None,
+                             gamma: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Linear temporary and permanent coefficients per X = quantity / price unit (see plan_execution)"""
+        eta = self.eta if eta is None else eta
+        gamma = self.gamma if gamma is None else gamma
+        return eta * price * np.sqrt(quantity * time_horizon), gamma * price
+    
+    @staticmethod
+    def _eta_tilde(eta_linear, gamma_linear, tau):
+        """Temporary impact corrected for the discrete step, eta - gamma * tau / 2"""
+        eta_tilde = eta_linear - 0.5 * gamma_linear * tau
+        if np.any(eta_tilde <= 0):
+            raise ValueError("Temporary impact too small for the step length (eta <= gamma * tau / 2)")
+        return eta_tilde
+    
+    @staticmethod
+    def _holding_fractions(kappa_tau, n_steps: int) -> np.ndarray:
+        """sinh((N - j) k) / sinh(N k) for j = 0..N, with k = kappa * tau broadcast over the last axis"""
+        # Written with exponentials so large urgencies do not overflow; a tiny floor keeps
+        # zero urgency finite, where the ratio tends to the linear (N - j) / N
+        kappa_tau = np.maximum(kappa_tau, 1e-12)
+        a = np.arange(n_steps, -1, -1) * kappa_tau
+        b = n_steps * kappa_tau
+        return np.exp(a - b) * np.expm1(-2 * a) / np.expm1(-2 * b)
+    
+    def efficient_frontier(self,
+                           quantity,
+                           price,
+                           time_horizon,
+                           volatility=None,
+                           risk_aversions=None,
+                           n_steps: int = DEFAULT_STEPS,
+                           n_points: int = 25,
+                           eta: Optional[float] = None,
+                           gamma: Optional[float] = None) -> ExecutionPlan:
+        """
+        Cost-variance efficient frontier of one or a batch of parent orders
+        
+        Args:
+            quantity: Parent order quantities
+            price: Current market prices
+            time_horizon: Trading horizons in days
+            volatility: Volatilities, defaults to the model's
+            risk_aversions: Risk aversions tracing the frontier; by default
+                n_points values spanning urgency kappa * T from 0.01 (close
+                to TWAP) to 10 (front-loaded) for each order
+            n_steps: Number of execution intervals
+            n_points: Frontier points when risk_aversions is not given
+            eta: Temporary impact parameter, defaults to the model's
+            gamma: Permanent impact parameter, defaults to the model's
+            
+        Returns:
+            ExecutionPlan with the frontier along the last summary axis; its
+            expected_cost falls and variance rises towards lower risk aversion
+        """
+        volatility = np.asarray(self.volatility if volatility is None else volatility, dtype=np.float64)
+        if risk_aversions is None:
+            # Invert the continuous-time urgency kappa^2 = lambda sigma^2 / eta~
+            horizon = np.asarray(time_horizon, dtype=np.float64)[..., np.newaxis]
+            price_ = np.asarray(price, dtype=np.float64)[..., np.newaxis]
+            sigma = volatility[..., np.newaxis] * price_
+            eta_linear, gamma_linear = self._linear_coefficients(
+                np.asarray(quantity, dtype=np.float64)[..., np.newaxis], price_, horizon, eta, gamma)
+            eta_tilde = eta_linear - 0.5 * gamma_linear * horizon / n_steps
+            urgency = np.geomspace(0.01, 10.0, n_points)
+            risk_aversions = eta_tilde * (urgency / horizon) ** 2 / sigma ** 2
+        else:
+            risk_aversions = np.asarray(risk_aversions, dtype=np.float64)
+        expand = lambda value: np.asarray(value, dtype=np.float64)[..., np.newaxis]
+        return self.plan_execution(expand(quantity), expand(price), expand(time_horizon),
+                                   volatility=expand(volatility), risk_aversion=risk_aversions,
+                                   n_steps=n_steps, eta=eta, gamma=gamma)
@@ -0,0 +1,86 @@
+import numpy as np
+
+
+class OnlineLogisticRegression:
+    def __init__(self, n_features: int, learning_rate: float = 0.05, l2: float = 1e-4, memory: int = 1000):
+        """
+        Binary logistic regression fitted by stochastic gradient descent
+
+        Each update is one gradient step of the L2-regularized log loss, taken
+        over a single sample or averaged over a mini-batch, so the cost is
+        O(batch * n_features). Features are standardized with running means
+        and variances that average over all samples seen until `memory`
+        samples, then exponentially over roughly the last `memory` samples.
+
+        Args:
+            n_features: Number of features per sample
+            learning_rate: Step size in standardized units
+            l2: L2 penalty on the standardized weights
+            memory: Effective number of samples the running statistics cover
+        """
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.memory = memory
+        self.n_samples = 0
+        # Bumped on every change to the fit, so callers can tell when cached predictions are stale
+        self.version = 0
+
+        # Running statistics of the features
+        self.x_mean = np.zeros(n_features)
+        self.x_var = np.zeros(n_features)
+
+        # Coefficients in standardized space
+        self.weights = np.zeros(n_features)
+        self.bias = 0.0
+
+    def partial_fit(self, X: np.ndarray, y):
+        """Update with one sample (a feature row and a label) or a mini-batch of them"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        n = len(y)
+        if n == 0:
+            return
+        self.n_samples += n
+        self.version += 1
+        # A batch of n samples moves the statistics as far as n single updates would, at most all the way
+        rate = min(1.0, n * max(1.0 / self.n_samples, 1.0 / self.memory))
+
+        batch_mean = X.mean(axis=0)
+        dx = batch_mean - self.x_mean
+        self.x_mean += rate * dx
+        self.x_var = (1 - rate) * (self.x_var + rate * dx * dx) + rate * X.var(axis=0)
+
+        z = (X - self.x_mean) / self._x_scale()
+        error = self._sigmoid(self.bias + z @ self.weights) - y
+        self.weights -= self.learning_rate * (z.T @ error / n + self.l2 * self.weights)
+        self.bias -= self.learning_rate * error.mean()
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probability of the positive class for each row of X"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        z = (X - self.x_mean) / self._x_scale()
+        return self._sigmoid(self.bias + z @ self.weights)
+
+    @property
+    def coef_(self) -> np.ndarray:
+        """Coefficients in raw feature units"""
+        return self.weights / self._x_scale()
+
+    @property
+    def intercept_(self) -> float:
+        return float(self.bias - self.coef_ @ self.x_mean)
+
+    def set_coefficients(self, coef: np.ndarray, intercept: float):
+        """Continue from an exact fit given in raw feature units"""
+        coef = np.ravel(np.asarray(coef, dtype=np.float64))
+        self.version += 1
+        self.weights = coef * self._x_scale()
+        self.bias = float(np.ravel(intercept)[0]) + coef @ self.x_mean
+
+    def _x_scale(self) -> np.ndarray:
+        scale = np.sqrt(self.x_var)
+        return np.where(scale > 0, scale, 1.0)
+
+    @staticmethod
+    def _sigmoid(t):
+        return 0.5 * (1 + np.tanh(0.5 * t))
@@ -0,0 +1,91 @@
+import numpy as np
+
+
+class OnlineQuantileRegressor:
+    def __init__(self, n_features: int, quantile: float = 0.5, learning_rate: float = 0.05, memory: int = 1000):
+        """
+        Linear quantile regression fitted one sample at a time
+
+        Each update is a pinball-loss (sub)gradient step, O(n_features). Features
+        and target are standardized with running means and variances so one
+        learning rate works for inputs of very different scales; the statistics
+        average over all samples seen until `memory` samples, then exponentially
+        over roughly the last `memory` samples.
+
+        Args:
+            n_features: Number of features per sample
+            quantile: Target quantile in (0, 1)
+            learning_rate: Step size in standardized units
+            memory: Effective number of samples the running statistics cover
+        """
+        if not 0 < quantile < 1:
+            raise ValueError("quantile must be between 0 and 1")
+        self.quantile = quantile
+        self.learning_rate = learning_rate
+        self.memory = memory
+        self.n_samples = 0
+        # Bumped on every change to the fit, so callers can tell when cached predictions are stale
+        self.version = 0
+
+        # Running statistics of features and target
+        self.x_mean = np.zeros(n_features)
+        self.x_var = np.zeros(n_features)
+        self.y_mean = 0.0
+        self.y_var = 0.0
+
+        # Coefficients in standardized space
+        self.weights = np.zeros(n_features)
+        self.bias = 0.0
+
+    def partial_fit(self, x: np.ndarray, y: float):
+        """Update with one sample"""
+        x = np.asarray(x, dtype=np.float64).ravel()
+        self.n_samples += 1
+        self.version += 1
+        rate = max(1.0 / self.n_samples, 1.0 / self.memory)
+
+        dx = x - self.x_mean
+        self.x_mean += rate * dx
+        self.x_var = (1 - rate) * (self.x_var + rate * dx * dx)
+        dy = y - self.y_mean
+        self.y_mean += rate * dy
+        self.y_var = (1 - rate) * (self.y_var + rate * dy * dy)
+
+        z = dx * (1 - rate) / self._x_scale()
+        target = (y - self.y_mean) / self._y_scale()
+        residual = target - (self.bias + self.weights @ z)
+
+        # Pinball loss subgradient: under-prediction pulls up with weight q, over-prediction down with 1 - q
+        step = self.learning_rate * (self.quantile - (residual < 0))
+        self.weights += step * z
+        self.bias += step
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predict the target quantile for each row of X"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        z = (X - self.x_mean) / self._x_scale()
+        return self.y_mean + self._y_scale() * (self.bias + z @ self.weights)
+
+    @property
+    def coef_(self) -> np.ndarray:
+        """Coefficients in raw feature units"""
+        return self.weights * self._y_scale() / self._x_scale()
+
+    @property
+    def intercept_(self) -> float:
+        return float(self.y_mean + self._y_scale() * self.bias - self.coef_ @ self.x_mean)
+
+    def set_coefficients(self, coef: np.ndarray, intercept: float):
+        """Continue from an exact fit given in raw feature units"""
+        coef = np.asarray(coef, dtype=np.float64)
+        self.version += 1
+        self.weights = coef * self._x_scale() / self._y_scale()
+        self.bias = (intercept + coef @ self.x_mean - self.y_mean) / self._y_scale()
+
+    def _x_scale(self) -> np.ndarray:
+        scale = np.sqrt(self.x_var)
+        return np.where(scale > 0, scale, 1.0)
+
+    def _y_scale(self) -> float:
+        scale = np.sqrt(self.y_var)
+        return scale if scale > 0 else 1.0
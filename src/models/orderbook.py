@@ -0,0 +1,243 @@
+import itertools
+import logging
+import numpy as np
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Relative gap between adjacent levels above which the outer level is treated as an outlier
+MAX_LEVEL_GAP = 0.01
+
+# Numeric timestamps above this are taken to be epoch milliseconds (as OKX sends them)
+EPOCH_MILLIS_THRESHOLD = 1e11
+
+# Source of OrderBook.version; every snapshot gets a new, increasing number
+_versions = itertools.count(1)
+
+
+def normalize_side(levels: Sequence, descending: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert raw [price, quantity] levels into clean price and size arrays
+
+    Non-positive and unparseable levels are dropped, the side is sorted (asks
+    ascending, bids descending) unless the feed already delivered it in order,
+    and the level just past the first gap larger than MAX_LEVEL_GAP is removed.
+
+    Args:
+        levels: Raw levels as received, prices and quantities may be strings
+        descending: True for bids, False for asks
+
+    Returns:
+        Tuple of (prices, sizes) arrays
+    """
+    side = 'bid' if descending else 'ask'
+    try:
+        raw = np.asarray(levels, dtype=np.float64)
+        if raw.ndim != 2 or raw.shape[1] < 2:
+            raise ValueError("ragged levels")
+        prices = raw[:, 0]
+        sizes = raw[:, 1]
+    except (ValueError, TypeError):
+        # Fall back to level-by-level conversion to skip only the bad entries
+        parsed = []
+        for price, qty in levels:
+            try:
+                parsed.append((float(price), float(qty)))
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid {side} level: {price}, {qty}")
+        raw = np.array(parsed, dtype=np.float64).reshape(-1, 2)
+        prices = raw[:, 0]
+        sizes = raw[:, 1]
+
+    valid = (prices > 0) & (sizes > 0)
+    if not valid.all():
+        prices = prices[valid]
+        sizes = sizes[valid]
+
+    # Only sort when the feed is out of order
+    steps = np.diff(prices)
+    in_order = (steps <= 0).all() if descending else (steps >= 0).all()
+    if not in_order:
+        order = np.argsort(-prices if descending else prices, kind='stable')
+        prices = prices[order]
+        sizes = sizes[order]
+        steps = np.diff(prices)
+
+    if prices.size > 1:
+        gaps = (-steps if descending else steps) / prices[:-1]
+        outliers = np.flatnonzero(gaps > MAX_LEVEL_GAP)
+        for i in outliers:
+            logger.warning(f"Large price gap detected in {side}s: {gaps[i]:.2%} "
+                           f"between {prices[i]} and {prices[i + 1]}")
+        if outliers.size:
+            # Remove the outlier level
+            prices = np.delete(prices, outliers[0] + 1)
+            sizes = np.delete(sizes, outliers[0] + 1)
+
+    return prices, sizes
+
+
+class OrderBook:
+    def __init__(self,
+                 ask_prices: np.ndarray,
+                 ask_sizes: np.ndarray,
+                 bid_prices: np.ndarray,
+                 bid_sizes: np.ndarray,
+                 timestamp: str = "",
+                 symbol: str = ""):
+        """
+        Initialize an L2 order book snapshot backed by contiguous arrays
+
+        Args:
+            ask_prices: Ask prices sorted ascending
+            ask_sizes: Ask quantities aligned with ask_prices
+            bid_prices: Bid prices sorted descending
+            bid_sizes: Bid quantities aligned with bid_prices
+            timestamp: Exchange timestamp of the snapshot
+            symbol: Instrument symbol
+        """
+        self.ask_prices = np.ascontiguousarray(ask_prices, dtype=np.float64)
+        self.ask_sizes = np.ascontiguousarray(ask_sizes, dtype=np.float64)
+        self.bid_prices = np.ascontiguousarray(bid_prices, dtype=np.float64)
+        self.bid_sizes = np.ascontiguousarray(bid_sizes, dtype=np.float64)
+        self.timestamp = timestamp
+        self.symbol = symbol
+        self.version = next(_versions)
+
+    @classmethod
+    def from_levels(cls,
+                    asks: Sequence[Tuple[float, float]],
+                    bids: Sequence[Tuple[float, float]],
+                    timestamp: str = "",
+                    symbol: str = "") -> "OrderBook":
+        """
+        Build an order book from (price, quantity) level lists
+
+        Levels are expected to be already sorted (asks ascending, bids descending).
+        """
+        ask_levels = np.asarray(asks, dtype=np.float64).reshape(-1, 2)
+        bid_levels = np.asarray(bids, dtype=np.float64).reshape(-1, 2)
+        return cls(ask_levels[:, 0], ask_levels[:, 1],
+                   bid_levels[:, 0], bid_levels[:, 1],
+                   timestamp=timestamp, symbol=symbol)
+
+    @classmethod
+    def from_raw(cls,
+                 asks: Sequence,
+                 bids: Sequence,
+                 timestamp: str = "",
+                 symbol: str = "") -> "OrderBook":
+        """Build an order book from raw feed levels, see normalize_side"""
+        ask_prices, ask_sizes = normalize_side(asks, descending=False)
+        bid_prices, bid_sizes = normalize_side(bids, descending=True)
+        return cls(ask_prices, ask_sizes, bid_prices, bid_sizes,
+                   timestamp=timestamp, symbol=symbol)
+
+    def __reduce__(self):
+        # A book unpickled in another process (e.g. sent by a connection shard) gets a version
+        # from that process, so versions stay unique for the feature and metrics caches there
+        return OrderBook, (self.ask_prices, self.ask_sizes, self.bid_prices, self.bid_sizes,
+                           self.timestamp, self.symbol)
+
+    def __bool__(self) -> bool:
+        return self.ask_prices.size > 0 and self.bid_prices.size > 0
+
+    @property
+    def asks(self) -> List[Tuple[float, float]]:
+        """Ask levels as (price, quantity) tuples"""
+        return list(zip(self.ask_prices.tolist(), self.ask_sizes.tolist()))
+
+    @property
+    def bids(self) -> List[Tuple[float, float]]:
+        """Bid levels as (price, quantity) tuples"""
+        return list(zip(self.bid_prices.tolist(), self.bid_sizes.tolist()))
+
+    @cached_property
+    def epoch_time(self) -> Optional[float]:
+        """Exchange timestamp in epoch seconds, from ISO 8601 or epoch s/ms; None if missing or unparseable"""
+        if not self.timestamp:
+            return None
+        try:
+            value = float(self.timestamp)
+            return value / 1000 if value > EPOCH_MILLIS_THRESHOLD else value
+        except (TypeError, ValueError):
+            pass
+        try:
+            parsed = datetime.fromisoformat(str(self.timestamp).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+    @cached_property
+    def best_ask(self) -> float:
+        return float(self.ask_prices[0])
+
+    @cached_property
+    def best_bid(self) -> float:
+        return float(self.bid_prices[0])
+
+    @cached_property
+    def mid_price(self) -> float:
+        return (self.best_ask + self.best_bid) / 2
+
+    @cached_property
+    def spread(self) -> float:
+        return self.best_ask - self.best_bid
+
+    @cached_property
+    def ask_depth(self) -> np.ndarray:
+        """Cumulative ask quantity by level"""
+        return np.cumsum(self.ask_sizes)
+
+    @cached_property
+    def bid_depth(self) -> np.ndarray:
+        """Cumulative bid quantity by level"""
+        return np.cumsum(self.bid_sizes)
+
+    @cached_property
+    def ask_notional(self) -> np.ndarray:
+        """Cumulative ask price * quantity by level"""
+        return np.cumsum(self.ask_prices * self.ask_sizes)
+
+    @cached_property
+    def bid_notional(self) -> np.ndarray:
+        """Cumulative bid price * quantity by level"""
+        return np.cumsum(self.bid_prices * self.bid_sizes)
+
+    @cached_property
+    def total_ask_volume(self) -> float:
+        return float(self.ask_depth[-1]) if self.ask_depth.size else 0.0
+
+    @cached_property
+    def total_bid_volume(self) -> float:
+        return float(self.bid_depth[-1]) if self.bid_depth.size else 0.0
+
+    @cached_property
+    def ask_vwap(self) -> float:
+        """Volume-weighted average price of the whole ask side"""
+        return self._vwap(self.ask_prices, self.ask_sizes, self.total_ask_volume)
+
+    @cached_property
+    def bid_vwap(self) -> float:
+        """Volume-weighted average price of the whole bid side"""
+        return self._vwap(self.bid_prices, self.bid_sizes, self.total_bid_volume)
+
+    def top_ask_volume(self, levels: int) -> float:
+        """Total ask quantity in the top N levels"""
+        depth = self.ask_depth[:levels]
+        return float(depth[-1]) if depth.size else 0.0
+
+    def top_bid_volume(self, levels: int) -> float:
+        """Total bid quantity in the top N levels"""
+        depth = self.bid_depth[:levels]
+        return float(depth[-1]) if depth.size else 0.0
+
+    @staticmethod
+    def _vwap(prices: np.ndarray, sizes: np.ndarray, total_volume: float) -> float:
+        if total_volume <= 0:
+            return 0.0
+        return float(np.dot(prices, sizes) / total_volume)
@@ -1,18 +1,59 @@
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from sklearn.linear_model import QuantileRegressor
+from models.features import FeatureCache, shared_cache
+from models.online_quantile import OnlineQuantileRegressor
+from models.orderbook import OrderBook
+from models.training import FittedModel, TrainingScheduler
+from utils.ring_buffer import TrainingWindow
+from utils.tick_store import TickBatch
+
+N_FEATURES = 5
+
+
+def make_exact_model() -> QuantileRegressor:
+    return QuantileRegressor(quantile=0.5, alpha=0.1, solver='highs')
+
 
 class SlippageModel:
-    def __init__(self, window_size: int = 100):
+    def __init__(self,
+                 window_size: int = 100,
+                 learning_rate: float = 0.02,
+                 refit_interval: Optional[int] = None,
+                 feature_cache: Optional[FeatureCache] = None,
+                 scheduler: Optional[TrainingScheduler] = None):
         """
         Initialize the slippage model
         
+        The median slippage is tracked by an online quantile regressor that is
+        updated in constant time per snapshot. The exact QuantileRegressor can
+        be fitted on the most recent `window_size` samples to recalibrate it,
+        after which the online model continues from its coefficients: in the
+        background on the scheduler's cadence (or when the online error
+        drifts), or inline every `refit_interval` updates.
+        
         Args:
             window_size: Number of historical data points to consider
+            learning_rate: Step size of the online regressor
+            refit_interval: Updates between inline exact refits (None disables them)
+            feature_cache: Per-snapshot features shared with other models
+            scheduler: Runs exact refits in a worker process instead
         """
         self.window_size = window_size
-        self.historical_data = []
-        self.model = QuantileRegressor(quantile=0.5, alpha=0.1, solver='highs')
+        self.refit_interval = refit_interval
+        self.historical_data = TrainingWindow(window_size, N_FEATURES)
+        self.updates = 0
+        self.model = OnlineQuantileRegressor(N_FEATURES, quantile=0.5, learning_rate=learning_rate)
+        self.exact_model = make_exact_model()
+        self.feature_cache = feature_cache or shared_cache
+        
+        # Latest background fit, and one not yet applied to the online model
+        self.fitted: Optional[FittedModel] = None
+        self._pending_fit: Optional[FittedModel] = None
+        self.training_job = None
+        if scheduler is not None:
+            self.training_job = scheduler.register('slippage', self.historical_data, make_exact_model,
+                                                   self._on_fitted, drift_tolerance=0.5)
         
     def update(self, asks: List[Tuple[float, float]], bids: List[Tuple[float, float]], quantity: float):
         """
@@ -26,44 +67,124 @@ class SlippageModel:
         if not asks or not bids:
             return
             
-        mid_price = (float(asks[0][0]) + float(bids[0][0])) / 2
-        spread = float(asks[0][0]) - float(bids[0][0])
+        self.update_book(OrderBook.from_levels(asks, bids), quantity)
         
-        # Calculate volume-weighted average price (VWAP)
-        ask_vwap = self._calculate_vwap(asks)
-        bid_vwap = self._calculate_vwap(bids)
-        
-        # Calculate orderbook imbalance
-        total_ask_volume = sum(float(q) for _, q in asks)
-        total_bid_volume = sum(float(q) for _, q in bids)
-        imbalance = (total_bid_volume - total_ask_volume) / (total_bid_volume + total_ask_volume)
+    def update_book(self, book: OrderBook, quantity: float):
+        """
+        Update the model with a new orderbook snapshot
         
-        # Store features for regression
-        features = np.array([[
-            spread / mid_price,  # Normalized spread
-            imbalance,           # Orderbook imbalance
-            quantity / total_ask_volume,  # Relative order size
-            (ask_vwap - mid_price) / mid_price,  # Ask-side pressure
-            (mid_price - bid_vwap) / mid_price   # Bid-side pressure
-        ]])
+        Args:
+            book: Orderbook snapshot
+            quantity: Order quantity in base currency
+        """
+        if not book:
+            return
+            
+        book_features = self.feature_cache.get(book)
+        features = book_features.slippage_row(quantity)
         
         # Calculate actual slippage
         if quantity > 0:  # Buy order
-            actual_slippage = (ask_vwap - mid_price) / mid_price
+            actual_slippage = book_features.ask_pressure
         else:  # Sell order
-            actual_slippage = (mid_price - bid_vwap) / mid_price
+            actual_slippage = book_features.bid_pressure
+            
+        # The window overwrites its oldest sample once full
+        self.historical_data.append(features, actual_slippage)
+        self._apply_pending_fit()
+            
+        if self.training_job is not None and self.model.n_samples >= 10:
+            self.training_job.observe(self.model.predict(features)[0] - actual_slippage)
+        self.model.partial_fit(features, actual_slippage)
+        self.updates += 1
+        if self.training_job is not None:
+            self.training_job.poll()
+        elif self.refit_interval and self.updates % self.refit_interval == 0:
+            self.refit()
             
-        self.historical_data.append((features, actual_slippage))
+    def update_batch(self, batch: TickBatch, quantity: float) -> int:
+        """
+        Update the model with every snapshot of a tick store batch
+        
+        Features and targets are computed for all rows at once from the
+        batch's price and size columns, without building an OrderBook per
+        row; the online model then steps through the rows in order, so the
+        result matches calling update_book on each snapshot (except that an
+        inline refit due within the batch runs once, after its last row).
+        
+        Args:
+            batch: Consecutive snapshots (rows without asks or bids are skipped)
+            quantity: Order quantity in base currency
+            
+        Returns:
+            Number of snapshots used
+        """
+        X, y = self.batch_features(batch, quantity)
+        if not len(y):
+            return 0
+        self.historical_data.extend(X, y)
+        self._apply_pending_fit()
+        
+        if self.training_job is not None and self.model.n_samples >= 10:
+            self.training_job.observe(np.abs(self.model.predict(X) - y).mean())
+        for row, target in zip(X, y.tolist()):
+            self.model.partial_fit(row, target)
+        previous, self.updates = self.updates, self.updates + len(y)
+        if self.training_job is not None:
+            self.training_job.poll()
+        elif self.refit_interval and self.updates // self.refit_interval > previous // self.refit_interval:
+            self.refit()
+        return len(y)
+        
+    @staticmethod
+    def batch_features(batch: TickBatch, quantity: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Slippage feature rows and targets of every non-empty snapshot in a batch
+        
+        Returns:
+            (X, y) with the columns of BookFeatures.slippage_row and the
+            realized pressure update_book trains on
+        """
+        ask_sizes, bid_sizes = batch.ask_sizes, batch.bid_sizes
+        valid = (ask_sizes[:, 0] > 0) & (bid_sizes[:, 0] > 0)
+        if not valid.all():
+            ask_sizes, bid_sizes = ask_sizes[valid], bid_sizes[valid]
+        # Missing levels have NaN prices and zero sizes
+        ask_prices = np.where(ask_sizes > 0, batch.ask_prices[valid], 0.0)
+        bid_prices = np.where(bid_sizes > 0, batch.bid_prices[valid], 0.0)
+        
+        total_ask = ask_sizes.sum(axis=1)
+        total_bid = bid_sizes.sum(axis=1)
+        mid = (ask_prices[:, 0] + bid_prices[:, 0]) / 2
+        ask_pressure = (np.einsum('ij,ij->i', ask_prices, ask_sizes) / total_ask - mid) / mid
+        bid_pressure = (mid - np.einsum('ij,ij->i', bid_prices, bid_sizes) / total_bid) / mid
         
-        # Keep only recent data
-        if len(self.historical_data) > self.window_size:
-            self.historical_data.pop(0)
+        X = np.column_stack((
+            (ask_prices[:, 0] - bid_prices[:, 0]) / mid,            # Normalized spread
+            (total_bid - total_ask) / (total_bid + total_ask),      # Orderbook imbalance
+            quantity / total_ask,                                   # Relative order size
+            ask_pressure,                                           # Ask-side pressure
+            bid_pressure                                            # Bid-side pressure
+        ))
+        return X, ask_pressure if quantity > 0 else bid_pressure
             
-        # Update model if we have enough data
-        if len(self.historical_data) >= 10:
-            X = np.vstack([x for x, _ in self.historical_data])
-            y = np.array([y for _, y in self.historical_data])
-            self.model.fit(X, y)
+    def _apply_pending_fit(self):
+        # Apply a finished background fit here, so the online model is only touched on this thread
+        pending, self._pending_fit = self._pending_fit, None
+        if pending is not None:
+            self.exact_model = pending.estimator
+            self.fitted = pending
+            self.model.set_coefficients(pending.estimator.coef_, pending.estimator.intercept_)
+            
+    def _on_fitted(self, fitted: FittedModel):
+        self._pending_fit = fitted
+            
+    def refit(self):
+        """Fit the exact quantile regression on the window and continue online from it"""
+        if len(self.historical_data) < 10:
+            return
+        self.exact_model.fit(self.historical_data.X, self.historical_data.y)
+        self.model.set_coefficients(self.exact_model.coef_, self.exact_model.intercept_)
     
     def predict_slippage(self, asks: List[Tuple[float, float]], bids: List[Tuple[float, float]], quantity: float) -> float:
         """
@@ -80,57 +201,77 @@ class SlippageModel:
         if not asks or not bids:
             return 0.0
             
-        mid_price = (float(asks[0][0]) + float(bids[0][0])) / 2
-        spread = float(asks[0][0]) - float(bids[0][0])
-        
-        # Calculate features
-        total_ask_volume = sum(float(q) for _, q in asks)
-        total_bid_volume = sum(float(q) for _, q in bids)
-        imbalance = (total_bid_volume - total_ask_volume) / (total_bid_volume + total_ask_volume)
-        
-        ask_vwap = self._calculate_vwap(asks)
-        bid_vwap = self._calculate_vwap(bids)
-        
-        features = np.array([[
-            spread / mid_price,
-            imbalance,
-            quantity / total_ask_volume,
-            (ask_vwap - mid_price) / mid_price,
-            (mid_price - bid_vwap) / mid_price
-        ]])
+        return self.predict_book(OrderBook.from_levels(asks, bids), quantity)
+    
+    def predict_book(self, book: OrderBook, quantity: float) -> float:
+        """
+        Predict expected slippage for a given order against an orderbook snapshot
         
+        Args:
+            book: Orderbook snapshot
+            quantity: Order quantity in base currency
+            
+        Returns:
+            Predicted slippage as a percentage
+        """
+        if not book:
+            return 0.0
+            
         # If we don't have enough historical data, use a simple model
-        if len(self.historical_data) < 10:
-            return self._simple_slippage_model(asks, bids, quantity)
+        if self.model.n_samples < 10:
+            return self._simple_slippage_model(book, quantity)
             
         # Predict using the trained model
+        features = self._calculate_features(book, quantity)
         predicted_slippage = self.model.predict(features)[0]
         return max(0.0, predicted_slippage)  # Ensure non-negative slippage
     
-    def _calculate_vwap(self, orders: List[Tuple[float, float]]) -> float:
-        """Calculate Volume-Weighted Average Price"""
-        total_volume = 0
-        weighted_price = 0
-        
-        for price, quantity in orders:
-            price = float(price)
-            quantity = float(quantity)
-            total_volume += quantity
-            weighted_price += price * quantity
-            
-        return weighted_price / total_volume if total_volume > 0 else 0
+    def predict_book_batch(self, book: OrderBook, quantities, sides=1.0) -> np.ndarray:
+        """
+        Predict slippage for many orders against one snapshot
+        
+        Buys (side >= 0) use the same features as predict_book; sells use the
+        mirrored book (bid volume, bid and ask pressure swapped, imbalance negated).
+        
+        Args:
+            book: Orderbook snapshot
+            quantities: Order quantities, broadcast against sides
+            sides: +1 for buys, -1 for sells
+            
+        Returns:
+            Predicted slippage per order, in the broadcast shape
+        """
+        quantities, sides = np.broadcast_arrays(np.asarray(quantities, dtype=np.float64),
+                                                np.asarray(sides, dtype=np.float64))
+        if not book:
+            return np.zeros(quantities.shape)
+            
+        features = self.feature_cache.get(book)
+        buy = sides >= 0
+        volume = np.where(buy, book.total_ask_volume, book.total_bid_volume)
+        if self.model.n_samples < 10:
+            return features.normalized_spread * (1 + quantities / volume)
+            
+        X = np.empty(quantities.shape + (N_FEATURES,))
+        X[..., 0] = features.normalized_spread
+        X[..., 1] = np.where(buy, features.imbalance, -features.imbalance)
+        X[..., 2] = quantities / volume
+        X[..., 3] = np.where(buy, features.ask_pressure, features.bid_pressure)
+        X[..., 4] = np.where(buy, features.bid_pressure, features.ask_pressure)
+        predicted = self.model.predict(X.reshape(-1, N_FEATURES)).reshape(quantities.shape)
+        return np.maximum(predicted, 0.0)
     
-    def _simple_slippage_model(self, asks: List[Tuple[float, float]], bids: List[Tuple[float, float]], quantity: float) -> float:
+    def _calculate_features(self, book: OrderBook, quantity: float) -> np.ndarray:
+        """Build the regression feature row for a snapshot"""
+        return self.feature_cache.get(book).slippage_row(quantity)
+    
+    def _simple_slippage_model(self, book: OrderBook, quantity: float) -> float:
         """Simple slippage model for when we don't have enough historical data"""
-        if not asks or not bids:
+        if not book:
             return 0.0
             
-        mid_price = (float(asks[0][0]) + float(bids[0][0])) / 2
-        spread = float(asks[0][0]) - float(bids[0][0])
-        
         # Calculate basic slippage based on order size relative to available liquidity
-        total_ask_volume = sum(float(q) for _, q in asks)
-        relative_size = quantity / total_ask_volume
+        relative_size = quantity / book.total_ask_volume
         
         # Simple linear model: slippage increases with relative order size and spread
-        return (spread / mid_price) * (1 + relative_size) 
\ No newline at end of file
+        return self.feature_cache.get(book).normalized_spread * (1 + relative_size)
\ No newline at end of file
@@ -0,0 +1,211 @@
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from utils.ring_buffer import TrainingWindow
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FittedModel:
+    """A fitted estimator with the metadata needed to audit its staleness"""
+    estimator: Any
+    version: int
+    n_samples: int        # Samples in the training snapshot
+    snapshot_time: float  # When the window was snapshotted (epoch seconds)
+    fitted_at: float      # When the fit finished (epoch seconds)
+    fit_duration: float   # Seconds spent in fit()
+
+    @property
+    def age(self) -> float:
+        """Seconds since the training data was snapshotted"""
+        return time.time() - self.snapshot_time
+
+
+def _fit(estimator, X: np.ndarray, y: np.ndarray):
+    """Worker process entry point"""
+    start = time.perf_counter()
+    estimator.fit(X, y)
+    return estimator, time.perf_counter() - start
+
+
+class TrainingJob:
+    def __init__(self,
+                 scheduler: "TrainingScheduler",
+                 name: str,
+                 window: TrainingWindow,
+                 make_estimator: Callable[[], Any],
+                 on_fitted: Callable[[FittedModel], None],
+                 interval: float,
+                 min_samples: int,
+                 drift_tolerance: Optional[float]):
+        """Refit schedule of one model; created by TrainingScheduler.register"""
+        self.scheduler = scheduler
+        self.name = name
+        self.window = window
+        self.make_estimator = make_estimator
+        self.on_fitted = on_fitted
+        self.interval = interval
+        self.min_samples = min_samples
+        self.drift_tolerance = drift_tolerance
+        self.current: Optional[FittedModel] = None
+        self.submitted = 0
+        self.failures = 0
+        self.error = None             # Exponentially weighted absolute error of the serving model
+        self.reference_error = None   # self.error when the current model was swapped in
+        self._future: Optional[Future] = None
+        self._last_submit = -float('inf')
+
+    @property
+    def in_flight(self) -> bool:
+        return self._future is not None
+
+    def observe(self, error: float):
+        """Feed the serving model's error on a new sample, for the drift trigger"""
+        error = abs(error)
+        self.error = error if self.error is None else 0.99 * self.error + 0.01 * error
+
+    def drifted(self) -> bool:
+        if self.drift_tolerance is None or self.error is None or not self.reference_error:
+            return False
+        return self.error > self.reference_error * (1 + self.drift_tolerance)
+
+    def poll(self) -> bool:
+        """
+        Start a background fit if one is due; cheap enough for every message
+
+        Returns:
+            True if a fit was submitted
+        """
+        if self._future is not None or len(self.window) < self.min_samples:
+            return False
+        if time.monotonic() - self._last_submit < self.interval and not self.drifted():
+            return False
+        return self.trigger()
+
+    def trigger(self) -> bool:
+        """Snapshot the window and fit it in the pool now, unless a fit is running"""
+        if self._future is not None or len(self.window) < self.min_samples or self.scheduler.closed:
+            return False
+        # The window keeps changing on the data path, so the worker gets copies
+        X = self.window.X.copy()
+        y = self.window.y.copy()
+        self._last_submit = time.monotonic()
+        snapshot_time = time.time()
+        try:
+            self._future = self.scheduler.executor.submit(_fit, self.make_estimator(), X, y)
+        except RuntimeError as e:  # Shut down or broken pool
+            self.failures += 1
+            logger.warning(f"Could not schedule a fit of {self.name}: {e}")
+            return False
+        self.submitted += 1
+        self._future.add_done_callback(lambda future: self._finish(future, len(y), snapshot_time))
+        return True
+
+    def _finish(self, future: Future, n_samples: int, snapshot_time: float):
+        self._future = None
+        try:
+            estimator, duration = future.result()
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Background fit of {self.name} failed: {e}")
+            return
+        version = (self.current.version if self.current else 0) + 1
+        fitted = FittedModel(estimator, version, n_samples, snapshot_time, time.time(), duration)
+        # A single reference assignment: readers see either the old or the new model
+        self.current = fitted
+        self.reference_error = self.error
+        self.on_fitted(fitted)
+
+    def stats(self) -> dict:
+        current = self.current
+        return {
+            'version': current.version if current else 0,
+            'fit_duration': current.fit_duration if current else 0.0,
+            'age': current.age if current else None,
+            'n_samples': current.n_samples if current else 0,
+            'submitted': self.submitted,
+            'failures': self.failures,
+            'in_flight': self.in_flight
+        }
+
+
+class TrainingScheduler:
+    def __init__(self,
+                 interval: float = 30.0,
+                 max_workers: int = 1,
+                 executor: Optional[Executor] = None):
+        """
+        Refit models in worker processes and hand back versioned results
+
+        Fits never run on the data path: a job snapshots its training window
+        and submits it to the pool, and the fitted estimator is delivered to
+        the job's `on_fitted` callback (on the pool's result thread) wrapped in
+        a FittedModel. The pool is created on the first submitted fit.
+
+        Args:
+            interval: Default seconds between refits of a job
+            max_workers: Worker processes
+            executor: Use this executor instead of a process pool (e.g. in tests)
+        """
+        self.interval = interval
+        self.max_workers = max_workers
+        self.jobs: List[TrainingJob] = []
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def register(self,
+                 name: str,
+                 window: TrainingWindow,
+                 make_estimator: Callable[[], Any],
+                 on_fitted: Callable[[FittedModel], None],
+                 interval: Optional[float] = None,
+                 min_samples: int = 10,
+                 drift_tolerance: Optional[float] = None) -> TrainingJob:
+        """
+        Add a model to the schedule
+
+        Args:
+            name: Label used in logs and stats
+            window: Training samples, snapshotted at each fit
+            make_estimator: Returns a fresh unfitted estimator (must be picklable)
+            on_fitted: Receives every FittedModel
+            interval: Seconds between refits (defaults to the scheduler's)
+            min_samples: Samples required before the first fit
+            drift_tolerance: Refit early once the observed error exceeds the
+                error at the last swap by this fraction (None disables)
+        """
+        job = TrainingJob(self, name, window, make_estimator, on_fitted,
+                          self.interval if interval is None else interval, min_samples, drift_tolerance)
+        self.jobs.append(job)
+        return job
+
+    def stats(self) -> Dict[str, dict]:
+        return {job.name: job.stats() for job in self.jobs}
+
+    def shutdown(self, wait: bool = False):
+        """Stop the pool; fits still running are abandoned unless wait is True"""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None and self._owns_executor:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -4,13 +4,20 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, pyqtSignal, QObject
 from PyQt5.QtGui import QDoubleValidator
+import dataclasses
+import logging
+from engine import SimulationParameters
+from ui.outputs import OutputTexts
+
+logger = logging.getLogger(__name__)
 
 class SignalEmitter(QObject):
-    parameters_changed = pyqtSignal(dict)
+    parameters_changed = pyqtSignal(object)  # SimulationParameters
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, fee_tiers=("Tier 1", "Tier 2", "Tier 3")):
         super().__init__()
+        self.fee_tiers = list(fee_tiers)
         self.setWindowTitle("Trade Simulator")
         self.setMinimumSize(1200, 700)
         self.setStyleSheet("""
@@ -41,6 +48,14 @@ class MainWindow(QMainWindow):
         layout.setStretch(0, 2)
         layout.setStretch(2, 3)
 
+        # Inputs are parsed once per edit into an immutable snapshot that other threads
+        # read without locking; nothing outside the GUI thread touches the widgets
+        self.signals = SignalEmitter()
+        self.parameters = self.read_parameters(SimulationParameters())
+        self.quantity_input.textChanged.connect(self._publish_parameters)
+        self.volatility_input.textChanged.connect(self._publish_parameters)
+        self.fee_combo.currentIndexChanged.connect(self._publish_parameters)
+
     def _create_input_panel(self) -> QGroupBox:
         panel = QGroupBox("⚙️ Input Parameters")
         panel.setStyleSheet("""
@@ -99,7 +114,7 @@ class MainWindow(QMainWindow):
         self.volatility_input.setValidator(QDoubleValidator(0.0, 1.0, 4))
 
         self.fee_combo = QComboBox()
-        self.fee_combo.addItems(["Tier 1", "Tier 2", "Tier 3"])
+        self.fee_combo.addItems(self.fee_tiers)
 
         layout.addLayout(create_input_row("Exchange:", self.exchange_combo))
         layout.addLayout(create_input_row("Asset:", self.asset_combo))
@@ -140,12 +155,23 @@ class MainWindow(QMainWindow):
         layout.setSpacing(18)
         layout.setContentsMargins(30, 30, 30, 30)
 
-        self.slippage_label = QLabel("Expected Slippage: --")
-        self.fees_label = QLabel("Expected Fees: --")
-        self.impact_label = QLabel("Market Impact: --")
-        self.net_cost_label = QLabel("Net Cost: --")
-        self.maker_taker_label = QLabel("Maker/Taker Ratio: --")
-        self.latency_label = QLabel("Internal Latency: --")
+        # The text each label shows is tracked so unchanged values are not repainted
+        self.output_texts = OutputTexts()
+        texts = self.output_texts.texts
+        self.slippage_label = QLabel(texts['slippage'])
+        self.fees_label = QLabel(texts['fees'])
+        self.impact_label = QLabel(texts['impact'])
+        self.net_cost_label = QLabel(texts['net_cost'])
+        self.maker_taker_label = QLabel(texts['maker_taker'])
+        self.latency_label = QLabel(texts['latency'])
+        self._output_labels = {
+            'slippage': self.slippage_label,
+            'fees': self.fees_label,
+            'impact': self.impact_label,
+            'net_cost': self.net_cost_label,
+            'maker_taker': self.maker_taker_label,
+            'latency': self.latency_label,
+        }
 
         layout.addWidget(self.slippage_label)
         layout.addWidget(self.fees_label)
@@ -158,10 +184,33 @@ class MainWindow(QMainWindow):
         panel.setLayout(layout)
         return panel
 
+    def read_parameters(self, base: SimulationParameters) -> SimulationParameters:
+        """
+        Parse the input widgets over `base`, which supplies the fields without a widget
+
+        Raises:
+            ValueError: If an input is not a number or out of range
+        """
+        return dataclasses.replace(
+            base,
+            quantity=float(self.quantity_input.text()),
+            volatility=float(self.volatility_input.text()),
+            # Tiers are listed in order from the fee schedule
+            fee_tier=self.fee_combo.currentIndex() + 1
+        )
+
+    def _publish_parameters(self, *_):
+        try:
+            parameters = self.read_parameters(self.parameters)
+        except ValueError as e:
+            # Keep the last valid set while an edit is incomplete
+            logger.debug(f"Invalid input value: {e}")
+            return
+        if parameters != self.parameters:
+            self.parameters = parameters
+            self.signals.parameters_changed.emit(parameters)
+
     def update_outputs(self, data: dict):
-        self.slippage_label.setText(f"Expected Slippage: {data.get('slippage', '--')}")
-        self.fees_label.setText(f"Expected Fees: {data.get('fees', '--')}")
-        self.impact_label.setText(f"Market Impact: {data.get('impact', '--')}")
-        self.net_cost_label.setText(f"Net Cost: {data.get('net_cost', '--')}")
-        self.maker_taker_label.setText(f"Maker/Taker Ratio: {data.get('maker_taker', '--')}")
-        self.latency_label.setText(f"Internal Latency: {data.get('latency', '--')} ms")
+        """Show formatted output values, repainting only the labels whose text changed"""
+        for key, text in self.output_texts.changes(data).items():
+            self._output_labels[key].setText(text)
@@ -0,0 +1,78 @@
+import logging
+from typing import Optional
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot
+from engine import TradingEngine
+from ui.outputs import MetricsResult
+from utils.conflation import ConflationBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsWorker(QObject):
+    results_ready = pyqtSignal(object)  # MetricsResult
+
+    def __init__(self, engine: TradingEngine, books: ConflationBuffer, interval_ms: int = 100):
+        """
+        Compute output metrics on a dedicated QThread
+
+        Every `interval_ms` the worker drains the newest processed book per
+        symbol, prices the selected symbol (or the most recent one) and emits
+        a MetricsResult; the GUI thread only receives results through the
+        queued signal, so slow model calls never block repaints. Books are
+        priced with the engine's current parameter snapshot, under the
+        engine's model lock, since the ingest thread keeps training the models.
+
+        Args:
+            engine: Engine whose models price the books
+            books: Processed books published by the engine, keyed by symbol
+            interval_ms: Milliseconds between computations
+        """
+        super().__init__()
+        self.engine = engine
+        self.books = books
+        self.interval_ms = interval_ms
+        self.symbol = ""
+        self._timer: Optional[QTimer] = None
+        self._thread = QThread()
+        self.moveToThread(self._thread)
+        self._thread.started.connect(self._start_timer)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Stop computing and join the worker thread"""
+        self._thread.quit()
+        self._thread.wait()
+
+    def select(self, symbol: str):
+        """Price `symbol` when it has updated since the last tick"""
+        self.symbol = symbol
+
+    @pyqtSlot()
+    def _start_timer(self):
+        # Created here so the timer lives on, and fires in, the worker thread
+        self._timer = QTimer()
+        self._timer.timeout.connect(self.compute)
+        self._timer.start(self.interval_ms)
+
+    @pyqtSlot()
+    def compute(self):
+        try:
+            # Only the newest processed book per symbol survives between ticks
+            latest = self.books.drain()
+            if not latest:
+                return
+
+            data = latest.get(self.symbol)
+            if data is None:
+                data = list(latest.values())[-1]
+
+            book = data.get('book')
+            if not book:
+                return
+
+            metrics = self.engine.compute_metrics(book)
+            self.results_ready.emit(MetricsResult.from_metrics(data.get('symbol', ''), metrics))
+        except Exception as e:
+            logger.exception(f"Error computing metrics: {e}")
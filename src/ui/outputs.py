@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from typing import Dict
+
+# Output label key -> display template, in panel order
+OUTPUT_TEMPLATES = {
+    'slippage': "Expected Slippage: {}",
+    'fees': "Expected Fees: {}",
+    'impact': "Market Impact: {}",
+    'net_cost': "Net Cost: {}",
+    'maker_taker': "Maker/Taker Ratio: {}",
+    'latency': "Internal Latency: {} ms",
+}
+
+
+@dataclass(frozen=True)
+class MetricsResult:
+    """Metrics of one processed snapshot, as published to the window"""
+    symbol: str
+    slippage: float
+    fees: float
+    impact: float
+    net_cost: float
+    maker_taker: float
+    latency: float
+
+    @classmethod
+    def from_metrics(cls, symbol: str, metrics: Dict[str, float]) -> "MetricsResult":
+        return cls(symbol=symbol, **{name: float(metrics[name]) for name in
+                                     ('slippage', 'fees', 'impact', 'net_cost', 'maker_taker', 'latency')})
+
+    def formatted(self) -> Dict[str, str]:
+        """Display text per output label"""
+        return {
+            'slippage': f"{self.slippage:.4f}%",
+            'fees': f"${self.fees:.2f}",
+            'impact': f"${self.impact:.2f}",
+            'net_cost': f"${self.net_cost:.2f}",
+            'maker_taker': f"{self.maker_taker:.2f}/{1 - self.maker_taker:.2f}",
+            'latency': f"{self.latency:.1f}"
+        }
+
+
+class OutputTexts:
+    def __init__(self, templates: Dict[str, str] = OUTPUT_TEMPLATES):
+        """
+        Text currently shown by each output label
+
+        Kept apart from the Qt widgets so the window can repaint only the
+        labels whose text changed, and so that logic runs without a display.
+        """
+        self.templates = templates
+        self.texts = {key: template.format('--') for key, template in templates.items()}
+
+    def changes(self, data: Dict[str, str]) -> Dict[str, str]:
+        """Record the texts for formatted values and return only those that differ from what is shown"""
+        changed = {}
+        for key, template in self.templates.items():
+            text = template.format(data.get(key, '--'))
+            if text != self.texts[key]:
+                self.texts[key] = changed[key] = text
+        return changed
@@ -0,0 +1,80 @@
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class ConflationBuffer:
+    def __init__(self, max_keys: Optional[int] = None):
+        """
+        Bounded latest-wins hand-off between threads, one slot per key
+
+        Publishing to a key that already holds an unconsumed item replaces it
+        (conflation), so a slow consumer only ever sees the newest item per key
+        and the buffer never holds more than `max_keys` items.
+
+        Args:
+            max_keys: Maximum number of keys with a pending item (None for unbounded)
+        """
+        self.max_keys = max_keys
+        self._slots: Dict[Hashable, Any] = {}
+        self._condition = threading.Condition()
+        self.closed = False
+        self.stats = {
+            'published': 0,
+            'conflated': 0,  # Replaced before being consumed
+            'dropped': 0,    # Rejected because the buffer was full or closed
+            'consumed': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def put(self, key: Hashable, item: Any) -> bool:
+        """
+        Publish the newest item for a key
+
+        Returns:
+            False if the item was dropped
+        """
+        with self._condition:
+            if self.closed:
+                self.stats['dropped'] += 1
+                return False
+            if key in self._slots:
+                self.stats['conflated'] += 1
+            elif self.max_keys is not None and len(self._slots) >= self.max_keys:
+                self.stats['dropped'] += 1
+                return False
+            self._slots[key] = item
+            self.stats['published'] += 1
+            self._condition.notify()
+            return True
+
+    def take(self, timeout: Optional[float] = None) -> Optional[Tuple[Hashable, Any]]:
+        """
+        Remove and return the oldest pending (key, item), waiting up to `timeout` seconds
+
+        Returns:
+            None if nothing arrived in time or the buffer was closed
+        """
+        with self._condition:
+            if not self._slots and not self.closed:
+                self._condition.wait(timeout)
+            if not self._slots:
+                return None
+            key = next(iter(self._slots))
+            self.stats['consumed'] += 1
+            return key, self._slots.pop(key)
+
+    def drain(self) -> Dict[Hashable, Any]:
+        """Remove and return every pending item without waiting"""
+        with self._condition:
+            items = self._slots
+            self._slots = {}
+            self.stats['consumed'] += len(items)
+            return items
+
+    def close(self):
+        """Reject further items and wake any waiting consumer"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
@@ -1,13 +1,18 @@
 import time
-from typing import Dict, List
+from collections import deque
+from typing import Deque, Dict
 import statistics
 
 class PerformanceMonitor:
-    def __init__(self):
-        self.metrics: Dict[str, List[float]] = {
-            'data_processing': [],
-            'ui_update': [],
-            'end_to_end': []
+    def __init__(self, max_samples: int = 1000):
+        """
+        Args:
+            max_samples: Number of most recent samples kept per metric
+        """
+        self.max_samples = max_samples
+        self.metrics: Dict[str, Deque[float]] = {
+            name: deque(maxlen=max_samples)
+            for name in ('decode', 'data_processing', 'ui_update', 'end_to_end')
         }
         self.start_times: Dict[str, float] = {}
 
@@ -19,9 +24,15 @@ class PerformanceMonitor:
         """End measuring a specific metric and record the duration"""
         if metric_name in self.start_times:
             duration = (time.perf_counter() - self.start_times[metric_name]) * 1000  # Convert to ms
-            self.metrics[metric_name].append(duration)
+            self.record(metric_name, duration)
             del self.start_times[metric_name]
 
+    def record(self, metric_name: str, duration_ms: float):
+        """Record an externally measured duration in milliseconds"""
+        if metric_name not in self.metrics:
+            self.metrics[metric_name] = deque(maxlen=self.max_samples)
+        self.metrics[metric_name].append(duration_ms)
+
     def get_statistics(self) -> Dict[str, Dict[str, float]]:
         """Get statistics for all metrics"""
         stats = {}
@@ -38,5 +49,5 @@ class PerformanceMonitor:
 
     def reset(self):
         """Reset all metrics"""
-        self.metrics = {k: [] for k in self.metrics}
+        self.metrics = {k: deque(maxlen=self.max_samples) for k in self.metrics}
         self.start_times = {} 
\ No newline at end of file
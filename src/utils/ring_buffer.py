@@ -0,0 +1,105 @@
+import numpy as np
+from typing import Optional, Tuple
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, shape: Tuple[int, ...] = (), dtype=np.float64):
+        """
+        Fixed-capacity FIFO of equally shaped items in preallocated storage
+
+        Every item is written twice, at slot i and i + capacity, so the most
+        recent items are always one contiguous run of the storage array.
+        Appends are O(1) and `view` returns them oldest first without copying.
+
+        Args:
+            capacity: Maximum number of items kept; older items are overwritten
+            shape: Shape of a single item, () for scalars
+            dtype: Item dtype
+        """
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._storage = np.zeros((2 * capacity,) + tuple(shape), dtype=dtype)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def full(self) -> bool:
+        return self._count == self.capacity
+
+    def append(self, item):
+        self._storage[self._next] = item
+        self._storage[self._next + self.capacity] = item
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def extend(self, items: np.ndarray):
+        """Append a block of items in at most two slice writes per copy"""
+        items = np.asarray(items, dtype=self._storage.dtype)
+        if len(items) > self.capacity:
+            items = items[-self.capacity:]
+        n = len(items)
+        head = min(n, self.capacity - self._next)
+        for offset in (0, self.capacity):
+            self._storage[self._next + offset:self._next + offset + head] = items[:head]
+            self._storage[offset:offset + n - head] = items[head:]
+        self._next = (self._next + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+    def view(self, n: Optional[int] = None) -> np.ndarray:
+        """The last n items (all by default), oldest first, as a read-only view"""
+        n = self._count if n is None else min(n, self._count)
+        end = self._next + self.capacity
+        window = self._storage[end - n:end]
+        window.flags.writeable = False
+        return window
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+
+class TrainingWindow:
+    def __init__(self, capacity: int, n_features: int, label_dtype=np.float64):
+        """
+        Sliding window of (feature row, label) samples for model fitting
+
+        Args:
+            capacity: Number of most recent samples kept
+            n_features: Features per sample
+            label_dtype: Label dtype, e.g. bool for classifiers
+        """
+        self.features = RingBuffer(capacity, (n_features,))
+        self.labels = RingBuffer(capacity, dtype=label_dtype)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def capacity(self) -> int:
+        return self.labels.capacity
+
+    def append(self, features: np.ndarray, label):
+        self.features.append(np.ravel(features))
+        self.labels.append(label)
+
+    def extend(self, features: np.ndarray, labels: np.ndarray):
+        self.features.extend(features)
+        self.labels.extend(labels)
+
+    @property
+    def X(self) -> np.ndarray:
+        """Feature matrix of the window, oldest first (zero-copy)"""
+        return self.features.view()
+
+    @property
+    def y(self) -> np.ndarray:
+        """Labels of the window, oldest first (zero-copy)"""
+        return self.labels.view()
+
+    def clear(self):
+        self.features.clear()
+        self.labels.clear()
@@ -0,0 +1,92 @@
+import json
+import time
+import numpy as np
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+from models.orderbook import OrderBook
+
+
+class SyntheticBookGenerator:
+    def __init__(self,
+                 depth: int = 50,
+                 mid_price: float = 95000.0,
+                 spread_bps: float = 1.0,
+                 tick_size: float = 0.1,
+                 skew: float = 0.0,
+                 level_size: float = 1.0,
+                 volatility: float = 0.0001,
+                 symbol: str = "BTC-USDT-SWAP",
+                 exchange: str = "OKX",
+                 seed: Optional[int] = None):
+        """
+        Random-walk L2 books in the GoMarket feed format, for benchmarks and load tests
+
+        Args:
+            depth: Levels per side
+            mid_price: Starting mid price
+            spread_bps: Best bid/ask spread in basis points of the mid
+            tick_size: Price increment; levels are 1-3 ticks apart
+            skew: Volume imbalance in [-1, 1]; positive puts more size on the bids
+            level_size: Mean size per level
+            volatility: Standard deviation of the per-book log mid return
+            symbol: Instrument symbol
+            exchange: Exchange name put on generated messages
+            seed: Random seed for reproducible sequences
+        """
+        if not -1 < skew < 1:
+            raise ValueError("skew must be between -1 and 1")
+        self.depth = depth
+        self.mid_price = mid_price
+        self.spread_bps = spread_bps
+        self.tick_size = tick_size
+        self.skew = skew
+        self.level_size = level_size
+        self.volatility = volatility
+        self.symbol = symbol
+        self.exchange = exchange
+        self.rng = np.random.default_rng(seed)
+
+    def next_arrays(self):
+        """Advance the mid price and return (ask_prices, ask_sizes, bid_prices, bid_sizes)"""
+        self.mid_price *= np.exp(self.rng.normal(0.0, self.volatility))
+        half_spread = max(self.mid_price * self.spread_bps / 20000, self.tick_size / 2)
+        best_ask = np.ceil((self.mid_price + half_spread) / self.tick_size) * self.tick_size
+        best_bid = np.floor((self.mid_price - half_spread) / self.tick_size) * self.tick_size
+
+        steps = self.rng.integers(1, 4, size=(2, self.depth)) * self.tick_size
+        steps[:, 0] = 0
+        ask_prices = best_ask + np.cumsum(steps[0])
+        bid_prices = best_bid - np.cumsum(steps[1])
+
+        sizes = self.rng.lognormal(0.0, 0.75, size=(2, self.depth)) * self.level_size
+        ask_sizes = np.round(sizes[0] * (1 - self.skew), 4) + 0.0001
+        bid_sizes = np.round(sizes[1] * (1 + self.skew), 4) + 0.0001
+        return np.round(ask_prices, 8), ask_sizes, np.round(bid_prices, 8), bid_sizes
+
+    def next_book(self) -> OrderBook:
+        ask_prices, ask_sizes, bid_prices, bid_sizes = self.next_arrays()
+        return OrderBook(ask_prices, ask_sizes, bid_prices, bid_sizes,
+                         timestamp=self._timestamp(), symbol=self.symbol)
+
+    def next_message(self) -> dict:
+        """Next book as a decoded feed message, with string levels like the live feed"""
+        ask_prices, ask_sizes, bid_prices, bid_sizes = self.next_arrays()
+        return {
+            'timestamp': self._timestamp(),
+            'exchange': self.exchange,
+            'symbol': self.symbol,
+            'asks': [[repr(float(p)), repr(float(s))] for p, s in zip(ask_prices, ask_sizes)],
+            'bids': [[repr(float(p)), repr(float(s))] for p, s in zip(bid_prices, bid_sizes)]
+        }
+
+    def next_frame(self) -> str:
+        """Next book as a raw JSON frame"""
+        return json.dumps(self.next_message())
+
+    def books(self, count: int) -> Iterator[OrderBook]:
+        for _ in range(count):
+            yield self.next_book()
+
+    @staticmethod
+    def _timestamp() -> str:
+        return datetime.fromtimestamp(time.time(), timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
@@ -0,0 +1,233 @@
+import json
+import os
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+from models.orderbook import OrderBook
+from websocket.book_builder import BookBuilder
+from websocket.decoder import FrameDecoder
+from websocket.recorder import read_frames
+
+META_FILE = 'meta.json'
+
+# Column name -> (dtype, has a depth dimension)
+COLUMNS = {
+    'timestamps': (np.float64, False),
+    'sequence': (np.int64, False),
+    'ask_prices': (np.float64, True),
+    'ask_sizes': (np.float64, True),
+    'bid_prices': (np.float64, True),
+    'bid_sizes': (np.float64, True),
+}
+
+
+@dataclass
+class TickBatch:
+    """Zero-copy view of consecutive snapshots; missing levels have NaN price and zero size"""
+    timestamps: np.ndarray
+    sequence: np.ndarray
+    ask_prices: np.ndarray
+    ask_sizes: np.ndarray
+    bid_prices: np.ndarray
+    bid_sizes: np.ndarray
+    symbol: str = ""
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def book(self, i: int) -> OrderBook:
+        """Snapshot i as an OrderBook sharing memory with the store"""
+        n_asks = int(np.count_nonzero(self.ask_sizes[i] > 0))
+        n_bids = int(np.count_nonzero(self.bid_sizes[i] > 0))
+        return OrderBook(self.ask_prices[i, :n_asks], self.ask_sizes[i, :n_asks],
+                         self.bid_prices[i, :n_bids], self.bid_sizes[i, :n_bids],
+                         timestamp=str(self.timestamps[i]), symbol=self.symbol)
+
+    def books(self) -> Iterator[OrderBook]:
+        for i in range(len(self)):
+            yield self.book(i)
+
+    def rows(self, rows: slice) -> "TickBatch":
+        """Zero-copy view of a range of this batch"""
+        return TickBatch(symbol=self.symbol, **{name: getattr(self, name)[rows] for name in COLUMNS})
+
+
+class TickStore:
+    def __init__(self, path: str, depth: Optional[int] = None, symbol: str = ""):
+        """
+        Columnar on-disk store of fixed-depth L2 snapshots for one symbol
+
+        Each column is a raw little-endian file in `path` that is only ever
+        appended to; reads go through read-only np.memmap views, so data sets
+        larger than RAM can be sliced without loading them. Timestamps must be
+        non-decreasing, which keeps time range lookups a binary search.
+
+        Args:
+            path: Store directory, created if missing
+            depth: Levels per side; required for a new store, read from disk otherwise
+            symbol: Instrument symbol attached to exported books
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if depth is not None and depth != meta['depth']:
+                raise ValueError(f"Store depth is {meta['depth']}, not {depth}")
+            self.depth = meta['depth']
+            self.count = meta['count']
+            self.symbol = symbol or meta.get('symbol', '')
+        else:
+            if depth is None:
+                raise ValueError("depth is required to create a tick store")
+            self.depth = depth
+            self.count = 0
+            self.symbol = symbol
+            self._write_meta()
+        self._pending: Dict[str, List[np.ndarray]] = {name: [] for name in COLUMNS}
+        self._pending_count = 0
+        self._last_timestamp = -np.inf
+        self._columns: Dict[str, np.ndarray] = {}
+        self._open_columns()
+        if self.count:
+            self._last_timestamp = float(self._columns['timestamps'][-1])
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def pending(self) -> int:
+        """Snapshots buffered since the last flush"""
+        return self._pending_count
+
+    def append(self, book: OrderBook, timestamp: float, sequence: int = -1):
+        """Buffer one snapshot, truncated or padded to the store depth"""
+        row = {
+            'timestamps': np.array([timestamp], dtype=np.float64),
+            'sequence': np.array([sequence], dtype=np.int64),
+        }
+        for side in ('ask', 'bid'):
+            prices = np.full((1, self.depth), np.nan)
+            sizes = np.zeros((1, self.depth))
+            side_prices = getattr(book, f'{side}_prices')[:self.depth]
+            prices[0, :side_prices.size] = side_prices
+            sizes[0, :side_prices.size] = getattr(book, f'{side}_sizes')[:self.depth]
+            row[f'{side}_prices'] = prices
+            row[f'{side}_sizes'] = sizes
+        self.append_batch(**row)
+
+    def append_batch(self,
+                     timestamps: np.ndarray,
+                     sequence: np.ndarray,
+                     ask_prices: np.ndarray,
+                     ask_sizes: np.ndarray,
+                     bid_prices: np.ndarray,
+                     bid_sizes: np.ndarray):
+        """Buffer a block of snapshots given as (n,) and (n, depth) arrays"""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if timestamps.size == 0:
+            return
+        if timestamps[0] < self._last_timestamp or np.any(np.diff(timestamps) < 0):
+            raise ValueError("Timestamps must be non-decreasing")
+        values = dict(timestamps=timestamps, sequence=sequence,
+                      ask_prices=ask_prices, ask_sizes=ask_sizes,
+                      bid_prices=bid_prices, bid_sizes=bid_sizes)
+        for name, (dtype, has_depth) in COLUMNS.items():
+            column = np.asarray(values[name], dtype=dtype)
+            expected = (timestamps.size, self.depth) if has_depth else (timestamps.size,)
+            if column.shape != expected:
+                raise ValueError(f"{name} has shape {column.shape}, expected {expected}")
+            self._pending[name].append(column)
+        self._pending_count += timestamps.size
+        self._last_timestamp = float(timestamps[-1])
+
+    def flush(self):
+        """Append buffered snapshots to the column files and remap them"""
+        if not self._pending_count:
+            return
+        for name, (dtype, _) in COLUMNS.items():
+            with open(self._column_path(name), 'ab') as f:
+                for block in self._pending[name]:
+                    f.write(np.ascontiguousarray(block, dtype=np.dtype(dtype).newbyteorder('<')).tobytes())
+            self._pending[name] = []
+        self.count += self._pending_count
+        self._pending_count = 0
+        self._write_meta()
+        self._open_columns()
+
+    def search(self, start: Optional[float] = None, end: Optional[float] = None) -> slice:
+        """Row range with start <= timestamp < end, found by binary search"""
+        timestamps = self._columns['timestamps']
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = self.count if end is None else int(np.searchsorted(timestamps, end, side='left'))
+        return slice(lo, max(lo, hi))
+
+    def window(self, start: Optional[float] = None, end: Optional[float] = None) -> TickBatch:
+        """Zero-copy view of every snapshot in [start, end)"""
+        return self._batch(self.search(start, end))
+
+    def iter_batches(self,
+                     batch_size: int,
+                     start: Optional[float] = None,
+                     end: Optional[float] = None) -> Iterator[TickBatch]:
+        """Iterate over [start, end) in zero-copy batches of at most batch_size snapshots"""
+        rows = self.search(start, end)
+        for lo in range(rows.start, rows.stop, batch_size):
+            yield self._batch(slice(lo, min(lo + batch_size, rows.stop)))
+
+    def _batch(self, rows: slice) -> TickBatch:
+        return TickBatch(symbol=self.symbol, **{name: self._columns[name][rows] for name in COLUMNS})
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.path, f'{name}.bin')
+
+    def _open_columns(self):
+        for name, (dtype, has_depth) in COLUMNS.items():
+            shape = (self.count, self.depth) if has_depth else (self.count,)
+            if self.count:
+                self._columns[name] = np.memmap(self._column_path(name), dtype=np.dtype(dtype).newbyteorder('<'),
+                                                mode='r', shape=shape)
+            else:
+                self._columns[name] = np.empty(shape, dtype=dtype)
+
+    def _write_meta(self):
+        meta_path = os.path.join(self.path, META_FILE)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump({'depth': self.depth, 'count': self.count, 'symbol': self.symbol}, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+
+def ingest_frame_log(log_path: str, root: str, depth: int, flush_every: int = 10000) -> Dict[str, TickStore]:
+    """
+    Convert a FrameRecorder log into one tick store per symbol under `root`
+
+    Frames go through the same decoder and BookBuilder as live data, so logs
+    recorded in delta mode are stored as full books. Snapshots are stamped
+    with their receive time; frames that fail to decode or leave a book out of
+    sync are skipped.
+
+    Returns:
+        Stores keyed by symbol
+    """
+    decoder = FrameDecoder()
+    builder = BookBuilder(depth=depth)
+    stores: Dict[str, TickStore] = {}
+    for receive_time, payload in read_frames(log_path):
+        try:
+            data = decoder.decode(payload)
+        except ValueError:
+            continue
+        book = builder.apply(data)
+        if book is None or not book:
+            continue
+        symbol = data.get('symbol', '')
+        store = stores.get(symbol)
+        if store is None:
+            store = stores[symbol] = TickStore(os.path.join(root, symbol or 'default'), depth, symbol)
+        store.append(book, receive_time, int(data.get('seqId', -1)))
+        if store.pending >= flush_every:
+            store.flush()
+    for store in stores.values():
+        store.flush()
+    return stores
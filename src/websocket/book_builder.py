@@ -0,0 +1,264 @@
+import bisect
+import logging
+import zlib
+import numpy as np
+from typing import Dict, Optional, Sequence
+from models.orderbook import OrderBook
+
+logger = logging.getLogger(__name__)
+
+# Number of levels per side covered by the OKX-style CRC32 checksum
+CHECKSUM_DEPTH = 25
+
+
+class BookSide:
+    def __init__(self, descending: bool):
+        """
+        One side of a persistent order book
+
+        Prices are kept in a sorted key list (negated for bids so both sides sort
+        ascending from the touch) next to a price -> level dict, so lookups and
+        insert positions are found by binary search. Inserting or removing a
+        price level shifts the list tail, O(n) but a single memmove; exchange
+        books are capped at a few hundred levels per side, where that beats a
+        tree, and size-only updates of existing levels do not touch the list.
+
+        The exported arrays are cached per depth and only rebuilt when a change
+        lands within that depth, so deltas deep in the book reuse them.
+
+        Args:
+            descending: True for bids, False for asks
+        """
+        self.descending = descending
+        self.keys = []
+        self.levels: Dict[float, tuple] = {}  # price -> (size, raw price, raw size)
+        self._exported: Optional[tuple] = None  # (depth, prices, sizes) of the last export
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def clear(self):
+        self.keys = []
+        self.levels = {}
+        self._exported = None
+
+    @staticmethod
+    def parse(changes: Sequence) -> list:
+        """
+        Convert [price, size, ...] level changes to (price, size, raw price, raw size)
+
+        Raises:
+            ValueError: If any level is malformed; nothing has been applied then
+        """
+        try:
+            return [(float(change[0]), float(change[1]), change[0], change[1]) for change in changes]
+        except (ValueError, TypeError, IndexError) as e:
+            raise ValueError(f"Malformed level change: {e}")
+
+    def apply(self, changes: list):
+        """Apply parsed level changes (see parse); a zero size removes the level"""
+        for price, size, raw_price, raw_size in changes:
+            key = -price if self.descending else price
+
+            if size <= 0:
+                if self.levels.pop(price, None) is not None:
+                    index = bisect.bisect_left(self.keys, key)
+                    del self.keys[index]
+                    self._touch(index)
+                continue
+
+            index = bisect.bisect_left(self.keys, key)
+            if price not in self.levels:
+                self.keys.insert(index, key)
+            self.levels[price] = (size, str(raw_price), str(raw_size))
+            self._touch(index)
+
+    def _touch(self, index: int):
+        """Drop the cached export if a change at `index` falls within its depth"""
+        if self._exported is not None:
+            depth = self._exported[0]
+            if depth is None or index < depth:
+                self._exported = None
+
+    def arrays(self, depth: Optional[int] = None):
+        """Return read-only (prices, sizes) for the top `depth` levels"""
+        if self._exported is not None and self._exported[0] == depth:
+            return self._exported[1:]
+        keys = self.keys if depth is None else self.keys[:depth]
+        prices = np.array(keys, dtype=np.float64)
+        if self.descending:
+            prices = -prices
+        sizes = np.fromiter((self.levels[p][0] for p in prices.tolist()),
+                            dtype=np.float64, count=len(keys))
+        # Shared by every snapshot exported until the top levels change
+        prices.flags.writeable = False
+        sizes.flags.writeable = False
+        self._exported = (depth, prices, sizes)
+        return prices, sizes
+
+    def raw_levels(self, depth: int):
+        """Raw (price, size) strings for the top `depth` levels, used for checksums"""
+        sign = -1 if self.descending else 1
+        return [self.levels[sign * key][1:] for key in self.keys[:depth]]
+
+
+class LocalOrderBook:
+    def __init__(self, symbol: str = ""):
+        """
+        Persistent order book for one symbol maintained from snapshots and deltas
+
+        Args:
+            symbol: Instrument symbol
+        """
+        self.symbol = symbol
+        self.asks = BookSide(descending=False)
+        self.bids = BookSide(descending=True)
+        self.seq_id: Optional[int] = None
+        self.timestamp = ""
+        self.synced = False
+
+    def apply_snapshot(self, asks: Sequence, bids: Sequence, seq_id: Optional[int] = None, timestamp: str = ""):
+        """
+        Replace the whole book with a full snapshot
+
+        Raises:
+            ValueError: If a level is malformed; the book is left unchanged
+        """
+        asks, bids = BookSide.parse(asks), BookSide.parse(bids)
+        self.asks.clear()
+        self.bids.clear()
+        self.asks.apply(asks)
+        self.bids.apply(bids)
+        self.seq_id = seq_id
+        self.timestamp = timestamp
+        self.synced = True
+
+    def apply_delta(self,
+                    asks: Sequence,
+                    bids: Sequence,
+                    seq_id: Optional[int] = None,
+                    prev_seq_id: Optional[int] = None,
+                    timestamp: str = "") -> bool:
+        """
+        Apply changed levels on top of the current book
+
+        Both sides are parsed before any level is changed, so a malformed
+        delta leaves the book exactly as it was.
+
+        Returns:
+            False if the delta does not follow the last applied sequence number
+            and the book must be resynced from a new snapshot
+
+        Raises:
+            ValueError: If a level is malformed
+        """
+        if not self.synced:
+            return False
+        if prev_seq_id is not None and self.seq_id is not None and prev_seq_id != self.seq_id:
+            logger.warning(f"Sequence gap on {self.symbol}: expected {self.seq_id}, got {prev_seq_id}")
+            self.synced = False
+            return False
+
+        asks, bids = BookSide.parse(asks), BookSide.parse(bids)
+        self.asks.apply(asks)
+        self.bids.apply(bids)
+        self.seq_id = seq_id if seq_id is not None else self.seq_id
+        self.timestamp = timestamp or self.timestamp
+        return True
+
+    def checksum(self) -> int:
+        """
+        CRC32 over the top levels interleaved as bid:ask pairs (OKX convention)
+
+        Returns:
+            Signed 32-bit checksum
+        """
+        bids = self.bids.raw_levels(CHECKSUM_DEPTH)
+        asks = self.asks.raw_levels(CHECKSUM_DEPTH)
+        parts = []
+        for i in range(max(len(bids), len(asks))):
+            if i < len(bids):
+                parts.extend(bids[i])
+            if i < len(asks):
+                parts.extend(asks[i])
+        value = zlib.crc32(":".join(parts).encode())
+        return value - (1 << 32) if value >= (1 << 31) else value
+
+    def to_orderbook(self, depth: Optional[int] = None) -> OrderBook:
+        """Export the top `depth` levels as an immutable OrderBook snapshot"""
+        ask_prices, ask_sizes = self.asks.arrays(depth)
+        bid_prices, bid_sizes = self.bids.arrays(depth)
+        return OrderBook(ask_prices, ask_sizes, bid_prices, bid_sizes,
+                         timestamp=self.timestamp, symbol=self.symbol)
+
+
+class BookBuilder:
+    def __init__(self, depth: Optional[int] = None, verify_checksum: bool = True):
+        """
+        Maintain one LocalOrderBook per symbol from snapshot/delta messages
+
+        Messages without an 'action' field are treated as full snapshots, which
+        is what the GoMarket L2 feed sends. 'update' messages are applied as
+        deltas and checked against 'prevSeqId' and 'checksum' when present.
+
+        Args:
+            depth: Number of levels per side exported to OrderBook (None for all)
+            verify_checksum: Whether to verify message checksums after each update
+        """
+        self.depth = depth
+        self.verify_checksum = verify_checksum
+        self.books: Dict[str, LocalOrderBook] = {}
+        self.stats = {
+            'snapshots': 0,
+            'deltas': 0,
+            'sequence_gaps': 0,
+            'checksum_failures': 0,
+            'invalid_messages': 0
+        }
+
+    def apply(self, data: dict) -> Optional[OrderBook]:
+        """
+        Apply a decoded message to its symbol's book
+
+        Returns:
+            The updated OrderBook, or None if the symbol needs a resync
+        """
+        symbol = data.get('symbol', '')
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = LocalOrderBook(symbol)
+
+        asks = data.get('asks', [])
+        bids = data.get('bids', [])
+        timestamp = data.get('timestamp', '')
+
+        try:
+            if data.get('action', 'snapshot') == 'snapshot':
+                book.apply_snapshot(asks, bids, data.get('seqId'), timestamp)
+                self.stats['snapshots'] += 1
+            else:
+                was_synced = book.synced
+                if not book.apply_delta(asks, bids, data.get('seqId'), data.get('prevSeqId'), timestamp):
+                    if was_synced:
+                        self.stats['sequence_gaps'] += 1
+                    return None
+                self.stats['deltas'] += 1
+        except ValueError as e:
+            # The message was not applied, so later deltas would build on a book missing it
+            logger.warning(f"Invalid message on {symbol}, resync required: {e}")
+            self.stats['invalid_messages'] += 1
+            book.synced = False
+            return None
+
+        expected = data.get('checksum')
+        if self.verify_checksum and expected is not None and book.checksum() != int(expected):
+            logger.warning(f"Checksum mismatch on {symbol}, resync required")
+            self.stats['checksum_failures'] += 1
+            book.synced = False
+            return None
+
+        return book.to_orderbook(self.depth)
+
+    def reset(self):
+        """Drop all books, e.g. before resubscribing for fresh snapshots"""
+        self.books = {}
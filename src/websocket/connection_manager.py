@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+from config import ORDERBOOK_URL_TEMPLATE
+from websocket.orderbook_client import OrderbookClient
+
+logger = logging.getLogger(__name__)
+
+# Seconds between the per-subscription stats each shard reports to the parent process
+STATS_INTERVAL = 0.2
+
+
+@dataclass(frozen=True)
+class Subscription:
+    venue: str
+    symbol: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.venue}:{self.symbol}"
+
+    def url(self, template: str = ORDERBOOK_URL_TEMPLATE) -> str:
+        return template.format(venue=self.venue.lower(), symbol=self.symbol)
+
+
+class ConnectionManager:
+    def __init__(self,
+                 callback: Callable[[dict], None],
+                 subscriptions: Sequence[Subscription] = (),
+                 url_template: str = ORDERBOOK_URL_TEMPLATE,
+                 client_factory: Callable[..., OrderbookClient] = OrderbookClient,
+                 **client_options):
+        """
+        Run many OrderbookClient subscriptions on a single asyncio event loop
+
+        Every message is tagged with its 'venue' and 'symbol' before it reaches
+        `callback`. Each subscription keeps its own client, so reconnect
+        backoff, decode timing and (in delta mode) book state stay per symbol.
+
+        Args:
+            callback: Called on the event loop thread with every decoded message
+            subscriptions: Initial (venue, symbol) subscriptions
+            url_template: Endpoint template with {venue} and {symbol} fields
+            client_factory: Builds a client from (url, callback, **client_options),
+                e.g. a ReplaySource in place of a live connection
+            **client_options: Passed to every OrderbookClient (delta_mode, max_depth,
+                sorted_levels, ...)
+        """
+        self.callback = callback
+        self.url_template = url_template
+        self.client_factory = client_factory
+        self.client_options = client_options
+        self.clients: Dict[str, OrderbookClient] = {}
+        self.metrics: Dict[str, dict] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._stopped: Optional[asyncio.Event] = None
+        self._run_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        for subscription in subscriptions:
+            self.subscribe(subscription.venue, subscription.symbol)
+
+    def subscribe(self, venue: str, symbol: str) -> Subscription:
+        """Add a subscription, connecting it right away if the loop is running"""
+        subscription = Subscription(venue, symbol)
+        if subscription.key in self.clients:
+            return subscription
+
+        metrics = {'messages': 0, 'last_message_time': 0.0}
+        client = self.client_factory(subscription.url(self.url_template),
+                                     self._tagged_callback(subscription, metrics),
+                                     **self.client_options)
+        self.clients[subscription.key] = client
+        self.metrics[subscription.key] = metrics
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self._spawn, subscription.key)
+        return subscription
+
+    def unsubscribe(self, venue: str, symbol: str):
+        """Stop and remove a subscription"""
+        key = Subscription(venue, symbol).key
+        client = self.clients.pop(key, None)
+        self.metrics.pop(key, None)
+        if client is None:
+            return
+        client.running = False
+        if self.loop is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.close(), self.loop)
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-subscription counters, backoff state and decode timing"""
+        stats = {}
+        for key, client in list(self.clients.items()):
+            decode = client.performance.get_statistics().get('decode', {})
+            stats[key] = {
+                **self.metrics.get(key, {}),
+                'connected': client.ws is not None and not client.ws.closed,
+                'reconnect_delay': client.reconnect_delay,
+                'decode_ms': decode.get('mean', 0.0)
+            }
+            if client.book_builder is not None:
+                stats[key].update(client.book_builder.stats)
+        return stats
+
+    async def run(self):
+        """Connect every subscription and run until stop() is called"""
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._run_task = asyncio.current_task()
+        for key in list(self.clients):
+            self._spawn(key)
+        await self._stopped.wait()
+
+        for client in self.clients.values():
+            await client.close()
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks = {}
+
+    def start(self) -> threading.Thread:
+        """Run the event loop on a background thread"""
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),),
+                                        name="connection-manager", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Close every connection and stop the event loop
+
+        Joins the thread from start(); a caller running run() on its own
+        thread joins that thread, and code on the loop awaits shutdown().
+        """
+        for client in self.clients.values():
+            client.running = False
+        if self.loop is not None and self._stopped is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    async def shutdown(self):
+        """Stop from a coroutine on the manager's own loop and wait until run() has closed everything"""
+        for client in self.clients.values():
+            client.running = False
+        if self._stopped is not None:
+            self._stopped.set()
+        if self._run_task is not None and self._run_task is not asyncio.current_task():
+            await asyncio.gather(self._run_task, return_exceptions=True)
+
+    def _spawn(self, key: str):
+        client = self.clients.get(key)
+        if client is None or key in self._tasks:
+            return
+        client.running = True
+        self._tasks[key] = self.loop.create_task(client.connect())
+
+    def _tagged_callback(self, subscription: Subscription, metrics: dict) -> Callable[[dict], None]:
+        def callback(data: dict):
+            data['venue'] = subscription.venue
+            data.setdefault('symbol', subscription.symbol)
+            metrics['messages'] += 1
+            metrics['last_message_time'] = time.time()
+            self.callback(data)
+        return callback
+
+
+def _run_shard(shard: int,
+               subscriptions: List[Subscription],
+               output: multiprocessing.Queue,
+               stop_event,
+               url_template: str,
+               client_options: dict):
+    """
+    Worker process entry point: one ConnectionManager for a slice of the subscriptions
+
+    Besides the messages, ('stats', shard, stats) tuples are put on `output`
+    every STATS_INTERVAL seconds and once more after the manager has stopped.
+    """
+    manager = ConnectionManager(output.put, subscriptions, url_template, **client_options)
+
+    async def run():
+        task = asyncio.create_task(manager.run())
+        while not stop_event.is_set():
+            await asyncio.sleep(STATS_INTERVAL)
+            output.put(('stats', shard, manager.stats()))
+        await manager.shutdown()
+        await task
+        output.put(('stats', shard, manager.stats()))
+
+    asyncio.run(run())
+
+
+class ShardedConnectionManager:
+    def __init__(self,
+                 callback: Callable[[dict], None],
+                 subscriptions: Sequence[Subscription],
+                 shards: Optional[int] = None,
+                 url_template: str = ORDERBOOK_URL_TEMPLATE,
+                 **client_options):
+        """
+        Spread subscriptions over several worker processes, one event loop each
+
+        Use this once a single ConnectionManager loop is saturated. Decoded
+        messages are sent back over a multiprocessing queue and `callback` is
+        called on a reader thread in this process, which also collects each
+        shard's per-subscription stats for stats().
+
+        Args:
+            callback: Called with every decoded message
+            subscriptions: (venue, symbol) subscriptions to distribute
+            shards: Number of worker processes (defaults to the CPU count)
+            url_template: Endpoint template with {venue} and {symbol} fields
+            **client_options: Passed to every OrderbookClient
+        """
+        self.callback = callback
+        self.subscriptions = list(subscriptions)
+        self.shards = max(1, min(shards or os.cpu_count() or 1, len(self.subscriptions)))
+        self.url_template = url_template
+        self.client_options = client_options
+        # Round-robin so that every shard gets a similar number of subscriptions
+        self.assignments = [self.subscriptions[shard::self.shards] for shard in range(self.shards)]
+        self.messages = 0
+        self._shard_stats: Dict[int, Dict[str, dict]] = {}
+        self._context = multiprocessing.get_context('spawn')
+        self._queue = self._context.Queue()
+        self._stop_event = self._context.Event()
+        self._closing = threading.Event()
+        self._processes = []
+        self._reader: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the worker processes and the reader thread"""
+        for shard, subscriptions in enumerate(self.assignments):
+            process = self._context.Process(
+                target=_run_shard,
+                args=(shard, subscriptions, self._queue,
+                      self._stop_event, self.url_template, self.client_options),
+                name=f"orderbook-shard-{shard}",
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+        self._reader = threading.Thread(target=self._read, name="shard-reader", daemon=True)
+        self._reader.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop every worker process, then the reader once it has drained what they sent"""
+        self._stop_event.set()
+        # The reader keeps draining meanwhile: a worker only exits once its queued messages are flushed
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._closing.set()
+        if self._reader is not None:
+            self._reader.join(timeout)
+
+    def stats(self) -> Dict[str, dict]:
+        """Latest per-subscription stats reported by every shard, each tagged with its 'shard'"""
+        stats = {}
+        for shard, shard_stats in list(self._shard_stats.items()):
+            for key, values in shard_stats.items():
+                stats[key] = {**values, 'shard': shard}
+        return stats
+
+    def _read(self):
+        while True:
+            try:
+                data = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._closing.is_set():
+                    return
+                continue
+            if isinstance(data, tuple):
+                _, shard, shard_stats = data
+                self._shard_stats[shard] = shard_stats
+                continue
+            self.messages += 1
+            try:
+                self.callback(data)
+            except Exception as e:
+                logger.error(f"Error processing sharded message: {e}")
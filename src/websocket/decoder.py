@@ -0,0 +1,154 @@
+import json
+import re
+import time
+import numpy as np
+from typing import Optional, Union
+from utils.performance import PerformanceMonitor
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib decoder
+    orjson = None
+
+# End of a flat array of [price, size] levels, e.g. `"1"]]` or `"1"] ]`
+_LEVELS_END = re.compile(r'\]\s*\]')
+_WHITESPACE = re.compile(r'[\s,]*')
+_raw_decode = json.JSONDecoder().raw_decode
+
+
+class FrameDecoder:
+    def __init__(self,
+                 max_depth: Optional[int] = None,
+                 use_fast_decoder: bool = True,
+                 monitor: Optional[PerformanceMonitor] = None,
+                 sorted_levels: bool = False):
+        """
+        Decode orderbook frames, keeping the best `max_depth` levels per side
+
+        With orjson installed the frame is decoded in C straight from str or
+        bytes. Feeds may send levels out of order, so the levels kept are
+        selected by price (a partial select, only when a side is longer than
+        `max_depth`), not by position. For a feed known to send every side
+        best-first, `sorted_levels` keeps the leading `max_depth` levels without
+        converting any prices, and the stdlib decoder then parses only those
+        levels and skips the rest of the arrays unparsed.
+
+        Args:
+            max_depth: Levels per side to keep (None keeps the full book)
+            use_fast_decoder: Use orjson when it is installed
+            monitor: Receives the per-frame decode time under 'decode'
+            sorted_levels: Trust the feed to send each side best-first
+        """
+        self.max_depth = max_depth
+        self.sorted_levels = sorted_levels
+        self.use_fast_decoder = use_fast_decoder and orjson is not None
+        self.monitor = monitor or PerformanceMonitor()
+        self.last_decode_ms = 0.0
+
+    def decode(self, message: Union[str, bytes]) -> dict:
+        """
+        Decode one frame
+
+        Raises:
+            json.JSONDecodeError: If the frame is not valid JSON
+        """
+        start_time = time.perf_counter()
+
+        if self.use_fast_decoder:
+            data = orjson.loads(message)
+            data = self._leading_levels(data) if self.sorted_levels else self._best_levels(data)
+        else:
+            if isinstance(message, (bytes, bytearray)):
+                message = message.decode()
+            if self.sorted_levels:
+                data = self._decode_stdlib(message)
+            else:
+                data = self._best_levels(json.loads(message))
+
+        self.last_decode_ms = (time.perf_counter() - start_time) * 1000
+        self.monitor.record('decode', self.last_decode_ms)
+        return data
+
+    def _leading_levels(self, data):
+        """Keep the first max_depth levels of each side of a feed that sends them best-first"""
+        if self.max_depth is not None and isinstance(data, dict):
+            for side in ('asks', 'bids'):
+                if isinstance(data.get(side), list):
+                    data[side] = data[side][:self.max_depth]
+        return data
+
+    def _best_levels(self, data):
+        """Keep the max_depth lowest asks and highest bids of each side, best first"""
+        if self.max_depth is None or not isinstance(data, dict):
+            return data
+        for side, sign in (('asks', 1.0), ('bids', -1.0)):
+            levels = data.get(side)
+            if not isinstance(levels, list) or len(levels) <= self.max_depth:
+                continue
+            try:
+                prices = sign * np.array([level[0] for level in levels], dtype=np.float64)
+            except (ValueError, TypeError, IndexError, KeyError):
+                continue  # Malformed levels are left for OrderBook.from_raw to filter
+            prices[np.isnan(prices)] = np.inf
+            best = np.argpartition(prices, self.max_depth - 1)[:self.max_depth]
+            best = best[np.argsort(prices[best], kind='stable')]
+            data[side] = [levels[i] for i in best]
+        return data
+
+    def _decode_stdlib(self, message: str) -> dict:
+        if self.max_depth is None:
+            return json.loads(message)
+
+        try:
+            # Cut both level arrays out of the frame, parse the small remainder,
+            # then parse only the leading levels of each side
+            spans = {side: self._find_levels(message, side) for side in ('asks', 'bids')}
+            head = message
+            for start, end in sorted((span for span in spans.values() if span), reverse=True):
+                head = head[:start] + '[]' + head[end:]
+            data = json.loads(head)
+            for side, span in spans.items():
+                if span:
+                    data[side] = self._parse_levels(message, span[0] + 1, span[1])
+            return data
+        except (ValueError, IndexError, KeyError, TypeError):
+            # Unexpected frame layout, decode it in full
+            return json.loads(message)
+
+    @staticmethod
+    def _find_levels(message: str, side: str):
+        """Return the (start, end) span of a side's level array, or None"""
+        key = message.find(f'"{side}"')
+        if key < 0:
+            return None
+        start = message.index('[', key)
+        first = _WHITESPACE.match(message, start + 1).end()
+        if message[first] == ']':
+            return start, first + 1
+        # Compact frames close the array with a literal `]]`, which str.find locates
+        # much faster than the whitespace-tolerant regex. Either match is only accepted
+        # if it does not run into another key (a level array holds no ':' or '{'),
+        # which happens when this side's array is spaced and a later one is compact.
+        end = message.find(']]', start)
+        if end >= 0 and not FrameDecoder._crosses_key(message, start, end):
+            return start, end + 2
+        match = _LEVELS_END.search(message, start)
+        if match is None or FrameDecoder._crosses_key(message, start, match.start()):
+            raise ValueError(f"Cannot delimit the {side} array")
+        return start, match.end()
+
+    @staticmethod
+    def _crosses_key(message: str, start: int, end: int) -> bool:
+        return message.find(':', start, end) >= 0 or message.find('{', start, end) >= 0
+
+    def _parse_levels(self, message: str, pos: int, end: int) -> list:
+        levels = []
+        while len(levels) < self.max_depth:
+            pos = _WHITESPACE.match(message, pos).end()
+            if pos >= end - 1:
+                break
+            level, pos = _raw_decode(message, pos)
+            if not isinstance(level, list) or len(level) < 2:
+                raise ValueError("Levels must be [price, size, ...] arrays")
+            levels.append(level)
+        return levels
@@ -6,12 +6,40 @@ import logging
 import websockets
 import time
 from typing import Optional, Callable
+from utils.performance import PerformanceMonitor
+from websocket.book_builder import BookBuilder
+from websocket.decoder import FrameDecoder
+from websocket.recorder import FrameRecorder
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class OrderbookClient:
-    def __init__(self, url: str, callback: Callable):
+    def __init__(self,
+                 url: str,
+                 callback: Callable,
+                 delta_mode: bool = False,
+                 max_depth: Optional[int] = None,
+                 use_fast_decoder: bool = True,
+                 recorder: Optional[FrameRecorder] = None,
+                 sorted_levels: bool = False):
+        """
+        Initialize the orderbook client
+        
+        Args:
+            url: WebSocket endpoint
+            callback: Called with every decoded message
+            delta_mode: Maintain a persistent book per symbol from snapshot and
+                delta messages and attach it to each message as data['book'].
+                That book is sorted and checked against sequence numbers and
+                checksums, but skips OrderBook.from_raw's gap/outlier filter
+            max_depth: Levels per side handed to the callback (None for the full book).
+                In delta mode every change is applied and only the exported book is limited
+            use_fast_decoder: Decode with orjson when it is installed
+            recorder: Appends every raw frame to a replayable log
+            sorted_levels: The feed sends each side best-first, so max_depth keeps the
+                leading levels without parsing or price-sorting the rest (see FrameDecoder)
+        """
         self.url = url
         self.callback = callback
         self.running = True
@@ -20,6 +48,13 @@ class OrderbookClient:
         self.last_message_time = 0
         self.heartbeat_interval = 30  # seconds
         self.ws: Optional[websockets.WebSocketClientProtocol] = None
+        self.performance = PerformanceMonitor()
+        self.decoder = FrameDecoder(max_depth=None if delta_mode else max_depth,
+                                    use_fast_decoder=use_fast_decoder,
+                                    monitor=self.performance,
+                                    sorted_levels=sorted_levels)
+        self.book_builder = BookBuilder(depth=max_depth) if delta_mode else None
+        self.recorder = recorder
 
     async def connect(self):
         while self.running:
@@ -40,15 +75,10 @@ class OrderbookClient:
                             message = await asyncio.wait_for(ws.recv(), timeout=self.heartbeat_interval)
                             self.last_message_time = time.time()
                             
-                            try:
-                                data = json.loads(message)
-                                self.callback(data)
-                            except json.JSONDecodeError as e:
-                                logger.error(f"Failed to parse message: {e}")
-                                continue
-                            except Exception as e:
-                                logger.error(f"Error processing message: {e}")
-                                continue
+                            if not self.handle_message(message):
+                                # Sequence gap or checksum mismatch: resubscribe for a fresh snapshot
+                                logger.warning("Orderbook out of sync, reconnecting to resync")
+                                break
 
                         except asyncio.TimeoutError:
                             # Check if we've exceeded the heartbeat interval
@@ -69,6 +99,32 @@ class OrderbookClient:
                 # Exponential backoff with max delay
                 self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
 
+    def handle_message(self, message) -> bool:
+        """
+        Record, decode and dispatch one raw frame
+        
+        Returns:
+            False if the delta-mode book lost sync and needs a fresh snapshot
+        """
+        if self.recorder is not None:
+            self.recorder.write(message, self.last_message_time)
+            
+        try:
+            data = self.decoder.decode(message)
+            data['decode_latency'] = self.decoder.last_decode_ms
+            if self.book_builder is not None:
+                book = self.book_builder.apply(data)
+                if book is None:
+                    self.book_builder.reset()
+                    return False
+                data['book'] = book
+            self.callback(data)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse message: {e}")
+        except Exception as e:
+            logger.error(f"Error processing message: {e}")
+        return True
+
     async def close(self):
         """Gracefully close the WebSocket connection"""
         self.running = False
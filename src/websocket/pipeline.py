@@ -0,0 +1,79 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+from utils.conflation import ConflationBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class ComputePipeline:
+    def __init__(self, process: Callable[[dict], None], max_symbols: int = 64):
+        """
+        Receive -> decode -> conflation slot per symbol -> compute worker
+
+        `submit` is the OrderbookClient callback and only parks the decoded
+        message in its symbol's slot, so the receive loop never waits on model
+        computation. A single worker thread takes the newest message per symbol
+        and runs `process` on it; older frames for the same symbol that arrived
+        meanwhile are conflated away.
+
+        Args:
+            process: Called on the worker thread with each message to compute
+            max_symbols: Maximum number of symbols with a pending message
+        """
+        self.process = process
+        self.buffer = ConflationBuffer(max_keys=max_symbols)
+        self.running = False
+        self.processed = 0
+        self.errors = 0
+        self.max_staleness_ms = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, data: dict):
+        """Hand a decoded message to the compute worker"""
+        data['receive_time'] = time.perf_counter()
+        self.buffer.put((data.get('venue', ''), data.get('symbol', '')), data)
+
+    def start(self):
+        """Start the compute worker thread"""
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="compute-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Stop the worker after its current message"""
+        self.running = False
+        self.buffer.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def stats(self) -> dict:
+        """Pipeline counters, including conflated and dropped frames"""
+        return {
+            **self.buffer.stats,
+            'pending': len(self.buffer),
+            'processed': self.processed,
+            'errors': self.errors,
+            'max_staleness_ms': self.max_staleness_ms
+        }
+
+    def _run(self):
+        while self.running:
+            entry = self.buffer.take(timeout=0.5)
+            if entry is None:
+                continue
+            _, data = entry
+
+            # Time the message waited in its slot before compute started
+            staleness = (time.perf_counter() - data['receive_time']) * 1000
+            data['queue_latency'] = staleness
+            self.max_staleness_ms = max(self.max_staleness_ms, staleness)
+
+            try:
+                self.process(data)
+                self.processed += 1
+            except Exception as e:
+                logger.error(f"Error in compute worker: {e}")
+                self.errors += 1
@@ -0,0 +1,71 @@
+import struct
+import threading
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+# File layout: MAGIC, then records of RECORD_HEADER (receive time, payload length) + payload
+MAGIC = b'OBFRAME1'
+RECORD_HEADER = struct.Struct('<dI')
+
+
+class FrameRecorder:
+    def __init__(self, path: str):
+        """
+        Append raw orderbook frames with their receive timestamps to a binary log
+
+        The log is append-only: reopening an existing file continues it, and a
+        crash can only truncate the last record, which the reader skips.
+
+        Args:
+            path: Log file path
+        """
+        self.path = path
+        self.frames = 0
+        self._lock = threading.Lock()
+        self._file: Optional[BinaryIO] = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+    def write(self, message: Union[str, bytes], receive_time: float):
+        """Append one frame"""
+        payload = message.encode() if isinstance(message, str) else bytes(message)
+        with self._lock:
+            self._file.write(RECORD_HEADER.pack(receive_time, len(payload)))
+            self._file.write(payload)
+            self.frames += 1
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "FrameRecorder":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_frames(path: str) -> Iterator[Tuple[float, bytes]]:
+    """
+    Iterate over (receive_time, payload) records of a frame log
+
+    Raises:
+        ValueError: If the file is not a frame log
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an orderbook frame log")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            receive_time, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return  # Truncated final record
+            yield receive_time, payload
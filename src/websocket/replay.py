@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+from websocket.orderbook_client import OrderbookClient
+from websocket.recorder import read_frames
+
+logger = logging.getLogger(__name__)
+
+
+class ReplaySource(OrderbookClient):
+    def __init__(self,
+                 path: str,
+                 callback: Callable,
+                 speed: Optional[float] = 1.0,
+                 repeat: bool = False,
+                 **client_options):
+        """
+        Stand-in for OrderbookClient that feeds recorded frames to the same callback
+
+        Frames go through the same decode / delta-book / callback path as live
+        frames, so results are reproducible without a network connection.
+
+        Args:
+            path: Frame log written by FrameRecorder
+            callback: Called with every decoded message
+            speed: Replay speed relative to the recording (1.0 real time,
+                2.0 twice as fast); None or 0 replays as fast as possible
+            repeat: Start over from the first frame when the log is exhausted
+            **client_options: Passed to OrderbookClient (delta_mode, max_depth, ...)
+        """
+        super().__init__(path, callback, **client_options)
+        self.speed = speed
+        self.repeat = repeat
+        self.frames_replayed = 0
+        self.finished = False
+
+    async def connect(self):
+        """Replay the log, pacing frames by their recorded receive times"""
+        while self.running:
+            first_receive_time = None
+            start_time = time.perf_counter()
+
+            for receive_time, payload in read_frames(self.url):
+                if not self.running:
+                    break
+                if self.speed:
+                    if first_receive_time is None:
+                        first_receive_time = receive_time
+                    delay = (receive_time - first_receive_time) / self.speed - (time.perf_counter() - start_time)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif self.frames_replayed % 100 == 0:
+                    # Let other subscriptions on the loop run at maximum speed
+                    await asyncio.sleep(0)
+
+                self.last_message_time = receive_time
+                if not self.handle_message(payload):
+                    logger.warning("Replayed orderbook lost sync, waiting for the next snapshot")
+                self.frames_replayed += 1
+
+            if not self.repeat:
+                break
+
+        self.running = False
+        self.finished = True
+
+    def run(self):
+        """Replay synchronously on a fresh event loop"""
+        asyncio.run(self.connect())
@@ -0,0 +1,77 @@
+import pytest
+from websocket.book_builder import BookBuilder, LocalOrderBook
+
+SNAPSHOT = {
+    'symbol': 'BTC-USDT-SWAP',
+    'action': 'snapshot',
+    'seqId': 10,
+    'asks': [["100.5", "2"], ["101.0", "1"]],
+    'bids': [["100.0", "1.5"], ["99.5", "2.5"]]
+}
+
+def test_delta_updates_book():
+    builder = BookBuilder()
+    builder.apply(SNAPSHOT)
+    book = builder.apply({
+        'symbol': 'BTC-USDT-SWAP',
+        'action': 'update',
+        'seqId': 11,
+        'prevSeqId': 10,
+        'asks': [["100.5", "0"], ["100.8", "3"]],
+        'bids': [["100.2", "1"]]
+    })
+    
+    assert book.ask_prices.tolist() == [100.8, 101.0]
+    assert book.ask_sizes.tolist() == [3.0, 1.0]
+    assert book.bid_prices.tolist() == [100.2, 100.0, 99.5]
+    assert builder.stats['deltas'] == 1
+
+def test_sequence_gap_requires_resync():
+    builder = BookBuilder()
+    builder.apply(SNAPSHOT)
+    gap = {'symbol': 'BTC-USDT-SWAP', 'action': 'update', 'seqId': 13, 'prevSeqId': 12,
+           'asks': [], 'bids': []}
+    
+    assert builder.apply(gap) is None
+    assert builder.stats['sequence_gaps'] == 1
+    # Still out of sync until the next snapshot
+    assert builder.apply(dict(gap, seqId=14, prevSeqId=13)) is None
+    assert builder.apply(SNAPSHOT) is not None
+
+def test_checksum_mismatch_requires_resync():
+    local = LocalOrderBook()
+    local.apply_snapshot(SNAPSHOT['asks'], SNAPSHOT['bids'])
+    builder = BookBuilder()
+    
+    assert builder.apply(dict(SNAPSHOT, checksum=local.checksum())) is not None
+    assert builder.apply(dict(SNAPSHOT, checksum=local.checksum() + 1)) is None
+    assert builder.stats['checksum_failures'] == 1
+
+def test_export_is_reused_until_a_change_reaches_the_exported_depth():
+    builder = BookBuilder(depth=1)
+    first = builder.apply(SNAPSHOT)
+    delta = {'symbol': 'BTC-USDT-SWAP', 'action': 'update', 'asks': [["101.5", "4"]], 'bids': [["99.5", "0"]]}
+    deep = builder.apply(delta)
+    
+    assert deep.ask_prices is first.ask_prices and deep.bid_sizes is first.bid_sizes
+    assert not deep.ask_prices.flags.writeable
+    
+    touch = builder.apply(dict(delta, asks=[["100.5", "5"]], bids=[]))
+    assert touch.ask_sizes.tolist() == [5.0]
+    assert touch.bid_prices is first.bid_prices
+    assert builder.books['BTC-USDT-SWAP'].to_orderbook().ask_prices.tolist() == [100.5, 101.0, 101.5]
+
+def test_malformed_delta_leaves_the_book_untouched_and_requires_resync():
+    builder = BookBuilder()
+    builder.apply(SNAPSHOT)
+    local = builder.books['BTC-USDT-SWAP']
+    checksum = local.checksum()
+    bad = {'symbol': 'BTC-USDT-SWAP', 'action': 'update', 'seqId': 11, 'prevSeqId': 10,
+           'asks': [["100.5", "0"], ["100.8", "3"]], 'bids': [["100.2", "1"], ["oops", "1"]]}
+    
+    assert builder.apply(bad) is None
+    assert builder.stats['invalid_messages'] == 1
+    # No level of the bad delta was applied and the sequence did not advance
+    assert local.checksum() == checksum and local.seq_id == 10
+    assert not local.synced
+    assert builder.apply(dict(bad, seqId=12, prevSeqId=11, bids=[])) is None
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from config import DEFAULT_ETA, DEFAULT_GAMMA
+from engine import TradingEngine
+from models.calibration import ImpactCalibration, ImpactParameters, calibrate, calibrate_store
+from models.orderbook import OrderBook
+from utils.synthetic import SyntheticBookGenerator
+from utils.tick_store import TickStore
+
+START = 1_700_000_000.0  # 22:13:20 UTC
+
+def make_store(path, symbol, seed, n=600):
+    generator = SyntheticBookGenerator(depth=20, volatility=3e-4, level_size=2.0, symbol=symbol, seed=seed)
+    store = TickStore(str(path), depth=20, symbol=symbol)
+    books = list(generator.books(n))
+    for i, book in enumerate(books):
+        store.append(book, timestamp=START + i * 12.0, sequence=i)
+    store.flush()
+    return books
+
+def test_batches_and_workers_give_the_same_calibration(tmp_path):
+    make_store(tmp_path / 'BTC', 'BTC-USDT-SWAP', 1)
+    make_store(tmp_path / 'ETH', 'ETH-USDT-SWAP', 2)
+    
+    whole = calibrate_store(str(tmp_path / 'BTC'))
+    batched = calibrate_store(str(tmp_path / 'BTC'), batch_size=37)
+    assert np.allclose(whole.eta, batched.eta, equal_nan=True)
+    assert np.allclose(whole.gamma, batched.gamma, equal_nan=True)
+    
+    # 600 snapshots 12s apart cover the 22:00 and 23:00 buckets, and 00:00 after midnight
+    assert whole.samples.sum() == 600 and np.flatnonzero(whole.samples).tolist() == [0, 22, 23]
+    assert np.isnan(whole.eta[5]) and (whole.eta[[0, 22, 23]] > 0).all()
+    
+    parallel = calibrate([str(tmp_path / 'BTC'), str(tmp_path / 'ETH')], max_workers=2)
+    assert set(parallel.symbols) == {'BTC-USDT-SWAP', 'ETH-USDT-SWAP'}
+    assert np.allclose(parallel.symbols['BTC-USDT-SWAP'].gamma, whole.gamma, equal_nan=True)
+
+def test_permanent_impact_is_the_order_flow_imbalance_slope(tmp_path):
+    books = make_store(tmp_path, 'BTC-USDT-SWAP', 3, n=200)
+    xy = xx = 0.0
+    for previous, book in zip(books, books[1:]):
+        imbalance = ((book.best_bid >= previous.best_bid) * book.bid_sizes[0]
+                     - (book.best_bid <= previous.best_bid) * previous.bid_sizes[0]
+                     - (book.best_ask <= previous.best_ask) * book.ask_sizes[0]
+                     + (book.best_ask >= previous.best_ask) * previous.ask_sizes[0])
+        xy += imbalance * (book.mid_price - previous.mid_price)
+        xx += imbalance ** 2
+    
+    calibrated = calibrate_store(str(tmp_path), bucket_seconds=86400.0)
+    assert xy > 0 and calibrated.gamma[0] == pytest.approx(xy / xx)
+
+def test_engine_prices_impact_with_the_cached_calibration(tmp_path, monkeypatch):
+    path = str(tmp_path / 'calibration.json')
+    eta = np.full(24, 0.5)
+    eta[3] = np.nan  # Uncalibrated bucket
+    ImpactCalibration({'BTC-USDT-SWAP': ImpactParameters(
+        'BTC-USDT-SWAP', 3600.0, eta, np.full(24, 0.2), np.ones(24, dtype=np.int64), 0.0)}).save(path)
+    
+    loaded = ImpactCalibration.load(path)
+    assert loaded.parameters('BTC-USDT-SWAP', 3 * 3600.0 + 5) is None
+    assert loaded.parameters('BTC-USDT-SWAP', 5 * 3600.0) == (0.5, 0.2)
+    assert loaded.parameters('ETH-USDT-SWAP', 0.0) is None
+    
+    book = OrderBook.from_levels([(100.5, 1.0)], [(100.0, 1.0)], symbol='BTC-USDT-SWAP')
+    default = TradingEngine(subscriptions=[], background_training=False, impact_calibration=None)
+    engine = TradingEngine(subscriptions=[], background_training=False, impact_calibration=path)
+    monkeypatch.setattr('engine.time.time', lambda: START + 5 * 3600.0)  # 03:13 UTC, uncalibrated
+    assert engine.calculate_market_impact(book, 10.0, 0.02) == default.calculate_market_impact(book, 10.0, 0.02)
+    uncalibrated = engine.compute_metrics(book)['impact']
+    monkeypatch.setattr('engine.time.time', lambda: START + 7 * 3600.0)  # 05:13 UTC
+    assert engine.calculate_market_impact(book, 10.0, 0.02) > default.calculate_market_impact(book, 10.0, 0.02)
+    # Metrics of the same book are not reused across calibration buckets
+    assert engine.compute_metrics(book)['impact'] == engine.calculate_market_impact(book, 100.0, 0.02) > uncalibrated
+    assert engine._impact_coefficients(book) == (0.5, 0.2)
+    # The shared model keeps its defaults; calibrated values are only passed per call
+    assert (engine.market_impact_model.eta, engine.market_impact_model.gamma) == (DEFAULT_ETA, DEFAULT_GAMMA)
+
+def test_engine_uses_the_snapshot_time_and_calibrates_execution_schedules(tmp_path, monkeypatch):
+    path = str(tmp_path / 'calibration.json')
+    eta = np.full(24, 0.5)
+    eta[3] = np.nan
+    ImpactCalibration({'BTC-USDT-SWAP': ImpactParameters(
+        'BTC-USDT-SWAP', 3600.0, eta, np.full(24, 0.2), np.ones(24, dtype=np.int64), 0.0)}).save(path)
+    engine = TradingEngine(subscriptions=[], background_training=False, impact_calibration=path)
+    monkeypatch.setattr('engine.time.time', lambda: START + 7 * 3600.0)  # Calibrated wall-clock bucket
+    
+    def book(timestamp):
+        return OrderBook.from_levels([(100.5, 1.0)], [(100.0, 1.0)], timestamp=timestamp, symbol='BTC-USDT-SWAP')
+    
+    # Recorded at 03:xx UTC in ISO, epoch seconds and epoch milliseconds: the uncalibrated bucket
+    for timestamp in ('2025-05-04T03:39:13Z', str(START + 5 * 3600.0),
+                      str(int((START + 5 * 3600.0) * 1000))):
+        assert engine._impact_coefficients(book(timestamp)) == (DEFAULT_ETA, DEFAULT_GAMMA)
+    assert engine._impact_coefficients(book('2025-05-04T05:39:13Z')) == (0.5, 0.2)
+    assert engine._impact_coefficients(book('')) == (0.5, 0.2)
+    
+    calibrated = engine.plan_execution(book('2025-05-04T05:39:13Z'), 10.0)
+    expected = engine.market_impact_model.plan_execution(10.0, 100.25, 1.0, engine.parameters.volatility,
+                                                         eta=0.5, gamma=0.2)
+    default = engine.plan_execution(book('2025-05-04T03:39:13Z'), 10.0)
+    assert calibrated.expected_cost == pytest.approx(expected.expected_cost)
+    assert calibrated.expected_cost != pytest.approx(default.expected_cost)
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+import time
+import pickle
+import websockets
+from engine import TradingEngine
+from models.orderbook import OrderBook
+from websocket.connection_manager import ConnectionManager, ShardedConnectionManager, Subscription
+
+def serve_books(port_holder, ready, stop):
+    async def handler(ws, path):
+        symbol = path.rsplit('/', 1)[-1]
+        try:
+            while True:
+                await ws.send(json.dumps({'symbol': symbol, 'asks': [["101", "1"]], 'bids': [["100", "1"]]}))
+                await asyncio.sleep(0.01)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+    
+    async def main():
+        async with websockets.serve(handler, '127.0.0.1', 0) as server:
+            port_holder.append(server.sockets[0].getsockname()[1])
+            ready.set()
+            while not stop.is_set():
+                await asyncio.sleep(0.05)
+    
+    asyncio.run(main())
+
+def test_manager_runs_subscriptions_on_one_loop():
+    port_holder, ready, stop = [], threading.Event(), threading.Event()
+    server = threading.Thread(target=serve_books, args=(port_holder, ready, stop), daemon=True)
+    server.start()
+    ready.wait(5)
+    
+    received = []
+    manager = ConnectionManager(received.append,
+                                url_template=f"ws://127.0.0.1:{port_holder[0]}/{{venue}}/{{symbol}}")
+    manager.subscribe('OKX', 'BTC-USDT-SWAP')
+    manager.subscribe('OKX', 'ETH-USDT-SWAP')
+    manager.start()
+    
+    deadline = time.time() + 5
+    while time.time() < deadline and len({d['symbol'] for d in received}) < 2:
+        time.sleep(0.05)
+    stats = manager.stats()
+    manager.stop()
+    stop.set()
+    
+    assert {d['symbol'] for d in received} == {'BTC-USDT-SWAP', 'ETH-USDT-SWAP'}
+    assert all(d['venue'] == 'OKX' for d in received)
+    assert stats['OKX:BTC-USDT-SWAP']['messages'] > 0
+    assert not manager._thread.is_alive()
+
+def test_sharded_manager_splits_subscriptions_and_aggregates_stats():
+    port_holder, ready, stop = [], threading.Event(), threading.Event()
+    server = threading.Thread(target=serve_books, args=(port_holder, ready, stop), daemon=True)
+    server.start()
+    ready.wait(5)
+    
+    received = []
+    subscriptions = [Subscription('OKX', f"SYM{i}-USDT-SWAP") for i in range(3)]
+    manager = ShardedConnectionManager(received.append, subscriptions, shards=2,
+                                       url_template=f"ws://127.0.0.1:{port_holder[0]}/{{venue}}/{{symbol}}")
+    assert manager.assignments == [subscriptions[0::2], subscriptions[1::2]]
+    manager.start()
+    
+    deadline = time.time() + 30
+    while time.time() < deadline and len(manager.stats()) < 3:
+        time.sleep(0.1)
+    manager.stop()
+    stop.set()
+    stats = manager.stats()
+    
+    assert {d['symbol'] for d in received} == {s.symbol for s in subscriptions}
+    assert {key: values['shard'] for key, values in stats.items()} == \
+        {'OKX:SYM0-USDT-SWAP': 0, 'OKX:SYM1-USDT-SWAP': 1, 'OKX:SYM2-USDT-SWAP': 0}
+    # The final stats are sent after each shard's last message, so the counts add up
+    assert sum(values['messages'] for values in stats.values()) == manager.messages == len(received)
+    assert not any(process.is_alive() for process in manager._processes)
+    assert all(process.exitcode == 0 for process in manager._processes)
+    assert not manager._reader.is_alive()
+
+def test_engine_runs_sharded_connections():
+    port_holder, ready, stop = [], threading.Event(), threading.Event()
+    server = threading.Thread(target=serve_books, args=(port_holder, ready, stop), daemon=True)
+    server.start()
+    ready.wait(5)
+    
+    subscriptions = [Subscription('OKX', 'BTC-USDT-SWAP'), Subscription('OKX', 'ETH-USDT-SWAP')]
+    engine = TradingEngine(subscriptions=subscriptions, background_training=False, shards=2,
+                           url_template=f"ws://127.0.0.1:{port_holder[0]}/{{venue}}/{{symbol}}")
+    received = []
+    engine.add_listener(received.append)
+    assert isinstance(engine.connection_manager, ShardedConnectionManager)
+    engine.start()
+    
+    deadline = time.time() + 30
+    while time.time() < deadline and len({d['symbol'] for d in received}) < 2:
+        time.sleep(0.1)
+    engine.stop()
+    stop.set()
+    
+    assert {d['symbol'] for d in received} == {'BTC-USDT-SWAP', 'ETH-USDT-SWAP'}
+    assert engine.performance_metrics['processed_messages'] > 0
+    assert not any(process.is_alive() for process in engine.connection_manager._processes)
+
+def test_unpickled_books_get_a_version_of_this_process():
+    book = OrderBook.from_levels([(101.0, 1.0)], [(100.0, 2.0)], timestamp='t', symbol='X')
+    copy = pickle.loads(pickle.dumps(book))
+    assert copy.version > book.version
+    assert copy.asks == book.asks and copy.bids == book.bids and (copy.timestamp, copy.symbol) == ('t', 'X')
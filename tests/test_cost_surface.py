@@ -0,0 +1,51 @@
+import json
+import numpy as np
+import pytest
+from engine import TradingEngine, SimulationParameters
+from models.fee_calculator import FeeCalculator
+from utils.synthetic import SyntheticBookGenerator
+
+@pytest.mark.parametrize("trained", [False, True])
+def test_grid_matches_scalar_metrics(trained):
+    engine = TradingEngine(subscriptions=[])
+    generator = SyntheticBookGenerator(depth=20, seed=6)
+    if trained:
+        for book in generator.books(30):
+            engine.slippage_model.update_book(book, 100.0)
+    book = generator.next_book()
+    
+    quantities = np.array([10.0, 100.0, 1000.0])
+    tiers = np.array([1, 5, 9])
+    surface = engine.compute_cost_surface(book, quantities, ['buy', 'sell'], [0.01, 0.05], tiers, grid=True)
+    assert surface.shape == (3, 2, 2, 3)
+    
+    for i, quantity in enumerate(quantities):
+        for k, tier in enumerate(tiers):
+            parameters = SimulationParameters(quantity=quantity, volatility=0.05, fee_tier=int(tier))
+            metrics = engine.compute_metrics(book, parameters)
+            assert surface.net_cost[i, 0, 1, k] == pytest.approx(metrics['net_cost'])
+            assert surface.slippage[i, 0, 1, k] == pytest.approx(metrics['slippage'])
+
+def test_paired_orders_broadcast_elementwise():
+    engine = TradingEngine(subscriptions=[])
+    book = SyntheticBookGenerator(depth=20, seed=7).next_book()
+    surface = engine.compute_cost_surface(book, [1.0, 2.0, 3.0], [1, -1, 1], fee_tiers=[1, 2, 3])
+    assert surface.shape == (3,)
+    assert surface.fees[1] == pytest.approx(2.0 * book.mid_price * 0.09 / 100)
+    with pytest.raises(ValueError):
+        engine.compute_cost_surface(book, [1.0], fee_tiers=[10])
+    with pytest.raises(ValueError):
+        engine.compute_cost_surface(book, [1.0], sides=['hold'])
+
+def test_fees_use_the_instrument_schedule(tmp_path):
+    path = tmp_path / "fees.json"
+    path.write_text(json.dumps({"OKX": {
+        "default": [{"min_volume": 0, "maker_fee": 0.1, "taker_fee": 0.2}],
+        "BTC-USDT-SWAP": [{"min_volume": 0, "maker_fee": 0.01, "taker_fee": 0.05}],
+    }}))
+    engine = TradingEngine(subscriptions=[])
+    engine.fee_calculator = engine.cost_surface.fee_calculator = FeeCalculator(schedule_file=str(path))
+    book = SyntheticBookGenerator(depth=20, seed=8, symbol='BTC-USDT-SWAP').next_book()
+    surface = engine.compute_cost_surface(book, [1.0])
+    assert surface.fees[0] == pytest.approx(engine.compute_metrics(book, SimulationParameters(quantity=1.0))['fees'])
+    assert surface.fees[0] == pytest.approx(engine.fee_calculator.book_price(book) * 0.05 / 100)
@@ -0,0 +1,67 @@
+import json
+import pytest
+from websocket.decoder import FrameDecoder
+from websocket.orderbook_client import OrderbookClient
+
+FRAME = json.dumps({
+    "timestamp": "2025-05-04T10:39:13Z",
+    "exchange": "OKX",
+    "symbol": "BTC-USDT-SWAP",
+    "asks": [[f"{95445.5 + i * 0.1:.1f}", f"{i + 1}.5"] for i in range(50)],
+    "bids": [[f"{95445.4 - i * 0.1:.1f}", f"{i + 2}.0"] for i in range(50)]
+})
+
+@pytest.mark.parametrize("use_fast_decoder", [False, True])
+def test_depth_limited_decode_matches_full_decode(use_fast_decoder):
+    decoder = FrameDecoder(max_depth=5, use_fast_decoder=use_fast_decoder)
+    data = decoder.decode(FRAME)
+    expected = json.loads(FRAME)
+    
+    assert data['symbol'] == expected['symbol']
+    assert data['asks'] == expected['asks'][:5]
+    assert data['bids'] == expected['bids'][:5]
+    assert decoder.monitor.get_statistics()['decode']['mean'] >= 0
+
+def test_depth_limited_decode_handles_empty_side():
+    decoder = FrameDecoder(max_depth=5, use_fast_decoder=False)
+    data = decoder.decode('{"asks": [], "bids": [["1", "2"]], "symbol": "X"}')
+    
+    assert data == {"asks": [], "bids": [["1", "2"]], "symbol": "X"}
+
+@pytest.mark.parametrize("use_fast_decoder", [False, True])
+def test_depth_limited_decode_keeps_the_best_levels_of_unsorted_sides(use_fast_decoder):
+    frame = json.loads(FRAME)
+    frame['asks'] = frame['asks'][::-1]
+    frame['bids'] = frame['bids'][10:] + frame['bids'][:10]
+    data = FrameDecoder(max_depth=5, use_fast_decoder=use_fast_decoder).decode(json.dumps(frame))
+    expected = json.loads(FRAME)
+    
+    assert data['asks'] == expected['asks'][:5]
+    assert data['bids'] == expected['bids'][:5]
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_sorted_levels_decode_handles_spaced_frames(indent):
+    frame = json.loads(FRAME)
+    # Bids spaced out and sent before compact asks, so the first `]]` closes the wrong side
+    spaced = '{"symbol": "BTC-USDT-SWAP", "bids": %s, "asks": %s}' % (
+        json.dumps(frame['bids'][:8], indent=indent), json.dumps(frame['asks'][:8], separators=(',', ':')))
+    decoder = FrameDecoder(max_depth=5, use_fast_decoder=False, sorted_levels=True)
+    data = decoder.decode(spaced)
+    
+    assert data['asks'] == frame['asks'][:5]
+    assert data['bids'] == frame['bids'][:5]
+    assert decoder.decode(json.dumps(frame, indent=2))['bids'] == frame['bids'][:5]
+
+@pytest.mark.parametrize("use_fast_decoder", [False, True])
+def test_client_passes_sorted_levels_to_its_decoder(use_fast_decoder):
+    frame = json.loads(FRAME)
+    # Levels past the requested depth are never looked at, so they need not even be valid
+    frame['asks'] = frame['asks'][:3] + [["not a price", "1"]]
+    received = []
+    client = OrderbookClient("ws://unused", received.append, max_depth=3,
+                             use_fast_decoder=use_fast_decoder, sorted_levels=True)
+    
+    assert client.decoder.sorted_levels
+    assert client.handle_message(json.dumps(frame))
+    assert received[0]['asks'] == frame['asks'][:3]
+    assert received[0]['bids'] == frame['bids'][:3]
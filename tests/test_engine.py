@@ -0,0 +1,53 @@
+import pytest
+from cli import main as cli_main
+from engine import TradingEngine, SimulationParameters
+from models.orderbook import OrderBook
+
+MESSAGE = {
+    'symbol': 'BTC-USDT-SWAP',
+    'timestamp': '2025-05-04T10:39:13Z',
+    'asks': [["100.5", "2"], ["101.0", "1"]],
+    'bids': [["100.0", "1.5"], ["99.5", "2.5"]]
+}
+
+def test_engine_processes_and_prices_without_ui():
+    engine = TradingEngine(SimulationParameters(quantity=1.0), subscriptions=[])
+    received = []
+    engine.add_listener(received.append)
+    
+    engine.process_orderbook_data(dict(MESSAGE))
+    metrics = engine.compute_metrics(received[0]['book'])
+    
+    assert engine.performance_metrics['processed_messages'] == 1
+    assert metrics['fees'] == pytest.approx(100.25 * 0.10 / 100)
+    assert metrics['net_cost'] == pytest.approx(metrics['slippage'] + metrics['fees'] + metrics['impact'])
+    assert 0 <= metrics['maker_taker'] <= 1
+
+def test_parameters_are_validated():
+    with pytest.raises(ValueError):
+        SimulationParameters(quantity=0)
+    with pytest.raises(ValueError):
+        SimulationParameters(fee_tier=0)
+    # The highest tier comes from the fee schedule
+    engine = TradingEngine(subscriptions=[])
+    engine.set_parameters(SimulationParameters(fee_tier=9))
+    with pytest.raises(ValueError):
+        engine.set_parameters(SimulationParameters(fee_tier=10))
+    assert engine.parameters.fee_tier == 9
+    assert SimulationParameters.from_mapping({'quantity': 5, 'symbols': ['X']}).quantity == 5
+
+def test_rolling_volume_sets_the_fee_tier_when_none_is_given():
+    engine = TradingEngine(SimulationParameters(quantity=1.0, fee_tier=None), subscriptions=[])
+    book = OrderBook.from_raw(MESSAGE['asks'], MESSAGE['bids'], symbol=MESSAGE['symbol'])
+    assert engine.fee_tier(book) == 1
+    assert engine.compute_metrics(book)['fees'] == pytest.approx(100.25 * 0.10 / 100)
+    
+    engine.record_fill(600.0, 100.0)  # 60k USD: tier 2
+    assert engine.fee_tier(book) == 2
+    assert engine.compute_metrics(book)['fees'] == pytest.approx(100.25 * 0.09 / 100)
+    assert engine.compute_cost_surface(book, [1.0]).fees[0] == pytest.approx(100.25 * 0.09 / 100)
+
+def test_cli_rejects_invalid_parameters(tmp_path):
+    assert cli_main(['--fee-tier', '10', '--output', str(tmp_path / 'out.jsonl')]) == 2
+    # Recorders and replay sources cannot be sent to connection worker processes
+    assert cli_main(['--shards', '2', '--replay', str(tmp_path / 'frames.bin')]) == 2
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from models.execution import walk_book
+from models.orderbook import OrderBook
+from utils.synthetic import SyntheticBookGenerator
+
+def scalar_fill(levels, size):
+    """Reference: consume levels one by one"""
+    remaining, cost, used = size, 0.0, 0
+    for price, qty in levels:
+        if remaining <= 0:
+            break
+        take = min(qty, remaining)
+        cost += take * price
+        remaining -= take
+        used += 1
+    filled = size - remaining
+    return filled, cost / filled if filled else np.nan, used, remaining
+
+def test_matches_level_by_level_fills():
+    book = SyntheticBookGenerator(depth=30, seed=5).next_book()
+    sizes = np.concatenate(([0.0], np.linspace(0.1, book.total_ask_volume * 1.2, 57), [book.bid_depth[3]]))
+    curve = walk_book(book, sizes)
+    
+    for side, levels in ((curve.buy, book.asks), (curve.sell, book.bids)):
+        for i, size in enumerate(sizes):
+            filled, vwap, used, leftover = scalar_fill(levels, size)
+            assert side.filled[i] == pytest.approx(filled)
+            assert side.levels[i] == used
+            assert side.leftover[i] == pytest.approx(leftover, abs=1e-9)
+            if filled:
+                assert side.vwap[i] == pytest.approx(vwap)
+            else:
+                assert np.isnan(side.vwap[i])
+
+def test_slippage_is_positive_away_from_mid():
+    book = OrderBook.from_levels([(101, 1), (102, 1)], [(99, 1), (98, 1)])
+    curve = walk_book(book, [1.0, 2.0, 3.0])
+    assert curve.buy.vwap.tolist() == [101.0, 101.5, 101.5]
+    assert curve.sell.slippage.tolist() == pytest.approx([0.01, 0.015, 0.015])
+    assert curve.buy.leftover.tolist() == [0.0, 0.0, 1.0]
+    with pytest.raises(ValueError):
+        walk_book(book, [-1.0])
@@ -0,0 +1,76 @@
+import numpy as np
+from engine import TradingEngine
+from models.features import FeatureCache
+from models.orderbook import OrderBook
+
+def make_book(top_ask_size=1.0, deep_ask_size=1.0):
+    asks = [(100.5 + i, top_ask_size if i < 10 else deep_ask_size) for i in range(15)]
+    bids = [(100.0 - i, 2.0) for i in range(15)]
+    return OrderBook.from_levels(asks, bids, symbol='BTC-USDT-SWAP')
+
+def test_features_are_memoized_per_snapshot():
+    cache = FeatureCache()
+    book = make_book()
+    features = cache.get(book)
+    
+    assert cache.get(book) is features and cache.hits == 1
+    assert features.slippage_row(5.0) is features.slippage_row(5.0)
+    assert np.isclose(features.slippage_row(5.0)[0, 2], 5.0 / book.total_ask_volume)
+
+def test_unchanged_levels_reuse_previous_values():
+    cache = FeatureCache()
+    first = cache.get(make_book())
+    maker_taker = first.maker_taker
+    
+    same = cache.get(make_book())
+    assert same.unchanged and same.basis == first.basis
+    assert same.maker_taker is maker_taker
+    
+    deep_change = cache.get(make_book(deep_ask_size=3.0))
+    assert not deep_change.unchanged and deep_change.top_unchanged
+    assert deep_change.maker_taker is maker_taker
+    assert deep_change.imbalance != first.imbalance
+    
+    top_change = cache.get(make_book(top_ask_size=2.0))
+    assert not top_change.top_unchanged
+    assert top_change.maker_taker is not maker_taker
+
+def test_engine_reuses_metrics_until_the_book_or_a_model_changes():
+    engine = TradingEngine(subscriptions=[])
+    first = engine.compute_metrics(make_book())
+    assert engine.compute_metrics(make_book()) == first
+    assert engine.compute_metrics(make_book(top_ask_size=2.0))['slippage'] != first['slippage']
+    
+    # Training moves the models, so an unchanged book is priced again
+    for _ in range(20):
+        engine.slippage_model.update_book(make_book(), 100.0)
+    expected = engine.slippage_model.predict_book(make_book(), 100.0)
+    assert expected != first['slippage']
+    assert engine.compute_metrics(make_book())['slippage'] == expected
+    engine.maker_taker_predictor.update_features(np.ones((200, 5)), np.ones(200, dtype=bool))
+    assert engine.compute_metrics(make_book())['maker_taker'] == engine.maker_taker_predictor.predict_book(make_book())
+
+def test_engine_recomputes_only_the_metrics_whose_inputs_changed():
+    engine = TradingEngine(subscriptions=[])
+    calls = []
+    for name in ('calculate_slippage', 'calculate_fees', 'calculate_market_impact', 'calculate_maker_taker'):
+        method = getattr(engine, name)
+        setattr(engine, name, lambda *args, _name=name, _method=method, **kwargs:
+                calls.append(_name) or _method(*args, **kwargs))
+    engine.compute_metrics(make_book())
+    calls.clear()
+    
+    # Live ingest retrains the slippage model on every snapshot; only its term is priced again
+    engine.slippage_model.update_book(make_book(), 100.0)
+    engine.compute_metrics(make_book())
+    assert calls == ['calculate_slippage']
+    
+    # Levels below the top TOP_LEVELS only move the slippage features
+    calls.clear()
+    engine.compute_metrics(make_book(deep_ask_size=3.0))
+    assert calls == ['calculate_slippage']
+    
+    calls.clear()
+    engine.compute_metrics(make_book(top_ask_size=2.0))
+    assert sorted(calls) == ['calculate_fees', 'calculate_maker_taker', 'calculate_market_impact',
+                             'calculate_slippage']
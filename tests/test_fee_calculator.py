@@ -0,0 +1,80 @@
+import json
+import numpy as np
+import pytest
+from models.fee_calculator import FeeCalculator, RollingVolume
+
+DAY = 86400.0
+
+def test_tier_lookup_and_batch_fees_match_scalar():
+    calculator = FeeCalculator()
+    assert len(calculator.fee_tiers) == 9
+    assert calculator.get_tier_for_volume(0) == 1
+    assert calculator.get_tier_for_volume(49999) == 1
+    assert calculator.get_tier_for_volume(50000) == 2
+    assert calculator.get_tier_for_volume(750000) == 5
+    assert calculator.get_tier_for_volume(1e9) == 9
+
+    volumes = np.array([0, 50000, 750000, 1e9])
+    np.testing.assert_array_equal(calculator.schedule().tiers_for_volumes(volumes), [1, 2, 5, 9])
+
+    rng = np.random.default_rng(3)
+    quantities = rng.uniform(0.1, 10, 200)
+    tiers = rng.integers(1, 10, 200)
+    is_maker = rng.random(200) < 0.5
+    fees = calculator.calculate_fees_batch('limit', quantities, 100.0, tiers, is_maker)
+    expected = [calculator.calculate_fees('limit', q, 100.0, int(t), bool(m))[0]
+                for q, t, m in zip(quantities, tiers, is_maker)]
+    np.testing.assert_allclose(fees, expected)
+
+    with pytest.raises(ValueError):
+        calculator.calculate_fees_batch('market', [1.0], 100.0, [10])
+    # Fractional tiers are rejected rather than truncated, like the scalar path
+    with pytest.raises(ValueError):
+        calculator.calculate_fees_batch('market', [1.0, 1.0], 100.0, [2.0, 2.9])
+    with pytest.raises(ValueError):
+        calculator.calculate_fees('market', 1.0, 100.0, 2.9)
+    np.testing.assert_allclose(calculator.calculate_fees_batch('market', [1.0], 100.0, [2.0]),
+                               calculator.calculate_fees('market', 1.0, 100.0, 2)[0])
+
+def test_instrument_schedule_overrides_default(tmp_path):
+    path = tmp_path / "fees.json"
+    path.write_text(json.dumps({"TEST": {
+        "default": [{"min_volume": 0, "maker_fee": 0.1, "taker_fee": 0.2}],
+        "BTC-USDT": [{"min_volume": 1000, "maker_fee": 0.01, "taker_fee": 0.02},
+                     {"min_volume": 0, "maker_fee": 0.05, "taker_fee": 0.06}],
+    }}))
+    calculator = FeeCalculator(venue="TEST", schedule_file=str(path))
+    assert calculator.tier_labels() == ["Tier 1"]
+    assert calculator.tier_labels("BTC-USDT") == ["Tier 1", "Tier 2"]
+    assert calculator.calculate_fees('market', 1.0, 100.0, 1, symbol="ETH-USDT") == pytest.approx((0.2, 0.2))
+    # Tiers are numbered by ascending volume threshold regardless of file order
+    assert calculator.calculate_fees('market', 1.0, 100.0, 2, symbol="BTC-USDT") == pytest.approx((0.02, 0.02))
+    with pytest.raises(ValueError):
+        calculator.calculate_fees('market', 1.0, 100.0, 2)
+    with pytest.raises(ValueError):
+        FeeCalculator(venue="OKX", schedule_file=str(path))
+
+def test_rolling_volume_expires_old_days():
+    volumes = RollingVolume(window_days=3)
+    volumes.add("a", 100.0, 0.5 * DAY)
+    volumes.add("a", 50.0, 1.5 * DAY)
+    volumes.add("b", 7.0, 1.5 * DAY)
+    assert volumes.volume("a", 2.5 * DAY) == 150.0
+    assert volumes.volume("a", 3.5 * DAY) == 50.0
+    assert volumes.volume("a", 10 * DAY) == 0.0
+    assert volumes.volume("b", 1.5 * DAY) == 7.0
+    assert volumes.volume("c") == 0.0
+
+    # Late trades land in the bucket of their own day, or are dropped once outside the window
+    volumes = RollingVolume(window_days=3)
+    volumes.add("a", 10.0, 5.5 * DAY)
+    volumes.add("a", 20.0, 4.5 * DAY)
+    volumes.add("a", 40.0, 2.5 * DAY)
+    assert volumes.volume("a", 5.5 * DAY) == 30.0
+    assert volumes.volume("a", 6.5 * DAY) == 30.0
+    assert volumes.volume("a", 7.5 * DAY) == 10.0
+
+    calculator = FeeCalculator()
+    calculator.record_trade("acct", 1000.0, 60.0, 0.0)
+    assert calculator.account_tier("acct", timestamp=0.0) == 2
+    assert calculator.account_tier("acct", timestamp=31 * DAY) == 1
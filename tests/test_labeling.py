@@ -0,0 +1,60 @@
+import numpy as np
+from models.labeling import FillLabeler, FirstPassage, LiveFillLabeler, train_maker_taker
+from models.maker_taker import MakerTakerPredictor
+from utils.synthetic import SyntheticBookGenerator
+from utils.tick_store import TickStore
+
+def test_first_passage_matches_a_linear_scan():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=500).cumsum()
+    start = rng.integers(0, 500, 2000)
+    stop = np.minimum(start + rng.integers(0, 40, 2000), 500)
+    threshold = values[start] - rng.uniform(0, 3, 2000)
+    
+    found = FirstPassage(values, max_length=40).first_at_most(start, stop, threshold)
+    for i in range(2000):
+        hits = np.flatnonzero(values[start[i]:stop[i]] <= threshold[i])
+        assert found[i] == (start[i] + hits[0] if hits.size else -1)
+
+def test_orders_rest_cross_or_fill_passively():
+    # The ask trades down through 100.0 at t=2, then the book moves back up
+    timestamps = np.arange(6.0)
+    best_bids = np.array([99.9, 99.9, 99.8, 99.9, 99.9, 99.9])
+    best_asks = np.array([100.1, 100.05, 99.95, 100.1, 100.1, 100.1])
+    labeler = FillLabeler(horizon=2.0, offsets_bps=[-20.0, 0.0, 5.0], sides=[1.0])
+    labels = labeler.label(timestamps, best_bids, best_asks)
+    
+    # Placed at t=0 (mid 100.0): crossing buy, buy at the mid, buy 5 bps behind the mid
+    assert labels.crossed[0].tolist() == [True, False, False]
+    assert labels.is_maker[0].tolist() == [False, True, False]
+    assert labels.fill_index[0, 1] == 2
+    # The 5 bps buy at t=0 (99.95) is only touched, not traded through
+    assert labels.fill_index[0, 2] == -1 and labels.is_maker[1, 1] and not labels.is_maker[1, 2]
+    # Horizons running past the last snapshot are not final
+    assert labels.complete.tolist() == [True, True, True, False, False, False]
+    
+    touch = FillLabeler(horizon=2.0, offsets_bps=[0.0], sides=[-1.0], fill_on_touch=True)
+    assert touch.label([0.0, 1.0, 5.0], [99.0, 100.0, 99.0], [101.0, 101.0, 101.0]).is_maker[0, 0]
+
+def test_labels_train_the_predictor_live_and_from_history(tmp_path):
+    generator = SyntheticBookGenerator(depth=20, volatility=2e-4, seed=12)
+    books = list(generator.books(400))
+    
+    predictor = MakerTakerPredictor(min_samples=10)
+    live = LiveFillLabeler(predictor, FillLabeler(horizon=2.0), sample_interval=0.5)
+    for i, book in enumerate(books):
+        live.observe(book, i * 0.1)
+    assert live.labeled > 0 and predictor.model.n_samples == live.labeled
+    assert live.labeled % live.labeler.orders_per_snapshot == 0
+    
+    store = TickStore(str(tmp_path), depth=20, symbol=books[0].symbol)
+    for i, book in enumerate(books):
+        store.append(book, timestamp=i * 0.125, sequence=i)
+    store.flush()
+    predictor = MakerTakerPredictor(min_samples=10)
+    labeler = FillLabeler(horizon=2.0)
+    total = train_maker_taker(predictor, store, labeler, batch_size=100)
+    
+    # Every snapshot more than one horizon before the end is labeled exactly once
+    assert total == predictor.model.n_samples == 383 * labeler.orders_per_snapshot
+    assert predictor.is_trained
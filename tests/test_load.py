@@ -0,0 +1,24 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from load_server import LoadProfile, start_server_thread
+from load_test import parse_args, run_load
+
+def test_load_test_smoke_run_against_in_process_server():
+    args = parse_args(['--rate', '200', '--depth', '20', '--warmup', '0.5', '--duration', '1.5'])
+    profile = LoadProfile(rate=200, depth=args.depth, frame_pool=16)
+    result = run_load(profile, args, start_server=start_server_thread)
+    
+    # A few hundred frames are offered, and the client keeps up with all but a handful
+    assert result['server_frames_sent'] >= 300
+    assert result['received_per_s'] >= 0.9 * result['offered_per_s']
+    assert 0 < result['processed_per_s'] <= result['received_per_s']
+    assert not result['saturated']
+    
+    latencies = [result['latency_p50_ms'], result['latency_p99_ms'], result['latency_max_ms']]
+    assert np.all(np.isfinite(latencies))
+    assert 0 <= latencies[0] <= latencies[1] <= latencies[2]
+    assert result['reconnects'] == 0
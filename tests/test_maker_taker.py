@@ -0,0 +1,50 @@
+import numpy as np
+from models.maker_taker import MakerTakerPredictor
+from models.online_logistic import OnlineLogisticRegression
+from models.orderbook import OrderBook
+from utils.synthetic import SyntheticBookGenerator
+
+def test_online_classifier_learns_from_samples_and_batches():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.normal(5e-5, 2e-5, 6000), rng.normal(100, 30, 6000)])
+    y = (X[:, 0] - 5e-5) / 2e-5 + rng.logistic(0, 0.3, 6000) > 0
+    
+    single = OnlineLogisticRegression(2)
+    for x, label in zip(X[:4000], y[:4000]):
+        single.partial_fit(x, label)
+    batched = OnlineLogisticRegression(2, learning_rate=0.5)
+    for start in range(0, 4000, 50):
+        batched.partial_fit(X[start:start + 50], y[start:start + 50])
+    
+    for model in (single, batched):
+        accuracy = np.mean((model.predict_proba(X[4000:]) > 0.5) == y[4000:])
+        assert accuracy > 0.85 and model.n_samples == 4000
+    
+    single.set_coefficients(np.array([[1e5, 0.0]]), np.array([-5.0]))
+    assert np.allclose(single.coef_, [1e5, 0.0]) and np.isclose(single.intercept_, -5.0)
+
+def test_predictor_keeps_adapting_after_warmup():
+    model = MakerTakerPredictor(min_samples=50)
+    books = list(SyntheticBookGenerator(depth=20, seed=3).books(400))
+    
+    model.update_batch(books[:50], np.ones(50, dtype=bool))
+    assert model.is_trained and len(model.historical_data) == 50
+    before = model.predict_book(books[-1])
+    
+    # Every later label moves the estimate, there is no one-off training
+    for book in books[50:]:
+        model.update_book(book, book.timestamp, False)
+    assert model.model.n_samples == 400
+    assert model.predict_book(books[-1]) < before
+
+def test_batch_prediction_matches_single_books():
+    model = MakerTakerPredictor(min_samples=10)
+    generator = SyntheticBookGenerator(depth=20, seed=5)
+    books = list(generator.books(30))
+    assert np.allclose(model.predict_book_batch(books[:5]), [model.predict_book(b) for b in books[:5]])
+    
+    model.update_batch(books, np.arange(30) % 3 == 0)
+    books[2] = OrderBook.from_levels([], [])
+    proportions = model.predict_book_batch(books)
+    assert proportions[2] == 0.5
+    assert np.allclose(proportions, [model.predict_book(b) for b in books])
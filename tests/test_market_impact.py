@@ -1,5 +1,6 @@
 import pytest
 import os
+import numpy as np
 from src.models.market_impact import AlmgrenChrissModel
 
 def test_market_impact_calculation():
@@ -23,6 +24,53 @@ def test_optimal_execution():
         time_horizon=1.0
     )
     
-    assert isinstance(schedule, list)
-    assert len(schedule) > 0
-    assert all(isinstance(x, float) for x in schedule) 
\ No newline at end of file
+    assert isinstance(schedule, np.ndarray)
+    assert len(schedule) == 11
+    assert schedule[0] == pytest.approx(1.0) and schedule[-1] == pytest.approx(0.0)
+    assert np.all(np.diff(schedule) <= 0)
+
+def test_execution_plan_grid_matches_single_orders():
+    model = AlmgrenChrissModel(volatility=0.02)
+    quantities = np.array([1.0, 10.0, 100.0])
+    horizons = np.array([0.5, 1.0])
+    volatilities = np.array([0.01, 0.05])
+    risk_aversions = np.array([0.0, 1e-7, 1e-5])
+    plan = model.plan_execution(quantities, 50000.0, horizons, volatilities, risk_aversions, grid=True)
+    
+    assert plan.expected_cost.shape == (3, 2, 2, 3) and plan.holdings.shape == (3, 2, 2, 3, 11)
+    single = model.plan_execution(10.0, 50000.0, 0.5, 0.05, 1e-7)
+    assert np.allclose(plan.holdings[1, 0, 1, 1], single.holdings)
+    assert np.isclose(plan.variance[1, 0, 1, 1], single.variance)
+    
+    # Without risk aversion the schedule is linear and only impact is paid
+    twap = model.plan_execution(10.0, 50000.0, 1.0, risk_aversion=0.0)
+    assert np.allclose(twap.trades, 1.0)
+    units = 10.0 / 50000.0
+    eta_linear, gamma_linear = model.eta * 50000.0 * np.sqrt(10.0), model.gamma * 50000.0
+    eta_tilde = eta_linear - 0.5 * gamma_linear * 0.1
+    assert twap.expected_cost == pytest.approx(0.5 * gamma_linear * units ** 2 + eta_tilde / 0.1 * 10 * (units / 10) ** 2)
+    
+    # The linear coefficients reproduce calculate_market_impact's price moves for the same order
+    temp_impact, perm_impact = model.calculate_market_impact(10.0, 50000.0, 1.0)
+    assert gamma_linear * units == pytest.approx(perm_impact * 50000.0)
+    assert eta_linear * units / 1.0 == pytest.approx(temp_impact * 50000.0)
+    with pytest.raises(ValueError):
+        model.plan_execution(quantities, [50000.0, 51000.0, 52000.0], horizons, grid=True)
+    
+    # Large urgencies trade almost everything at once instead of overflowing
+    urgent = model.plan_execution(10.0, 50000.0, 1.0, risk_aversion=1e9)
+    assert np.isfinite(urgent.holdings).all() and urgent.trades[0] > 9.99
+
+def test_efficient_frontier_trades_cost_for_variance():
+    model = AlmgrenChrissModel(volatility=0.02)
+    frontier = model.efficient_frontier([1.0, 50.0], 50000.0, 1.0)
+    
+    assert frontier.expected_cost.shape == (2, 25)
+    assert np.all(np.diff(frontier.expected_cost, axis=-1) > 0)
+    assert np.all(np.diff(frontier.variance, axis=-1) < 0)
+    
+    # Each schedule beats the linear one on its own objective
+    for i in (0, 12, 24):
+        risk_aversion = frontier.risk_aversion[1, i]
+        twap = model.plan_execution(50.0, 50000.0, 1.0, risk_aversion=0.0)
+        assert frontier.utility[1, i] <= twap.expected_cost + risk_aversion * twap.variance
@@ -0,0 +1,41 @@
+import pytest
+import numpy as np
+from models.orderbook import OrderBook
+from models.slippage import SlippageModel
+from models.maker_taker import MakerTakerPredictor
+
+ASKS = [(100.5, 2.0), (101.0, 1.0), (101.5, 3.0)]
+BIDS = [(100.0, 1.5), (99.5, 2.5), (99.0, 4.0)]
+
+def test_orderbook_cached_values():
+    book = OrderBook.from_levels(ASKS, BIDS)
+    
+    assert book.best_ask == 100.5
+    assert book.best_bid == 100.0
+    assert book.mid_price == pytest.approx(100.25)
+    assert book.spread == pytest.approx(0.5)
+    assert np.allclose(book.ask_depth, [2.0, 3.0, 6.0])
+    assert book.total_bid_volume == pytest.approx(8.0)
+    assert book.top_ask_volume(2) == pytest.approx(3.0)
+    assert book.ask_vwap == pytest.approx((100.5 * 2 + 101.0 + 101.5 * 3) / 6)
+
+def test_models_accept_orderbook():
+    book = OrderBook.from_levels(ASKS, BIDS)
+    slippage_model = SlippageModel()
+    predictor = MakerTakerPredictor()
+    
+    assert slippage_model.predict_book(book, 1.0) == pytest.approx(
+        slippage_model.predict_slippage(ASKS, BIDS, 1.0))
+    assert predictor.predict_book(book) == pytest.approx(
+        predictor.predict_proportion(ASKS, BIDS))
+
+def test_from_raw_normalizes_levels():
+    book = OrderBook.from_raw(
+        [["101.0", "1"], ["100.5", "2"], ["0", "5"], ["bad", "1"], ["110.0", "1"], ["111.0", "1"]],
+        [["100.0", "1.5"], ["99.5", "0"], ["99.0", "4"]]
+    )
+    
+    # Sorted, non-positive and unparseable levels dropped, first >1% gap level removed
+    assert book.ask_prices.tolist() == [100.5, 101.0, 111.0]
+    assert book.ask_sizes.tolist() == [2.0, 1.0, 1.0]
+    assert book.bid_prices.tolist() == [100.0, 99.0]
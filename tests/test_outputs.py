@@ -0,0 +1,39 @@
+import threading
+from engine import TradingEngine
+from ui.outputs import MetricsResult, OutputTexts
+from utils.synthetic import SyntheticBookGenerator
+
+METRICS = {'slippage': 0.01234, 'fees': 1.0, 'impact': 2.5, 'net_cost': 3.51234, 'maker_taker': 0.25, 'latency': 0.42}
+
+def test_only_changed_labels_are_repainted():
+    result = MetricsResult.from_metrics('BTC-USDT-SWAP', METRICS)
+    assert result.formatted()['maker_taker'] == "0.25/0.75"
+    
+    texts = OutputTexts()
+    assert texts.texts['latency'] == "Internal Latency: -- ms"
+    assert len(texts.changes(result.formatted())) == 6
+    assert texts.changes(result.formatted()) == {}
+    
+    moved = MetricsResult.from_metrics('BTC-USDT-SWAP', {**METRICS, 'latency': 0.5, 'fees': 1.001})
+    # Fees round to the same text, so only the latency label changes
+    assert texts.changes(moved.formatted()) == {'latency': "Internal Latency: 0.5 ms"}
+
+def test_metrics_can_be_computed_while_the_models_train():
+    engine = TradingEngine(subscriptions=[], background_training=False)
+    generator = SyntheticBookGenerator(depth=20, seed=9)
+    books = list(generator.books(300))
+    errors = []
+    
+    def price():
+        try:
+            for book in books:
+                engine.compute_metrics(book)
+        except Exception as e:
+            errors.append(e)
+    
+    thread = threading.Thread(target=price)
+    thread.start()
+    for book in books:
+        engine.process_orderbook_data({'book': book})
+    thread.join()
+    assert not errors and engine.performance_metrics['errors'] == 0
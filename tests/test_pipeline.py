@@ -0,0 +1,46 @@
+import threading
+import time
+from utils.conflation import ConflationBuffer
+from websocket.pipeline import ComputePipeline
+
+def test_conflation_keeps_latest_per_key():
+    buffer = ConflationBuffer(max_keys=2)
+    
+    assert buffer.put('BTC', 1)
+    assert buffer.put('BTC', 2)
+    assert buffer.put('ETH', 3)
+    assert not buffer.put('SOL', 4)
+    
+    assert buffer.take(timeout=0) == ('BTC', 2)
+    assert buffer.drain() == {'ETH': 3}
+    assert buffer.stats['conflated'] == 1
+    assert buffer.stats['dropped'] == 1
+    assert buffer.take(timeout=0) is None
+
+def test_pipeline_processes_newest_frame():
+    processed = []
+    started = threading.Event()
+    release = threading.Event()
+    
+    def process(data):
+        processed.append(data['seq'])
+        started.set()
+        release.wait(1.0)
+    
+    pipeline = ComputePipeline(process)
+    pipeline.start()
+    pipeline.submit({'symbol': 'BTC', 'seq': 0})
+    started.wait(1.0)
+    
+    # Worker is busy, so these frames conflate into one slot
+    for seq in range(1, 5):
+        pipeline.submit({'symbol': 'BTC', 'seq': seq})
+    release.set()
+    for _ in range(100):
+        if len(processed) == 2:
+            break
+        time.sleep(0.01)
+    pipeline.stop()
+    
+    assert processed == [0, 4]
+    assert pipeline.stats['conflated'] == 3
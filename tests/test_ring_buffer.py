@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from utils.ring_buffer import RingBuffer, TrainingWindow
+
+def test_view_is_contiguous_and_oldest_first_after_wrap():
+    buffer = RingBuffer(4, (2,))
+    for i in range(7):
+        buffer.append([i, -i])
+    
+    window = buffer.view()
+    assert window[:, 0].tolist() == [3, 4, 5, 6]
+    assert window.base is not None and window.flags['C_CONTIGUOUS']
+    assert buffer.view(2)[:, 0].tolist() == [5, 6]
+    with pytest.raises(ValueError):
+        window[0, 0] = 1
+
+def test_extend_matches_appends():
+    appended, extended = RingBuffer(5), RingBuffer(5)
+    values = np.arange(13, dtype=float)
+    for value in values:
+        appended.append(value)
+    extended.extend(values[:3])
+    extended.extend(values[3:9])
+    extended.extend(values[9:])
+    assert extended.view().tolist() == appended.view().tolist() == [8, 9, 10, 11, 12]
+
+def test_training_window_keeps_features_and_labels_aligned():
+    window = TrainingWindow(3, 2, label_dtype=bool)
+    for i in range(5):
+        window.append(np.array([[i, i]]), i % 2 == 0)
+    assert len(window) == 3
+    assert window.X[:, 0].tolist() == [2, 3, 4]
+    assert window.y.tolist() == [True, False, True]
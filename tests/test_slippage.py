@@ -0,0 +1,59 @@
+import numpy as np
+from models.online_quantile import OnlineQuantileRegressor
+from models.features import FeatureCache
+from models.slippage import SlippageModel
+from utils.synthetic import SyntheticBookGenerator
+from utils.tick_store import TickStore
+
+def test_online_regressor_tracks_quantile():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.normal(1e-5, 3e-6, 20000), rng.uniform(-1, 1, 20000)])
+    y = 3 * X[:, 0] + 1e-5 * X[:, 1] + rng.laplace(0, 2e-5, 20000)
+    
+    for quantile in (0.5, 0.9):
+        model = OnlineQuantileRegressor(2, quantile=quantile, learning_rate=0.01)
+        for x, target in zip(X[:18000], y[:18000]):
+            model.partial_fit(x, target)
+        coverage = np.mean(y[18000:] < model.predict(X[18000:]))
+        assert abs(coverage - quantile) < 0.05
+
+def test_exact_refit_round_trips_coefficients():
+    model = OnlineQuantileRegressor(2)
+    rng = np.random.default_rng(1)
+    for x in rng.normal(size=(50, 2)):
+        model.partial_fit(x, x.sum())
+    model.set_coefficients(np.array([2.0, -1.0]), 0.5)
+    assert np.allclose(model.coef_, [2.0, -1.0]) and np.isclose(model.intercept_, 0.5)
+    assert np.isclose(model.predict([[1.0, 1.0]])[0], 1.5)
+
+def test_slippage_model_updates_online_with_periodic_refit():
+    model = SlippageModel(window_size=50, refit_interval=25)
+    books = list(SyntheticBookGenerator(depth=20, seed=4).books(75))
+    for book in books:
+        model.update_book(book, 10.0)
+    
+    # The last update triggered a refit, so the online model starts from the exact fit
+    assert model.updates == 75 and len(model.historical_data) == 50
+    assert np.allclose(model.model.coef_, model.exact_model.coef_)
+    assert model.predict_book(books[-1], 10.0) >= 0.0
+
+def test_batch_update_from_tick_store_columns_matches_per_book_updates(tmp_path):
+    store = TickStore(str(tmp_path), depth=25)
+    for i, book in enumerate(SyntheticBookGenerator(depth=20, seed=5).books(120)):
+        store.append(book, timestamp=1000.0 + i)  # Padded with empty levels on disk
+    store.flush()
+    batch = store.window()
+    
+    for quantity in (10.0, -10.0):
+        batched = SlippageModel(window_size=50, refit_interval=40, feature_cache=FeatureCache())
+        looped = SlippageModel(window_size=50, refit_interval=40, feature_cache=FeatureCache())
+        assert batched.update_batch(batch.rows(slice(0, 70)), quantity) == 70
+        batched.update_batch(batch.rows(slice(70, None)), quantity)
+        for book in batch.books():
+            looped.update_book(book, quantity)
+        
+        assert batched.updates == looped.updates == 120
+        assert np.allclose(batched.historical_data.X, looped.historical_data.X)
+        assert np.allclose(batched.historical_data.y, looped.historical_data.y)
+        assert np.allclose(batched.model.coef_, looped.model.coef_)
+        assert np.isclose(batched.model.intercept_, looped.model.intercept_)
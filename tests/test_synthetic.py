@@ -0,0 +1,21 @@
+from models.orderbook import OrderBook
+from utils.synthetic import SyntheticBookGenerator
+
+def test_books_are_valid_and_reproducible():
+    first = [book.mid_price for book in SyntheticBookGenerator(depth=20, seed=1).books(5)]
+    second = [book.mid_price for book in SyntheticBookGenerator(depth=20, seed=1).books(5)]
+    assert first == second
+    
+    book = SyntheticBookGenerator(depth=20, spread_bps=2.0, seed=1).next_book()
+    assert len(book.asks) == 20 and len(book.bids) == 20
+    assert book.spread / book.mid_price * 10000 >= 2.0 - 1e-6
+
+def test_messages_survive_normalization():
+    message = SyntheticBookGenerator(depth=30, seed=2).next_message()
+    book = OrderBook.from_raw(message['asks'], message['bids'])
+    assert len(book.asks) == 30 and len(book.bids) == 30
+
+def test_skew_shifts_volume_to_bids():
+    generator = SyntheticBookGenerator(depth=50, skew=0.5, seed=3)
+    books = list(generator.books(20))
+    assert sum(b.total_bid_volume for b in books) > 2 * sum(b.total_ask_volume for b in books)
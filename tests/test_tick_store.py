@@ -0,0 +1,63 @@
+import json
+import numpy as np
+import pytest
+from models.orderbook import OrderBook
+from utils.tick_store import TickStore, ingest_frame_log
+from websocket.recorder import FrameRecorder
+
+def make_book(mid, levels):
+    asks = [(mid + 0.5 + i, 1.0 + i) for i in range(levels)]
+    bids = [(mid - 0.5 - i, 2.0 + i) for i in range(levels)]
+    return OrderBook.from_levels(asks, bids)
+
+def test_append_reopen_and_time_window(tmp_path):
+    store = TickStore(str(tmp_path), depth=5, symbol='BTC-USDT-SWAP')
+    for i in range(100):
+        store.append(make_book(100.0 + i, 3 if i % 2 else 8), timestamp=1000.0 + i, sequence=i)
+    store.flush()
+    
+    reopened = TickStore(str(tmp_path))
+    assert len(reopened) == 100 and reopened.depth == 5
+    
+    window = reopened.window(1010.0, 1020.0)
+    assert list(window.sequence) == list(range(10, 20))
+    assert isinstance(window.ask_prices, np.memmap)
+    
+    odd = window.book(1)  # Three levels, padded to five on disk
+    assert len(odd.asks) == 3 and odd.best_ask == 111.5
+    even = window.book(0)  # Eight levels, truncated to five
+    assert len(even.bids) == 5 and even.best_bid == 109.5
+    assert even.symbol == 'BTC-USDT-SWAP'
+
+def test_iter_batches_covers_range(tmp_path):
+    store = TickStore(str(tmp_path), depth=2)
+    n = 25
+    store.append_batch(np.arange(n, dtype=float), np.arange(n),
+                       np.full((n, 2), 101.0), np.ones((n, 2)),
+                       np.full((n, 2), 99.0), np.ones((n, 2)))
+    store.flush()
+    
+    batches = list(store.iter_batches(10, start=3))
+    assert [len(b) for b in batches] == [10, 10, 2]
+    assert batches[-1].timestamps[-1] == 24.0
+    assert sum(1 for b in batches for _ in b.books()) == 22
+
+def test_rejects_out_of_order_timestamps(tmp_path):
+    store = TickStore(str(tmp_path), depth=2)
+    store.append(make_book(100.0, 2), timestamp=5.0)
+    with pytest.raises(ValueError):
+        store.append(make_book(100.0, 2), timestamp=4.0)
+
+def test_ingest_frame_log_splits_symbols(tmp_path):
+    log = str(tmp_path / 'frames.bin')
+    with FrameRecorder(log) as recorder:
+        for i in range(6):
+            symbol = 'BTC-USDT-SWAP' if i % 2 else 'ETH-USDT-SWAP'
+            frame = {'symbol': symbol, 'asks': [[str(101 + i), "1"]], 'bids': [[str(100 + i), "1"]]}
+            recorder.write(json.dumps(frame), 1000.0 + i)
+    
+    stores = ingest_frame_log(log, str(tmp_path / 'ticks'), depth=3)
+    assert sorted(stores) == ['BTC-USDT-SWAP', 'ETH-USDT-SWAP']
+    btc = TickStore(str(tmp_path / 'ticks' / 'BTC-USDT-SWAP'))
+    assert list(btc.window().timestamps) == [1001.0, 1003.0, 1005.0]
+    assert btc.window().book(2).best_ask == 106.0
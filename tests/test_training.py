@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from models.maker_taker import MakerTakerPredictor
+from models.slippage import SlippageModel
+from models.training import TrainingScheduler
+from utils.ring_buffer import TrainingWindow
+from utils.synthetic import SyntheticBookGenerator
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+def test_slippage_refit_runs_in_a_worker_process_and_is_swapped_in():
+    scheduler = TrainingScheduler(interval=0.0)
+    model = SlippageModel(scheduler=scheduler)
+    generator = SyntheticBookGenerator(depth=20, seed=8)
+    try:
+        for book in generator.books(10):
+            model.update_book(book, 10.0)
+        assert wait_for(lambda: model.training_job.current is not None)
+        
+        # The fit is applied by the next update, on the data thread
+        assert model.fitted is None
+        model.update_book(generator.next_book(), 10.0)
+        assert model.fitted.version >= 1 and model.fitted.fit_duration > 0
+        assert model.fitted.n_samples == 10
+        assert scheduler.stats()['slippage']['failures'] == 0
+    finally:
+        scheduler.shutdown(wait=True)
+
+def test_maker_taker_is_trained_in_the_background():
+    scheduler = TrainingScheduler(executor=ThreadPoolExecutor(1))
+    model = MakerTakerPredictor(scheduler=scheduler)
+    books = list(SyntheticBookGenerator(depth=20, seed=9).books(100))
+    for i, book in enumerate(books):
+        model.update_book(book, book.timestamp, i % 2 == 0)
+    
+    assert wait_for(lambda: model.training_job.current is not None)
+    
+    # The fit is applied by the next update, on the data thread
+    model.update_book(books[0], books[0].timestamp, True)
+    assert model.fitted.version == 1
+    assert model.exact_model is model.fitted.estimator
+    assert 0 <= model.predict_book(books[0]) <= 1
+
+def test_failed_fit_keeps_serving_the_old_model():
+    scheduler = TrainingScheduler(executor=ThreadPoolExecutor(1))
+    model = MakerTakerPredictor(scheduler=scheduler)
+    for book in SyntheticBookGenerator(depth=20, seed=10).books(100):
+        model.update_book(book, book.timestamp, True)  # A single class cannot be fitted
+    
+    assert wait_for(lambda: model.training_job.failures == 1)
+    assert model.fitted is None and model.training_job.current is None
+
+def test_drift_triggers_an_early_refit():
+    scheduler = TrainingScheduler(interval=3600.0, executor=ThreadPoolExecutor(1))
+    window = TrainingWindow(20, 1)
+    for i in range(20):
+        window.append([i], float(i))
+    fits = []
+    job = scheduler.register('test', window, lambda: _Mean(), fits.append, drift_tolerance=0.5)
+    
+    job.observe(1.0)
+    assert job.poll() and wait_for(lambda: len(fits) == 1)
+    assert job.reference_error == 1.0 and not job.poll()
+    for _ in range(100):
+        job.observe(3.0)
+    assert job.drifted() and job.poll()
+    assert wait_for(lambda: len(fits) == 2) and fits[1].version == 2
+
+class _Mean:
+    def fit(self, X, y):
+        self.mean = float(np.mean(y))
+        return self